@@ -0,0 +1,232 @@
+import sys
+import threading
+import unittest
+import urllib3
+from unittest import mock
+
+from xrdsst.api_client.api_client import ApiClient
+from xrdsst.api_client.extensions import shared_rest_client_stats, reset_shared_rest_clients, limit_rate, set_rate_limit, \
+    reset_rate_limits, rate_limit_stats, adapt_rate, _rate_limiter, extended_api_ex
+from xrdsst.configuration.configuration import Configuration
+from xrdsst.rest.rest import ApiException
+
+
+class TestApiClient(unittest.TestCase):
+    @staticmethod
+    def api_config(host='https://ss.somewhere:4000/api/v1', api_key='X-Road-apikey token=66666666-8000-4011-a000-333336633333'):
+        api_config = Configuration()
+        api_config.api_key['Authorization'] = api_key
+        api_config.host = host
+        api_config.verify_ssl = False
+        return api_config
+
+    def setUp(self):
+        reset_shared_rest_clients()
+        reset_rate_limits()
+
+    def tearDown(self):
+        reset_shared_rest_clients()
+        reset_rate_limits()
+
+    def test_rest_client_shared_for_same_server(self):
+        api_client_1 = ApiClient(self.api_config())
+        api_client_2 = ApiClient(self.api_config())
+
+        assert api_client_1.rest_client is api_client_2.rest_client
+        assert shared_rest_client_stats()['clients'] == 1
+        assert shared_rest_client_stats()['reused'] == 1
+
+    def test_rest_client_not_shared_across_servers_or_credentials(self):
+        api_client_1 = ApiClient(self.api_config())
+        api_client_2 = ApiClient(self.api_config(host='https://ss.elsewhere:4000/api/v1'))
+        api_client_3 = ApiClient(self.api_config(api_key='X-Road-apikey token=76666666-8000-4011-a000-333336633333'))
+
+        assert api_client_1.rest_client is not api_client_2.rest_client
+        assert api_client_1.rest_client is not api_client_3.rest_client
+        assert shared_rest_client_stats()['clients'] == 3
+        assert shared_rest_client_stats()['reused'] == 0
+
+    def test_rest_client_reset_for_single_host(self):
+        api_client_1 = ApiClient(self.api_config())
+        ApiClient(self.api_config(host='https://ss.elsewhere:4000/api/v1'))
+
+        reset_shared_rest_clients('https://ss.somewhere:4000/api/v1')
+
+        assert ApiClient(self.api_config()).rest_client is not api_client_1.rest_client
+        assert shared_rest_client_stats()['clients'] == 3
+
+    def test_rest_client_stats_without_requests(self):
+        ApiClient(self.api_config())
+        stats = shared_rest_client_stats()
+
+        assert stats['requests'] == 0
+        assert stats['connections'] == 0
+        assert stats['handshakes_saved'] == 0
+
+    def test_thread_pool_not_created_for_blocking_clients(self):
+        threads_before = threading.active_count()
+        api_client = ApiClient(self.api_config())
+
+        assert api_client._pool is None
+        assert threading.active_count() == threads_before
+
+    def test_thread_pool_created_on_first_use(self):
+        api_client = ApiClient(self.api_config())
+        pool = api_client.pool
+
+        assert pool is api_client.pool
+        del api_client
+
+    def test_api_client_construction_creates_no_thread_pool(self):
+        with mock.patch('xrdsst.api_client.api_client.ThreadPool') as thread_pool:
+            api_clients = [ApiClient(self.api_config()) for _ in range(20)]
+            assert thread_pool.call_count == 0
+
+            api_clients[0].pool
+            api_clients[0].pool
+            assert thread_pool.call_count == 1
+
+    def test_rate_limit_per_second_waits_exact_time(self):
+        clock = [100.0]
+        sleeps = []
+        with mock.patch('xrdsst.api_client.extensions.time.monotonic', side_effect=lambda: clock[0]), \
+                mock.patch('xrdsst.api_client.extensions.time.sleep', side_effect=sleeps.append):
+            set_rate_limit('https://ss.somewhere:4000', per_second=4, per_minute=None)
+            for _ in range(5):
+                limit_rate('https://ss.somewhere:4000')
+            clock[0] += 0.125
+            limit_rate('https://ss.somewhere:4000')
+
+        assert sleeps == [0.25, 0.375]
+        assert rate_limit_stats() == {'calls': 6, 'throttled': 2, 'throttle_time': 0.625, 'backoffs': 0}
+
+    def test_rate_limit_per_minute(self):
+        clock = [100.0]
+        sleeps = []
+        with mock.patch('xrdsst.api_client.extensions.time.monotonic', side_effect=lambda: clock[0]), \
+                mock.patch('xrdsst.api_client.extensions.time.sleep', side_effect=sleeps.append):
+            set_rate_limit('https://ss.somewhere:4000', per_second=100, per_minute=3)
+            for _ in range(4):
+                limit_rate('https://ss.somewhere:4000')
+            limit_rate('https://ss.elsewhere:4000')  # Default limits, separate host
+
+        assert sleeps == [20.0]
+        assert rate_limit_stats()['calls'] == 5
+        assert rate_limit_stats()['throttled'] == 1
+
+    def test_rate_limit_unlimited(self):
+        with mock.patch('xrdsst.api_client.extensions.time.sleep') as sleep:
+            set_rate_limit('https://ss.somewhere:4000', per_second=None, per_minute=None)
+            for _ in range(100):
+                limit_rate('https://ss.somewhere:4000')
+
+        sleep.assert_not_called()
+        assert rate_limit_stats() == {'calls': 100, 'throttled': 0, 'throttle_time': 0.0, 'backoffs': 0}
+
+    def test_adaptive_rate_limit_increase_and_backoff(self):
+        clock = [100.0]
+        with mock.patch('xrdsst.api_client.extensions.time.monotonic', side_effect=lambda: clock[0]):
+            set_rate_limit('https://ss.somewhere:4000', per_second=4, per_minute=None, adaptive=True, max_per_second=5)
+            limiter = _rate_limiter('https://ss.somewhere:4000')
+            for _ in range(4):
+                adapt_rate('https://ss.somewhere:4000')
+            assert 4.9 < limiter.per_second <= 5
+            for _ in range(10):
+                adapt_rate('https://ss.somewhere:4000')
+            assert limiter.per_second == 5
+
+            adapt_rate('https://ss.somewhere:4000', ApiException(status=404))
+            assert limiter.per_second == 5
+            adapt_rate('https://ss.somewhere:4000', ApiException(status=429))
+            assert limiter.per_second == 2.5
+            adapt_rate('https://ss.somewhere:4000', ApiException(status=503))  # Same congestion, within a second
+            assert limiter.per_second == 2.5
+
+            clock[0] += 1
+            adapt_rate('https://ss.somewhere:4000', urllib3.exceptions.ProtocolError('Connection aborted.', ConnectionResetError()))
+            assert limiter.per_second == 1.25
+            clock[0] += 1
+            adapt_rate('https://ss.somewhere:4000', ApiException(status=503))
+            assert limiter.per_second == 1
+
+        assert rate_limit_stats()['backoffs'] == 3
+
+    def test_adaptive_rate_limit_grows_past_default_per_minute(self):
+        clock = [100.0]
+        sleeps = []
+        with mock.patch('xrdsst.api_client.extensions.time.monotonic', side_effect=lambda: clock[0]), \
+                mock.patch('xrdsst.api_client.extensions.time.sleep', side_effect=sleeps.append):
+            set_rate_limit('https://ss.somewhere:4000', adaptive=True, max_per_second=40)
+            limiter = _rate_limiter('https://ss.somewhere:4000')
+            for _ in range(1000):
+                adapt_rate('https://ss.somewhere:4000')
+            assert limiter.per_second == 40
+            assert limiter.per_minute == 1200
+
+            # 900 calls in less than half a minute, beyond the default 600 per minute
+            for _ in range(900):
+                limit_rate('https://ss.somewhere:4000')
+                clock[0] += 1 / 32
+
+        assert sleeps == []
+        adapt_rate('https://ss.somewhere:4000', ApiException(status=503))
+        assert limiter.per_minute == 600
+
+    def test_fixed_rate_limit_not_adapted(self):
+        set_rate_limit('https://ss.somewhere:4000', per_second=4, per_minute=None)
+        adapt_rate('https://ss.somewhere:4000')
+        adapt_rate('https://ss.somewhere:4000', ApiException(status=429))
+
+        assert _rate_limiter('https://ss.somewhere:4000').per_second == 4
+        assert rate_limit_stats()['backoffs'] == 0
+
+    def test_api_call_outcome_adapts_rate(self):
+        set_rate_limit('https://ss.somewhere:4000', per_second=4, per_minute=None, adaptive=True)
+        api_client = ApiClient(self.api_config())
+        with mock.patch.object(ApiClient, '_ApiClient__ratelimited_call_api', side_effect=ApiException(status=503)):
+            with self.assertRaises(ApiException):
+                api_client.call_api('/tokens', 'GET')
+        assert _rate_limiter('https://ss.somewhere:4000').per_second == 2
+
+        with mock.patch.object(ApiClient, '_ApiClient__ratelimited_call_api', return_value=[]):
+            api_client.call_api('/tokens', 'GET')
+        assert _rate_limiter('https://ss.somewhere:4000').per_second == 2.5
+
+    # Fakes controller -> API module -> API client call chain, by compiling the functions with their module file names.
+    @staticmethod
+    def api_call_chain(depth=0):
+        chain = {'extended_api_ex': extended_api_ex, 'ApiException': ApiException}
+        exec(compile(
+            "def remote_op(api_client):\n"
+            "    return extended_api_ex(ApiException(status=409), api_client, '/clients', 'POST')\n",
+            '/opt/xrdsst/api/clients_api.py', 'exec'), chain)
+        exec(compile("def add_client(api_client):\n    return remote_op(api_client)\n", '/opt/xrdsst/controllers/client.py', 'exec'), chain)
+
+        def nested(level, api_client):
+            return nested(level - 1, api_client) if level > 0 else chain['add_client'](api_client)
+
+        return lambda api_client: nested(depth, api_client)
+
+    def test_extended_api_ex_call_site(self):
+        api_ex = self.api_call_chain()(None)
+
+        assert api_ex.api_call['method'] == 'POST'
+        assert api_ex.api_call['resource_path'] == '/clients'
+        assert api_ex.api_call['controller_func'] == 'client.py#add_client'
+        assert api_ex.api_call['module_func'] == 'clients_api.py#remote_op'
+
+    def test_extended_api_ex_without_controller(self):
+        api_ex = extended_api_ex(ApiException(status=409), None, '/clients', 'POST')
+
+        assert api_ex.api_call['method'] == 'POST'
+        assert 'controller_func' not in api_ex.api_call
+
+    # Call site attribution walks the bare frames, inspect.stack() would read source context of every frame as well.
+    def test_extended_api_ex_walks_bare_frames(self):
+        api_call = self.api_call_chain(depth=20)
+        with mock.patch('inspect.stack') as stack, mock.patch('sys._getframe', wraps=sys._getframe) as getframe:
+            api_ex = api_call(None)
+
+        assert stack.call_count == 0
+        assert getframe.call_count == 1
+        assert api_ex.api_call['controller_func'] == 'client.py#add_client'
@@ -0,0 +1,185 @@
+import hashlib
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import pytest
+
+from xrdsst.controllers.apikey import ApiKeyController
+from xrdsst.controllers.base import BaseController
+from xrdsst.core.api_key_cache import ApiKeyCache
+from xrdsst.core.ssh import StubSshTransport, set_ssh_transport
+from xrdsst.main import XRDSSTTest
+
+
+class TestApiKey(unittest.TestCase):
+    ss_config = {
+        'admin_credentials': 'TOOLKIT_ADMIN_CREDENTIALS',
+        'ssh_access': {'user': 'TOOLKIT_SSH_USER', 'private_key': 'TOOLKIT_SSH_PRIVATE_KEY'},
+        'api_key_cache': {'secret': 'TOOLKIT_API_KEY_CACHE_SECRET', 'ttl': 600},
+        'security_server':
+            [{'name': 'ssX',
+              'url': 'https://ssX:4000/api/v1',
+              'api_key': 'TOOLKIT_SSX_API_KEY',
+              'api_key_url': 'https://localhost:4000/api/v1/api-keys'},
+             {'name': 'ssY',
+              'url': 'https://ssY:4000/api/v1',
+              'api_key': 'TOOLKIT_SSY_API_KEY',
+              'api_key_url': 'https://localhost:4000/api/v1/api-keys'}]
+    }
+
+    @pytest.fixture(autouse=True)
+    def capsys(self, capsys):
+        self.capsys = capsys
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory(prefix='xrdsst-')
+        self.config = dict(self.ss_config, api_key_cache=dict(self.ss_config['api_key_cache'], file=os.path.join(self.cache_dir.name, 'api-keys')))
+        os.environ['TOOLKIT_API_KEY_CACHE_SECRET'] = 'not so secret'
+
+    def tearDown(self):
+        set_ssh_transport(None)
+        self.cache_dir.cleanup()
+        os.environ.pop('TOOLKIT_API_KEY_CACHE_SECRET', None)
+
+    def test_api_key_cache_not_configured(self):
+        assert ApiKeyCache.from_config(self.ss_config) is not None
+        os.environ.pop('TOOLKIT_API_KEY_CACHE_SECRET')
+        assert ApiKeyCache.from_config(self.config) is None
+        assert ApiKeyCache.from_config({'security_server': []}) is None
+
+    def test_api_key_cache_encrypted_roundtrip(self):
+        ss = self.config['security_server'][0]
+        ApiKeyCache.from_config(self.config).put(ss, '88888888-8000-4000-a000-727272727272', 17, 'ssX')
+
+        with open(self.config['api_key_cache']['file'], 'r') as cache_file:
+            assert cache_file.read().count('88888888') == 0
+        assert os.stat(self.config['api_key_cache']['file']).st_mode & 0o077 == 0
+
+        entry = ApiKeyCache.from_config(self.config).get(ss)
+        assert entry['key'] == '88888888-8000-4000-a000-727272727272'
+        assert entry['id'] == 17
+        assert ApiKeyCache.from_config(self.config).get(self.config['security_server'][1]) is None
+
+        os.environ['TOOLKIT_API_KEY_CACHE_SECRET'] = 'other secret'
+        assert ApiKeyCache.from_config(self.config).get(ss) is None
+
+    def test_api_key_cache_expiry(self):
+        ss = self.config['security_server'][0]
+        api_key_cache = ApiKeyCache.from_config(self.config)
+        api_key_cache.put(ss, '88888888-8000-4000-a000-727272727272', 17, 'ssX')
+        with mock.patch('xrdsst.core.api_key_cache.time.time', return_value=api_key_cache.entries()[0][1]['created'] + 600):
+            assert api_key_cache.get(ss) is None
+            assert [ssn for ssn, entry in api_key_cache.expired()] == ['ssX']
+
+    def test_get_api_key_reuses_cached_key(self):
+        def create_api_key(controller, config, roles_list, security_server):
+            controller.api_key_id[security_server['name']] = (17, 'ssX')
+            return '88888888-8000-4000-a000-727272727272'
+
+        ss = self.config['security_server'][0]
+        with mock.patch.object(BaseController, 'create_api_key', autospec=True, side_effect=create_api_key) as create_mock, \
+                mock.patch.object(BaseController, 'is_api_key_rejected', return_value=False) as rejected_mock:
+            with XRDSSTTest() as app:
+                base_controller = BaseController()
+                base_controller.app = app
+                assert base_controller.get_api_key(self.config, ss) == '88888888-8000-4000-a000-727272727272'
+                assert 'ssX' not in base_controller.api_key_id  # Not revoked at exit
+
+            app.api_keys.clear()
+            with XRDSSTTest() as app:
+                base_controller = BaseController()
+                base_controller.app = app
+                assert base_controller.get_api_key(self.config, ss) == '88888888-8000-4000-a000-727272727272'
+
+            assert create_mock.call_count == 1
+            assert rejected_mock.call_count == 1
+            app.api_keys.clear()
+
+    def test_get_api_key_replaces_rejected_cached_key(self):
+        def create_api_key(controller, config, roles_list, security_server):
+            controller.api_key_id[security_server['name']] = (18, 'ssX')
+            return '99999999-8000-4000-a000-727272727272'
+
+        ss = self.config['security_server'][0]
+        api_key_cache = ApiKeyCache.from_config(self.config)
+        api_key_cache.put(ss, '88888888-8000-4000-a000-727272727272', 17, 'ssX')
+        with mock.patch.object(BaseController, 'create_api_key', autospec=True, side_effect=create_api_key) as create_mock, \
+                mock.patch.object(BaseController, 'is_api_key_rejected', return_value=True):
+            with XRDSSTTest() as app:
+                base_controller = BaseController()
+                base_controller.app = app
+                assert base_controller.get_api_key(self.config, ss) == '99999999-8000-4000-a000-727272727272'
+            app.api_keys.clear()
+
+        assert create_mock.call_count == 1
+        assert api_key_cache.get(ss)['id'] == 18
+
+    def test_api_key_cache_derives_key_once(self):
+        ss = self.config['security_server'][0]
+        api_key_cache = ApiKeyCache.from_config(self.config)
+        with mock.patch('xrdsst.core.api_key_cache.hashlib.pbkdf2_hmac', wraps=hashlib.pbkdf2_hmac) as kdf_mock:
+            api_key_cache.put(ss, '88888888-8000-4000-a000-727272727272', 17, 'ssX')
+            api_key_cache.put(self.config['security_server'][1], '99999999-8000-4000-a000-727272727272', 18, 'ssY')
+            assert api_key_cache.get(ss)['id'] == 17
+            api_key_cache.remove('ssY')
+            assert kdf_mock.call_count == 1
+
+            assert ApiKeyCache.from_config(self.config).get(ss)['id'] == 17
+            assert kdf_mock.call_count == 2
+
+    def test_get_api_key_revokes_expired_cached_key(self):
+        ss = self.config['security_server'][0]
+        api_key_cache = ApiKeyCache.from_config(self.config)
+        api_key_cache.put(ss, '88888888-8000-4000-a000-727272727272', 17, 'ssX')
+        expiry = api_key_cache.entries()[0][1]['created'] + 600
+
+        stub_transport = StubSshTransport()
+        set_ssh_transport(stub_transport)
+        with mock.patch('xrdsst.core.api_key_cache.time.time', return_value=expiry), \
+                mock.patch.object(BaseController, 'create_api_key', return_value=None):
+            with XRDSSTTest() as app:
+                base_controller = BaseController()
+                base_controller.app = app
+                app.api_configs[ss['name']] = object()
+                base_controller.get_api_key(self.config, ss)
+                assert ss['name'] not in app.api_configs
+
+        assert len(stub_transport.commands) == 1
+        assert stub_transport.commands[0][1] == 'ssX'
+        assert stub_transport.commands[0][2].count('api-keys/17') == 1
+        assert api_key_cache.entries() == []
+
+    def test_revoke_all(self):
+        api_key_cache = ApiKeyCache.from_config(self.config)
+        api_key_cache.put(self.config['security_server'][0], '88888888-8000-4000-a000-727272727272', 17, 'ssX')
+        api_key_cache.put(self.config['security_server'][1], '99999999-8000-4000-a000-727272727272', 18, 'ssY')
+
+        set_ssh_transport(StubSshTransport(lambda ssh_user, address, command: (0, '') if address == 'ssX' else (255, 'ssh: connect failed')))
+        with XRDSSTTest() as app:
+            apikey_controller = ApiKeyController()
+            apikey_controller.app = app
+            apikey_controller.load_config = (lambda: self.config)
+            app.api_configs.update({'ssX': object(), 'ssY': object()})
+            apikey_controller.revoke_all()
+            assert list(app.api_configs.keys()) == ['ssY']
+
+        out, err = self.capsys.readouterr()
+        assert out.count("Cached API key for security server ssX revoked.") == 1
+        assert [ssn for ssn, entry in api_key_cache.entries()] == ['ssY']
+
+        with self.capsys.disabled():
+            sys.stdout.write(out)
+            sys.stderr.write(err)
+
+    def test_revoke_all_cache_not_configured(self):
+        os.environ.pop('TOOLKIT_API_KEY_CACHE_SECRET')
+        with XRDSSTTest() as app:
+            apikey_controller = ApiKeyController()
+            apikey_controller.app = app
+            assert apikey_controller.revoke_all_cached(self.config) == []
+
+        out, err = self.capsys.readouterr()
+        assert out.count("API key cache not configured") == 1
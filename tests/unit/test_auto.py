@@ -1,11 +1,15 @@
+import copy
 import os
 import sys
+import threading
 import unittest
+from datetime import datetime, timedelta
 from unittest import mock
 
 import pytest
 
 from tests.util.test_util import ObjectStruct, StatusTestData
+from xrdsst.configuration.configuration import Configuration
 from xrdsst.controllers.base import BaseController
 from xrdsst.controllers.auto import AutoController
 from xrdsst.controllers.cert import CertController
@@ -15,7 +19,9 @@ from xrdsst.controllers.service import ServiceController
 from xrdsst.controllers.status import StatusController
 from xrdsst.controllers.timestamp import TimestampController
 from xrdsst.controllers.token import TokenController
-from xrdsst.main import XRDSSTTest
+from xrdsst.core.api_util import StatusFacet
+from xrdsst.core.parallel import single_server_config
+from xrdsst.main import XRDSSTTest, OPS
 
 
 class TestAuto(unittest.TestCase):
@@ -62,7 +68,8 @@ class TestAuto(unittest.TestCase):
         with XRDSSTTest() as app:
             auto_controller = AutoController()
             auto_controller.app = app
-            auto_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)  # Double mock!
+            auto_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)  # Double mock!
+            auto_controller.refresh_server_status = (lambda a, s, st, f: StatusTestData.server_status_essentials_complete)
             auto_controller._default()
 
             init_mock.assert_called()
@@ -89,7 +96,8 @@ class TestAuto(unittest.TestCase):
         with XRDSSTTest() as app:
             auto_controller = AutoController()
             auto_controller.app = app
-            auto_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete_token_logged_out())  # Double mock!
+            auto_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete_token_logged_out())  # Double mock!
+            auto_controller.refresh_server_status = (lambda a, s, st, f: StatusTestData.server_status_essentials_complete_token_logged_out())
             auto_controller._default()
 
             init_mock.assert_called_once()
@@ -104,3 +112,197 @@ class TestAuto(unittest.TestCase):
             with self.capsys.disabled():
                 sys.stdout.write(out)
                 sys.stderr.write(err)
+
+    @mock.patch.object(XRDSSTTest, 'pargs', ObjectStruct(configfile=BaseController.config_file, parallel=2))
+    @mock.patch.object(BaseController, 'load_config', (lambda x, y=None: TestAuto.ss_config))
+    @mock.patch.object(StatusController, '_default', (lambda x: StatusTestData.server_status_essentials_complete))  # Double mock!
+    @mock.patch.object(ServiceController, 'enable_description')
+    @mock.patch.object(ServiceController, 'add_description')
+    @mock.patch.object(ClientController, 'register')
+    @mock.patch.object(ClientController, 'add')
+    @mock.patch.object(CertController, 'activate')
+    @mock.patch.object(CertController, 'register')
+    @mock.patch.object(CertController, 'import_')
+    @mock.patch.object(TokenController, 'init_keys')
+    @mock.patch.object(TokenController, 'login')
+    @mock.patch.object(TimestampController, 'init')
+    @mock.patch.object(InitServerController, '_default')
+    def test_autoconfig_concurrent(self,
+                                   init_mock, timestamp_init_mock, token_login_mock, token_key_init_mock,
+                                   cert_import_mock, cert_register_mock, cert_activate_mock,
+                                   client_add_mock, client_register_mock, service_desc_add_mock, service_desc_enable_mock):
+        with XRDSSTTest() as app:
+            auto_controller = AutoController()
+            auto_controller.app = app
+            auto_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)  # Double mock!
+            auto_controller.refresh_server_status = (lambda a, s, st, f: StatusTestData.server_status_essentials_complete)
+            auto_controller._default()
+
+            for op_mock in [init_mock, timestamp_init_mock, token_login_mock, token_key_init_mock, cert_import_mock, cert_register_mock,
+                            cert_activate_mock, client_add_mock, client_register_mock, service_desc_add_mock, service_desc_enable_mock]:
+                assert op_mock.call_count == 2
+
+            assert set(app.OP_SERVER_STATUSES.keys()) >= {'ssX', 'ssY'}
+
+            out, err = self.capsys.readouterr()
+            assert out.count("Configured 2 security servers with 2 workers") == 1
+            assert out.index("AT THE END OF AUTOCONFIGURATION") < out.index("AUTO ['init']->'ssY'")
+
+            with self.capsys.disabled():
+                sys.stdout.write(out)
+                sys.stderr.write(err)
+
+    @mock.patch.object(XRDSSTTest, 'pargs', ObjectStruct(configfile=BaseController.config_file, parallel=2))
+    @mock.patch.object(StatusController, '_default', (lambda x: StatusTestData.server_status_essentials_complete))  # Double mock!
+    def test_autoconfig_concurrent_api_keys_not_mixed(self):
+        barrier = threading.Barrier(2)
+        authorizations = {}
+
+        def server_status(api_config, security_server, facets=None):
+            barrier.wait(timeout=5)  # Both configurations created before either is used
+            authorizations[security_server['name']] = api_config.api_key['Authorization']
+            return StatusTestData.server_status_essentials_complete
+
+        with XRDSSTTest() as app:
+            app.OP_DEPENDENCY_LIST = []
+            auto_controller = AutoController()
+            auto_controller.app = app
+            auto_controller.get_server_status = server_status
+            auto_controller._auto(TestAuto.ss_config)
+
+        assert authorizations == {
+            'ssX': BaseController.authorization_header(os.environ['TOOLKIT_SS1_API_KEY']),
+            'ssY': BaseController.authorization_header(os.environ['TOOLKIT_SS2_API_KEY'])
+        }
+        self.capsys.readouterr()
+
+    @mock.patch.object(XRDSSTTest, 'pargs', ObjectStruct(configfile=BaseController.config_file))
+    @mock.patch.object(BaseController, 'load_config', (lambda x, y=None: TestAuto.ss_config))
+    @mock.patch.object(StatusController, '_default', (lambda x: StatusTestData.server_status_essentials_complete))  # Double mock!
+    @mock.patch.object(ServiceController, 'enable_description')
+    @mock.patch.object(ServiceController, 'add_description')
+    @mock.patch.object(ClientController, 'register')
+    @mock.patch.object(ClientController, 'add')
+    @mock.patch.object(CertController, 'activate')
+    @mock.patch.object(CertController, 'register')
+    @mock.patch.object(CertController, 'import_')
+    @mock.patch.object(TokenController, 'init_keys')
+    @mock.patch.object(TokenController, 'login')
+    @mock.patch.object(TimestampController, 'init')
+    @mock.patch.object(InitServerController, '_default')
+    def test_autoconfig_refreshes_op_status_facets_only(self, *op_mocks):
+        full_status_calls = []
+        refreshed_facets = []
+
+        def refresh(api_config, security_server, server_status, facets):
+            refreshed_facets.append((security_server['name'], facets))
+            return StatusTestData.server_status_essentials_complete
+
+        with XRDSSTTest() as app:
+            auto_controller = AutoController()
+            auto_controller.app = app
+            auto_controller.get_server_status = (lambda x, y, facets=None: full_status_calls.append(y['name']) or StatusTestData.server_status_essentials_complete)
+            auto_controller.refresh_server_status = refresh
+            auto_controller._default()
+
+        assert full_status_calls == ['ssX', 'ssY']
+        # Operations without completion criteria refresh nothing, the rest only the status they depend on
+        assert sorted(facets for ssn, facets in refreshed_facets if ssn == 'ssX') == sorted([
+            (StatusFacet.INIT,), (StatusFacet.TOKEN,), (StatusFacet.TIMESTAMPING,),
+            (StatusFacet.KEYS_AND_CERTS,), (StatusFacet.KEYS_AND_CERTS,), (StatusFacet.KEYS_AND_CERTS,), (StatusFacet.KEYS_AND_CERTS,)
+        ])
+        assert len(refreshed_facets) == 14
+
+    @mock.patch.object(XRDSSTTest, 'pargs', ObjectStruct(wait=600.0))
+    @mock.patch.object(CertController, 'activate')
+    @mock.patch.object(CertController, 'register')
+    def test_autoconfig_waits_for_global_conf_renewal(self, cert_register_mock, cert_activate_mock):
+        registration_pending = copy.copy(StatusTestData.server_status_essentials_complete)
+        registration_pending.status_certs = copy.copy(registration_pending.status_certs)
+        registration_pending.status_certs.auth_cert_actions = []
+        registration_pending.global_status = copy.copy(registration_pending.global_status)
+        registration_pending.global_status.refresh = datetime.now() + timedelta(seconds=30)
+        refreshes = []
+
+        def refresh(api_config, security_server, server_status, facets):
+            refreshes.append(facets)
+            if len(refreshes) == 1:  # After registration, pending until global configuration refresh
+                return registration_pending
+            if len(refreshes) == 2:  # Still pending after refresh, no upcoming refresh reported
+                pending = copy.copy(registration_pending)
+                pending.global_status = copy.copy(pending.global_status)
+                pending.global_status.refresh = None
+                return pending
+            return StatusTestData.server_status_essentials_complete
+
+        with XRDSSTTest() as app, mock.patch('xrdsst.controllers.auto.time.sleep') as sleep_mock, \
+                mock.patch('xrdsst.controllers.auto.reset_connectivity') as reset_connectivity_mock, \
+                mock.patch('xrdsst.controllers.auto.is_ss_connectable', return_value=(True, '')):
+            app.OP_DEPENDENCY_LIST = [OPS.REGISTER_AUTH_CERT, OPS.ACTIVATE_AUTH_CERT]
+            app.OP_SERVER_STATUSES['ssX'] = {'api_config': Configuration(), 'status': registration_pending}
+            auto_controller = AutoController()
+            auto_controller.app = app
+            auto_controller.refresh_server_status = refresh
+            auto_controller._iterate_dependency_nodes('ssX', single_server_config(self.ss_config, 0))
+
+            cert_register_mock.assert_called_once()
+            cert_activate_mock.assert_called_once()
+            # Until reported global configuration refresh, then polling with the shortest delay
+            delays = [call[0][0] for call in sleep_mock.call_args_list]
+            assert len(delays) == 2
+            assert 30 < delays[0] <= 30 + AutoController.WAIT_REFRESH_MARGIN
+            assert delays[1] == AutoController.WAIT_POLL_MIN
+            assert refreshes[1:3] == [(StatusFacet.KEYS_AND_CERTS, StatusFacet.GLOBAL)] * 2
+            assert reset_connectivity_mock.call_args_list == [mock.call([self.ss_config['security_server'][0]['url']])] * 2
+
+            out, err = self.capsys.readouterr()
+            assert out.count("AUTO ['cert register']->'ssX' waiting") == 2
+            assert out.count("AUTO ['cert register']->'ssX' completion detected, resuming.") == 1
+            assert out.count("completion was NOT detected") == 0
+
+            with self.capsys.disabled():
+                sys.stdout.write(out)
+                sys.stderr.write(err)
+
+    @mock.patch.object(XRDSSTTest, 'pargs', ObjectStruct(wait=600.0))
+    @mock.patch.object(TokenController, 'login')
+    def test_autoconfig_failed_token_login_not_waited_for(self, token_login_mock):
+        logged_out = copy.copy(StatusTestData.server_status_essentials_complete)
+        logged_out.token_status = copy.copy(logged_out.token_status)
+        logged_out.token_status.logged_in = False
+
+        with XRDSSTTest() as app, mock.patch('xrdsst.controllers.auto.time.sleep') as sleep_mock:
+            app.OP_DEPENDENCY_LIST = [OPS.TOKEN_LOGIN, OPS.TIMESTAMP_ENABLE]
+            app.OP_SERVER_STATUSES['ssX'] = {'api_config': Configuration(), 'status': logged_out}
+            auto_controller = AutoController()
+            auto_controller.app = app
+            auto_controller.refresh_server_status = (lambda api_config, security_server, server_status, facets: logged_out)
+            auto_controller._iterate_dependency_nodes('ssX', single_server_config(self.ss_config, 0))
+
+            token_login_mock.assert_called_once()
+            sleep_mock.assert_not_called()
+            out, err = self.capsys.readouterr()
+            assert out.count("->'ssX' waiting") == 0
+            assert out.count("AUTO ['token login'] completion was NOT detected.") == 1
+
+    @mock.patch.object(XRDSSTTest, 'pargs', ObjectStruct(wait=600.0, parallel=1))
+    def test_autoconfig_wait_respects_explicit_parallelism(self):
+        with XRDSSTTest() as app, \
+                mock.patch.object(AutoController, 'run_concurrently') as run_concurrently_mock, \
+                mock.patch.object(AutoController, '_single_server_auto') as single_server_auto_mock, \
+                mock.patch.object(StatusController, '_default'):
+            auto_controller = AutoController()
+            auto_controller.app = app
+            auto_controller._auto(self.ss_config)
+
+            run_concurrently_mock.assert_not_called()
+            assert single_server_auto_mock.call_count == 2
+
+        with mock.patch.object(XRDSSTTest, 'pargs', ObjectStruct(wait=600.0)), XRDSSTTest() as app, \
+                mock.patch.object(AutoController, 'run_concurrently') as run_concurrently_mock, \
+                mock.patch.object(StatusController, '_default'):
+            auto_controller = AutoController()
+            auto_controller.app = app
+            auto_controller._auto(self.ss_config)
+
+            assert run_concurrently_mock.call_args[0][2] == 2
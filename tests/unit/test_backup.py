@@ -1,13 +1,18 @@
+import hashlib
+import os
 import sys
+import tempfile
 import unittest
 from argparse import Namespace
 from datetime import datetime
 from unittest import mock
 import pytest
 
+from xrdsst.api import BackupsApi
 from xrdsst.controllers.backup import BackupController
 from xrdsst.main import XRDSSTTest
 from xrdsst.models import Backup, TokensLoggedOut
+from xrdsst.rest.rest import ApiException
 
 
 class TestBackup(unittest.TestCase):
@@ -157,6 +162,12 @@ class TestBackup(unittest.TestCase):
                 self.status = status
                 self.data = data
 
+            def stream(self, amt):
+                return (self.data[i:i + amt] for i in range(0, len(self.data), amt))
+
+            def release_conn(self):
+                pass
+
         def mocked_download_backup():
             return MockBackup(
                 200,
@@ -183,6 +194,12 @@ class TestBackup(unittest.TestCase):
                 self.status = status
                 self.data = data
 
+            def stream(self, amt):
+                return (self.data[i:i + amt] for i in range(0, len(self.data), amt))
+
+            def release_conn(self):
+                pass
+
         def mocked_download_backup():
             return MockBackup(
                 200,
@@ -209,6 +226,12 @@ class TestBackup(unittest.TestCase):
                 self.status = status
                 self.data = data
 
+            def stream(self, amt):
+                return (self.data[i:i + amt] for i in range(0, len(self.data), amt))
+
+            def release_conn(self):
+                pass
+
         def mocked_download_backup():
             return MockBackup(
                 200,
@@ -324,3 +347,146 @@ class TestBackup(unittest.TestCase):
                 with self.capsys.disabled():
                     sys.stdout.write(out)
                     sys.stderr.write(err)
+
+    class MockStreamedBackup:
+        def __init__(self, status, data, content_range=None):
+            self.status = status
+            self.data = data
+            self.content_range = content_range
+            self.released = False
+
+        def stream(self, amt):
+            return (self.data[i:i + amt] for i in range(0, len(self.data), amt))
+
+        def getheader(self, name):
+            return self.content_range if name == 'Content-Range' else None
+
+        def release_conn(self):
+            self.released = True
+
+    def download_with(self, output_dir, file_names, mocked_download_backup, download_parallelism=1):
+        with XRDSSTTest() as app:
+            app._parsed_args = Namespace(ss='ssX', file=file_names, output=output_dir)
+            with mock.patch.object(BackupsApi, 'download_backup', autospec=True, side_effect=mocked_download_backup), \
+                    mock.patch.object(BackupController, 'DOWNLOAD_CHUNK_SIZE', 1024):
+                backup_controller = BackupController()
+                backup_controller.app = app
+                backup_controller.load_config = (lambda: dict(self.ss_config, download_parallelism=download_parallelism))
+                backup_controller.download()
+
+    def test_backup_download_streamed_resumed_concurrently(self):
+        MockBackup = TestBackup.MockStreamedBackup
+
+        contents = {'b1.tar': b'0123456789' * 1000, 'b2.tar': b'abcdefghij' * 500}
+        ranges = {}
+
+        def mocked_download_backup(backups_api, filename, _preload_content):
+            ranges[filename] = backups_api.api_client.default_headers.get('Range')
+            if ranges[filename]:
+                offset = int(ranges[filename][len('bytes='):-1])
+                return MockBackup(206, contents[filename][offset:],
+                                  'bytes ' + str(offset) + '-' + str(len(contents[filename]) - 1) + '/' + str(len(contents[filename])))
+            return MockBackup(200, contents[filename])
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with open(os.path.join(output_dir, 'b1.tar.part'), 'wb') as partial_file:
+                partial_file.write(contents['b1.tar'][:4000])
+
+            self.download_with(output_dir, 'b1.tar,b2.tar', mocked_download_backup, download_parallelism=2)
+
+            assert ranges == {'b1.tar': 'bytes=4000-', 'b2.tar': None}
+            for file_name, content in contents.items():
+                with open(os.path.join(output_dir, file_name), 'rb') as downloaded:
+                    assert downloaded.read() == content
+            assert sorted(os.listdir(output_dir)) == ['b1.tar', 'b2.tar']
+
+            out, err = self.capsys.readouterr()
+            assert out.count("(10000 bytes, resumed from 4000, ") == 1
+            assert out.count("SHA-256 " + hashlib.sha256(contents['b1.tar']).hexdigest()) == 1
+            assert out.count("SHA-256 " + hashlib.sha256(contents['b2.tar']).hexdigest()) == 1
+            assert out.index("'b1.tar'") < out.index("'b2.tar'")
+            assert out.count("Downloaded 2 of 2 backups, 11000 bytes") == 1
+
+            with self.capsys.disabled():
+                sys.stdout.write(out)
+                sys.stderr.write(err)
+
+    def test_backup_download_restarted_when_not_resumable(self):
+        class RangeNotSatisfiableResponse:
+            status = 416
+            data = None
+            reason = 'Range Not Satisfiable'
+
+            def getheaders(self): return None
+
+        contents = {'b1.tar': b'0123456789' * 1000, 'b2.tar': b'abcdefghij' * 500}
+        ranges = []
+
+        def mocked_download_backup(backups_api, filename, _preload_content):
+            requested = backups_api.api_client.default_headers.get('Range')
+            ranges.append((filename, requested))
+            if requested and filename == 'b1.tar':
+                raise ApiException(http_resp=RangeNotSatisfiableResponse())
+            if requested:
+                return TestBackup.MockStreamedBackup(206, contents[filename][1000:], 'bytes 1000-4999/5000')
+            return TestBackup.MockStreamedBackup(200, contents[filename])
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            for file_name in contents:
+                with open(os.path.join(output_dir, file_name + '.part'), 'wb') as partial_file:
+                    partial_file.write(b'x' * 2000)
+
+            self.download_with(output_dir, 'b1.tar,b2.tar', mocked_download_backup)
+
+            assert ranges == [('b1.tar', 'bytes=2000-'), ('b1.tar', None), ('b2.tar', 'bytes=2000-'), ('b2.tar', None)]
+            for file_name, content in contents.items():
+                with open(os.path.join(output_dir, file_name), 'rb') as downloaded:
+                    assert downloaded.read() == content
+            assert sorted(os.listdir(output_dir)) == ['b1.tar', 'b2.tar']
+
+            out, err = self.capsys.readouterr()
+            assert out.count("resumed from") == 0
+            assert out.count("Downloaded 2 of 2 backups") == 1
+
+    def test_backup_download_not_restarted_on_other_errors(self):
+        class ServiceUnavailableResponse:
+            status = 503
+            data = None
+            reason = 'Service Unavailable'
+
+            def getheaders(self): return None
+
+        ranges = []
+
+        def mocked_download_backup(backups_api, filename, _preload_content):
+            ranges.append(backups_api.api_client.default_headers.get('Range'))
+            raise ApiException(http_resp=ServiceUnavailableResponse())
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with open(os.path.join(output_dir, 'b1.tar.part'), 'wb') as partial_file:
+                partial_file.write(b'x' * 2000)
+
+            self.download_with(output_dir, 'b1.tar', mocked_download_backup)
+
+            assert ranges == ['bytes=2000-']
+            assert os.path.getsize(os.path.join(output_dir, 'b1.tar.part')) == 2000
+
+    def test_backup_download_parallelism(self):
+        backup_controller = BackupController()
+        assert backup_controller.download_parallelism(self.ss_config) == BackupController.DEFAULT_DOWNLOAD_PARALLELISM
+        assert backup_controller.download_parallelism(dict(self.ss_config, parallelism=1, download_parallelism=8)) == 8
+        assert backup_controller.download_parallelism(dict(self.ss_config, download_parallelism=0)) == 1
+
+    def test_backup_download_failure_keeps_other_downloads(self):
+        def mocked_download_backup(backups_api, filename, _preload_content):
+            if filename == 'b1.tar':
+                raise ValueError('b1.tar mangled')
+            return TestBackup.MockStreamedBackup(200, b'abcdefghij' * 500)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            self.download_with(output_dir, 'b1.tar,b2.tar', mocked_download_backup, download_parallelism=2)
+
+            assert os.listdir(output_dir) == ['b2.tar']
+            out, err = self.capsys.readouterr()
+            assert out.count("Failed to download backup 'b1.tar': b1.tar mangled") == 1
+            assert out.count("Downloaded 1 of 2 backups, 5000 bytes") == 1
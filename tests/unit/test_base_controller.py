@@ -1,6 +1,8 @@
 import os
 import sys
 import tempfile
+import threading
+import time
 import unittest
 
 import pytest
@@ -10,7 +12,9 @@ from pathlib import Path
 from unittest.mock import Mock
 from unittest.mock import patch
 
+from xrdsst.api_client.extensions import reset_rate_limits, _rate_limiter
 from xrdsst.core.definitions import ROOT_DIR
+from xrdsst.core.parallel import write_unbuffered
 from xrdsst.configuration.configuration import Configuration
 from xrdsst.controllers.base import BaseController
 from xrdsst.core.util import convert_swagger_enum
@@ -418,7 +422,7 @@ class TestBaseController(unittest.TestCase):
             os.environ["TOOLKIT_SS2_API_KEY"] = "a13d5108-7799-426d-a024-1300f52f4a51"
             for security_server in config["security_server"]:
                 configuration = Configuration()
-                configuration.api_key['Authorization'] = os.getenv(security_server["api_key"], "")
+                configuration.api_key = {'Authorization': BaseController.authorization_header(os.getenv(security_server["api_key"], ""))}
                 configuration.host = security_server["url"]
                 configuration.verify_ssl = False
                 response = base_controller.create_api_config(security_server)
@@ -455,3 +459,159 @@ class TestBaseController(unittest.TestCase):
             raise AssertionError("Conversion of 'HTTPX' to ConnectionType should have failed.")
         except SyntaxWarning:
             pass
+
+    def test_run_per_server_sequential_by_default(self):
+        with XRDSSTTest() as app:
+            base_controller = BaseController()
+            base_controller.app = app
+            operation = Mock(return_value='done')
+            with patch.object(XRDSSTTest, 'pargs', None):
+                result = base_controller.run_per_server(self._ss_config, operation)
+
+            assert result == 'done'
+            operation.assert_called_once_with(self._ss_config)
+
+    def test_run_per_server_parallel_output_ordered(self):
+        def operation(config):
+            ssn = config['security_server'][0]['name']
+            if ssn == 'ss':
+                time.sleep(0.2)  # First server finishes last, output should still come first.
+            print('configuring ' + ssn)
+            print('problem with ' + ssn, file=sys.stderr)
+            return ssn
+
+        with XRDSSTTest() as app:
+            base_controller = BaseController()
+            base_controller.app = app
+            config = dict(self._ss_config, parallelism=2)
+            with patch.object(XRDSSTTest, 'pargs', None):
+                result = base_controller.run_per_server(config, operation)
+
+            assert result == ['ss', 'ss2']
+            out, err = self.capsys.readouterr()
+            assert out.index('configuring ss\n') < out.index('configuring ss2\n')
+            assert err.index('problem with ss\n') < err.index('problem with ss2\n')
+            assert out.count('Configured 2 security servers with 2 workers') == 1
+
+    def test_run_per_server_parallel_unbuffered_progress(self):
+        progressed = threading.Event()
+
+        def operation(config):
+            ssn = config['security_server'][0]['name']
+            print('configuring ' + ssn)
+            if ssn == 'ss':
+                progressed.wait(timeout=5)
+            else:
+                write_unbuffered('progress of ' + ssn + '\n')
+                progressed.set()
+
+        with XRDSSTTest() as app:
+            base_controller = BaseController()
+            base_controller.app = app
+            with patch.object(XRDSSTTest, 'pargs', Mock(parallel=2)):
+                base_controller.run_per_server(self._ss_config, operation)
+
+            out, err = self.capsys.readouterr()
+            assert out.index('progress of ss2\n') < out.index('configuring ss\n') < out.index('configuring ss2\n')
+
+    def test_run_per_server_parallel_command_line_overrides_config(self):
+        with XRDSSTTest() as app:
+            base_controller = BaseController()
+            base_controller.app = app
+            with patch.object(XRDSSTTest, 'pargs', Mock(parallel=3)):
+                assert base_controller.parallelism(dict(self._ss_config, parallelism=1)) == 3
+            with patch.object(XRDSSTTest, 'pargs', Mock(parallel=None)):
+                assert base_controller.parallelism(dict(self._ss_config, parallelism=4)) == 4
+                assert base_controller.parallelism(dict(self._ss_config, parallelism='many')) == 1
+
+    def test_run_per_server_parallel_failure_reraised(self):
+        def operation(config):
+            if config['security_server'][0]['name'] == 'ss':
+                raise RuntimeError('ss failed')
+            print('configured ' + config['security_server'][0]['name'])
+
+        with XRDSSTTest() as app:
+            base_controller = BaseController()
+            base_controller.app = app
+            with patch.object(XRDSSTTest, 'pargs', Mock(parallel=2)):
+                with pytest.raises(RuntimeError):
+                    base_controller.run_per_server(self._ss_config, operation)
+
+            out, err = self.capsys.readouterr()
+            assert out.count('configured ss2') == 1
+            assert out.count('FAILED (ss failed)') == 1
+
+    def test_api_call_stats_logged_at_close(self):
+        with patch('xrdsst.controllers.base.retry_stats', side_effect=[{'retries': 1, 'recovered': 1, 'exhausted': 0},
+                                                                       {'retries': 3, 'recovered': 2, 'exhausted': 0}]):
+            with XRDSSTTest():
+                pass
+
+        out, err = self.capsys.readouterr()
+        assert out.count('Retried failed API calls 2 times, 1 calls succeeded on retry, 0 failed after all retries.') == 1
+
+    def test_run_per_server_parallel_api_keys_not_mixed(self):
+        barrier = threading.Barrier(2)
+
+        def operation(config):
+            security_server = config['security_server'][0]
+            api_config = base_controller.create_api_config(security_server, config)
+            barrier.wait(timeout=5)  # Both configurations created before either is read
+            return api_config.api_key['Authorization']
+
+        api_keys = {'TOOLKIT_SS1_API_KEY': '11111111-8000-4000-a000-727272727272', 'TOOLKIT_SS2_API_KEY': '22222222-8000-4000-a000-727272727272'}
+        with XRDSSTTest() as app, patch.dict(os.environ, api_keys):
+            base_controller = BaseController()
+            base_controller.app = app
+            with patch.object(XRDSSTTest, 'pargs', Mock(parallel=2)):
+                authorizations = base_controller.run_per_server(self._ss_config, operation)
+
+        assert authorizations == [BaseController.authorization_header(api_keys['TOOLKIT_SS1_API_KEY']),
+                                  BaseController.authorization_header(api_keys['TOOLKIT_SS2_API_KEY'])]
+        self.capsys.readouterr()
+
+    def test_create_api_config_memoized(self):
+        with XRDSSTTest() as app:
+            base_controller = BaseController()
+            base_controller.app = app
+            with patch.object(BaseController, 'get_api_key', side_effect=['88888888-8000-4000-a000-727272727272', None,
+                                                                          '99999999-8000-4000-a000-727272727272']) as get_api_key:
+                ss, ss2 = self._ss_config['security_server']
+                ss_api_config = base_controller.create_api_config(ss, self._ss_config)
+                assert base_controller.create_api_config(ss, self._ss_config) is ss_api_config
+                assert base_controller.create_api_config(ss2, self._ss_config) is None
+                assert base_controller.create_api_config(ss2, self._ss_config) is None
+                assert get_api_key.call_count == 2
+
+                BaseController.invalidate_api_config(app, 'ss')
+                renewed_api_config = base_controller.create_api_config(ss, self._ss_config)
+                assert renewed_api_config is not ss_api_config
+                assert renewed_api_config.api_key['Authorization'].endswith('99999999-8000-4000-a000-727272727272')
+                assert base_controller.create_api_config(ss2, self._ss_config) is None
+                assert get_api_key.call_count == 3
+
+    def test_create_api_config_keys_not_shared(self):
+        with XRDSSTTest() as app:
+            base_controller = BaseController()
+            base_controller.app = app
+            with patch.object(BaseController, 'get_api_key', side_effect=lambda conf, ss: 'KEY-' + ss['name']):
+                ss, ss2 = self._ss_config['security_server']
+                ss_api_config = base_controller.create_api_config(ss, self._ss_config)
+                ss2_api_config = base_controller.create_api_config(ss2, self._ss_config)
+
+            assert ss_api_config.api_key['Authorization'].endswith('KEY-ss')
+            assert ss2_api_config.api_key['Authorization'].endswith('KEY-ss2')
+
+    def test_configure_rate_limits(self):
+        config = dict(self._ss_config, rate_limit={'per_second': 5})
+        config['security_server'] = [
+            self._ss_config['security_server'][0],
+            dict(self._ss_config['security_server'][1], rate_limit={'per_minute': 100})
+        ]
+        reset_rate_limits()
+        try:
+            BaseController.configure_rate_limits(config)
+            assert (_rate_limiter('https://ss:4000').per_second, _rate_limiter('https://ss:4000').per_minute) == (5, 600)
+            assert (_rate_limiter('https://ss2:4000').per_second, _rate_limiter('https://ss2:4000').per_minute) == (5, 100)
+        finally:
+            reset_rate_limits()
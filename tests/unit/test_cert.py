@@ -322,7 +322,7 @@ class TestCert(unittest.TestCase):
                     cert_controller = CertController()
                     cert_controller.app = app
                     cert_controller.load_config = (lambda: single_server_config)
-                    cert_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    cert_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     reported_downloads = cert_controller.download_csrs()
 
                     assert len(reported_downloads) == 2
@@ -345,7 +345,7 @@ class TestCert(unittest.TestCase):
             cert_controller = CertController()
             cert_controller.app = app
             cert_controller.load_config = (lambda: self.ss_config)
-            cert_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+            cert_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
             cert_controller.import_()
 
             out, err = self.capsys.readouterr()
@@ -382,7 +382,7 @@ class TestCert(unittest.TestCase):
                     cert_controller = CertController()
                     cert_controller.app = app
                     cert_controller.load_config = (lambda: self.ss_config_with_authcert())
-                    cert_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    cert_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     cert_controller.import_()
 
                     out, err = self.capsys.readouterr()
@@ -408,7 +408,7 @@ class TestCert(unittest.TestCase):
                     cert_controller = CertController()
                     cert_controller.app = app
                     cert_controller.load_config = (lambda: self.ss_config_with_authcert())
-                    cert_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    cert_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     cert_controller.import_()
 
                     out, err = self.capsys.readouterr()
@@ -436,7 +436,7 @@ class TestCert(unittest.TestCase):
                 cert_controller = CertController()
                 cert_controller.app = app
                 cert_controller.load_config = (lambda: self.ss_config_with_authcert())
-                cert_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                cert_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                 cert_controller.register()
 
                 out, err = self.capsys.readouterr()
@@ -453,7 +453,7 @@ class TestCert(unittest.TestCase):
                 cert_controller = CertController()
                 cert_controller.app = app
                 cert_controller.load_config = (lambda: self.ss_config_with_authcert())
-                cert_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                cert_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                 cert_controller.register()
 
                 out, err = self.capsys.readouterr()
@@ -472,7 +472,7 @@ class TestCert(unittest.TestCase):
                     cert_controller = CertController()
                     cert_controller.app = app
                     cert_controller.load_config = (lambda: self.ss_config_with_authcert())
-                    cert_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    cert_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     cert_controller.register()
 
                     out, err = self.capsys.readouterr()
@@ -493,7 +493,7 @@ class TestCert(unittest.TestCase):
                         cert_controller = CertController()
                         cert_controller.app = app
                         cert_controller.load_config = (lambda: self.ss_config_with_authcert())
-                        cert_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                        cert_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                         cert_controller.activate()
 
                         out, err = self.capsys.readouterr()
@@ -531,7 +531,7 @@ class TestCert(unittest.TestCase):
                 cert_controller = CertController()
                 cert_controller.app = app
                 cert_controller.load_config = (lambda: self.ss_config)
-                cert_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                cert_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                 list = cert_controller.list()
 
                 rendered = cert_controller.app._last_rendered
@@ -557,7 +557,7 @@ class TestCert(unittest.TestCase):
                     cert_controller = CertController()
                     cert_controller.app = app
                     cert_controller.load_config = (lambda: self.ss_config)
-                    cert_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    cert_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     cert_controller.disable()
 
                     out, err = self.capsys.readouterr()
@@ -587,7 +587,7 @@ class TestCert(unittest.TestCase):
                     cert_controller = CertController()
                     cert_controller.app = app
                     cert_controller.load_config = (lambda: self.ss_config)
-                    cert_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    cert_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     cert_controller.disable()
 
                     out, err = self.capsys.readouterr()
@@ -610,7 +610,7 @@ class TestCert(unittest.TestCase):
                     cert_controller = CertController()
                     cert_controller.app = app
                     cert_controller.load_config = (lambda: self.ss_config)
-                    cert_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    cert_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     cert_controller.unregister()
 
                     out, err = self.capsys.readouterr()
@@ -632,7 +632,7 @@ class TestCert(unittest.TestCase):
                     cert_controller = CertController()
                     cert_controller.app = app
                     cert_controller.load_config = (lambda: self.ss_config)
-                    cert_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    cert_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     cert_controller.delete()
 
                     out, err = self.capsys.readouterr()
@@ -8,6 +8,9 @@ import pytest
 from urllib3._collections import HTTPHeaderDict
 
 from tests.util.test_util import StatusTestData
+from xrdsst.api import ClientsApi
+from xrdsst.api_client.api_client import ApiClient
+from xrdsst.configuration.configuration import Configuration
 from xrdsst.controllers.client import ClientController, ClientsListMapper
 from xrdsst.models import Client, ConnectionType, ClientStatus
 from xrdsst.main import XRDSSTTest
@@ -128,7 +131,7 @@ class TestClient(unittest.TestCase):
                 client_controller = ClientController()
                 client_controller.app = app
                 client_controller.load_config = (lambda: self.ss_config)
-                client_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                client_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                 client_controller.add()
 
                 out, err = self.capsys.readouterr()
@@ -152,7 +155,7 @@ class TestClient(unittest.TestCase):
                 client_controller = ClientController()
                 client_controller.app = app
                 client_controller.load_config = (lambda: self.ss_config)
-                client_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                client_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                 client_controller.add()
 
                 out, err = self.capsys.readouterr()
@@ -168,7 +171,7 @@ class TestClient(unittest.TestCase):
                 client_controller = ClientController()
                 client_controller.app = app
                 client_controller.load_config = (lambda: self.ss_config)
-                client_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                client_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                 client_controller.register()
 
                 out, err = self.capsys.readouterr()
@@ -196,7 +199,7 @@ class TestClient(unittest.TestCase):
                     client_controller = ClientController()
                     client_controller.app = app
                     client_controller.load_config = (lambda: self.ss_config)
-                    client_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    client_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     client_controller.register()
 
                     out, err = self.capsys.readouterr()
@@ -224,7 +227,7 @@ class TestClient(unittest.TestCase):
                     client_controller = ClientController()
                     client_controller.app = app
                     client_controller.load_config = (lambda: self.ss_config)
-                    client_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    client_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     client_controller.register()
 
                     out, err = self.capsys.readouterr()
@@ -269,7 +272,7 @@ class TestClient(unittest.TestCase):
                 client_controller = ClientController()
                 client_controller.app = app
                 client_controller.load_config = (lambda: self.ss_config)
-                client_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                client_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                 client_controller.register()
 
                 out, err = self.capsys.readouterr()
@@ -300,7 +303,7 @@ class TestClient(unittest.TestCase):
                 client_controller = ClientController()
                 client_controller.app = app
                 client_controller.load_config = (lambda: new_config)
-                client_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                client_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                 client_controller.add()
 
                 out, err = self.capsys.readouterr()
@@ -336,7 +339,7 @@ class TestClient(unittest.TestCase):
                     client_controller = ClientController()
                     client_controller.app = app
                     client_controller.load_config = (lambda: self.ss_config)
-                    client_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    client_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     client_controller.update()
 
                     out, err = self.capsys.readouterr()
@@ -354,7 +357,7 @@ class TestClient(unittest.TestCase):
                     instance_id='DEV',
                     member_class='GOV',
                     member_code='9876',
-                    member_name='TEST',
+                    member_name='NIIS',
                     subsystem_code=None,
                     connection_type=ConnectionType.HTTP,
                     status=ClientStatus.REGISTERED,
@@ -365,7 +368,7 @@ class TestClient(unittest.TestCase):
                     client_controller = ClientController()
                     client_controller.app = app
                     client_controller.load_config = (lambda: self.ss_config_with_tls_cert())
-                    client_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    client_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     client_controller.import_tls_certs()
 
                     out, err = self.capsys.readouterr()
@@ -382,7 +385,7 @@ class TestClient(unittest.TestCase):
                     instance_id='DEV',
                     member_class='GOV',
                     member_code='9876',
-                    member_name='TEST',
+                    member_name='NIIS',
                     subsystem_code=None,
                     connection_type=ConnectionType.HTTP,
                     status=ClientStatus.REGISTERED,
@@ -393,7 +396,7 @@ class TestClient(unittest.TestCase):
                     client_controller = ClientController()
                     client_controller.app = app
                     client_controller.load_config = (lambda: self.ss_config_with_tls_cert_non_existing())
-                    client_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    client_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     client_controller.import_tls_certs()
 
                     out, err = self.capsys.readouterr()
@@ -417,7 +420,7 @@ class TestClient(unittest.TestCase):
                     instance_id='DEV',
                     member_class='GOV',
                     member_code='9876',
-                    member_name='TEST',
+                    member_name='NIIS',
                     subsystem_code=None,
                     connection_type=ConnectionType.HTTP,
                     status=ClientStatus.REGISTERED,
@@ -429,7 +432,7 @@ class TestClient(unittest.TestCase):
                     client_controller = ClientController()
                     client_controller.app = app
                     client_controller.load_config = (lambda: self.ss_config_with_tls_cert())
-                    client_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    client_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     client_controller.import_tls_certs()
 
                     out, err = self.capsys.readouterr()
@@ -608,7 +611,7 @@ class TestClient(unittest.TestCase):
                         client_controller = ClientController()
                         client_controller.app = app
                         client_controller.load_config = (lambda: self.ss_config_with_tls_cert_non_existing())
-                        client_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                        client_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                         client_controller.make_owner()
 
                         out, err = self.capsys.readouterr()
@@ -630,7 +633,7 @@ class TestClient(unittest.TestCase):
                         client_controller = ClientController()
                         client_controller.app = app
                         client_controller.load_config = (lambda: self.ss_config_with_tls_cert_non_existing())
-                        client_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                        client_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                         client_controller.make_owner()
 
                         out, err = self.capsys.readouterr()
@@ -659,7 +662,7 @@ class TestClient(unittest.TestCase):
                     client_controller = ClientController()
                     client_controller.app = app
                     client_controller.load_config = (lambda: self.ss_config_with_tls_cert_non_existing())
-                    client_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    client_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     client_controller.make_owner()
 
                     out, err = self.capsys.readouterr()
@@ -704,3 +707,30 @@ class TestClient(unittest.TestCase):
                     sys.stderr.write(err)
 
                 assert client_controller.app._last_rendered is None
+
+    def test_client_index_reused_until_clients_changed(self):
+        ss_api_config = Configuration()
+        ss_api_config.host = 'https://ssX:4000/api/v1'
+        clients_api = ClientsApi(ApiClient(ss_api_config))
+        member = copy.deepcopy(ClientTestData.make_owner_response)
+        member.id, member.subsystem_code = 'DEV:GOV:9876', None
+        subsystem_conf = {'member_class': 'GOV', 'member_code': 9876, 'subsystem_code': 'SUB1', 'member_name': 'TEST', 'connection_type': 'HTTP'}
+        member_conf = {'member_class': 'GOV', 'member_code': '9876', 'member_name': 'TEST'}
+
+        client_controller = ClientController()
+        with mock.patch('xrdsst.api.clients_api.ClientsApi.find_clients', return_value=[member, ClientTestData.add_response]) as find_clients:
+            assert client_controller.find_client(clients_api, subsystem_conf).id == 'DEV:GOV:9876:SUB1'
+            assert client_controller.find_client(clients_api, member_conf).id == 'DEV:GOV:9876'
+            assert client_controller.find_client(clients_api, dict(member_conf, member_name='OTHER')) is None
+            assert client_controller.find_client(clients_api, dict(subsystem_conf, subsystem_code='SUB2')) is None
+            assert client_controller.client_index(clients_api).get('DEV:GOV:9876:SUB1') is ClientTestData.add_response
+            find_clients.assert_called_once_with(show_members=True, internal_search=True)
+
+            with mock.patch('xrdsst.api.clients_api.ClientsApi.add_client', return_value=ClientTestData.add_response):
+                client_controller.remote_add_client(ss_api_config, subsystem_conf)
+            client_controller.find_client(clients_api, subsystem_conf)
+            assert find_clients.call_count == 2
+
+            # Other security server has index of its own
+            client_controller.find_client(ClientsApi(ApiClient(Configuration())), subsystem_conf)
+            assert find_clients.call_count == 3
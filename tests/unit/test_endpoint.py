@@ -108,15 +108,17 @@ class TestEndpoint(unittest.TestCase):
                     owner=True,
                     has_valid_local_sign_cert=True
             )]):
+                service_description = copy.deepcopy(EndpointTestData.add_description_response)
+                service_description.services[0].endpoints = []
                 with mock.patch('xrdsst.api.clients_api.ClientsApi.get_client_service_descriptions',
-                                return_value=[EndpointTestData.add_description_response]):
+                                return_value=[service_description]):
                     with mock.patch(
                             'xrdsst.api.services_api.ServicesApi.add_endpoint',
                             return_value=EndpointTestData.add_description_response):
                         endpoint_controller = EndpointController()
                         endpoint_controller.app = app
                         endpoint_controller.load_config = (lambda: self.ss_config)
-                        endpoint_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                        endpoint_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                         endpoint_controller.add()
 
                         out, err = self.capsys.readouterr()
@@ -158,7 +160,7 @@ class TestEndpoint(unittest.TestCase):
                         endpoint_controller = EndpointController()
                         endpoint_controller.app = app
                         endpoint_controller.load_config = (lambda: self.ss_config)
-                        endpoint_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                        endpoint_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                         endpoint_controller.add()
 
                         out, err = self.capsys.readouterr()
@@ -190,13 +192,13 @@ class TestEndpoint(unittest.TestCase):
                                         local_group_code=None,
                                         service_client_type=ServiceClientType.GLOBALGROUP,
                                         rights_given_at=datetime.now().isoformat())]):
-                        with mock.patch(
+                        with mock.patch('xrdsst.api.endpoints_api.EndpointsApi.get_endpoint_service_clients', return_value=[]), mock.patch(
                                 'xrdsst.api.endpoints_api.EndpointsApi.add_endpoint_service_clients',
                                 return_value=EndpointTestData.add_access_response):
                             endpoint_controller = EndpointController()
                             endpoint_controller.app = app
                             endpoint_controller.load_config = (lambda: self.ss_config)
-                            endpoint_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                            endpoint_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                             endpoint_controller.add_access()
 
                             out, err = self.capsys.readouterr()
@@ -223,13 +225,13 @@ class TestEndpoint(unittest.TestCase):
                                 return_value=[EndpointTestData.add_description_response]):
                     with mock.patch('xrdsst.api.clients_api.ClientsApi.find_service_client_candidates',
                                     return_value=[]):
-                        with mock.patch(
+                        with mock.patch('xrdsst.api.endpoints_api.EndpointsApi.get_endpoint_service_clients', return_value=[]), mock.patch(
                                 'xrdsst.api.endpoints_api.EndpointsApi.add_endpoint_service_clients',
                                 return_value=EndpointTestData.add_access_response):
                             endpoint_controller = EndpointController()
                             endpoint_controller.app = app
                             endpoint_controller.load_config = (lambda: self.ss_config)
-                            endpoint_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                            endpoint_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                             endpoint_controller.add_access()
 
                             out, err = self.capsys.readouterr()
@@ -263,13 +265,13 @@ class TestEndpoint(unittest.TestCase):
                                         local_group_code=None,
                                         service_client_type=ServiceClientType.GLOBALGROUP,
                                         rights_given_at=datetime.now().isoformat())]):
-                        with mock.patch(
+                        with mock.patch('xrdsst.api.endpoints_api.EndpointsApi.get_endpoint_service_clients', return_value=[]), mock.patch(
                                 'xrdsst.api.endpoints_api.EndpointsApi.add_endpoint_service_clients',
                                 return_value=EndpointTestData.add_access_response):
                             endpoint_controller = EndpointController()
                             endpoint_controller.app = app
                             endpoint_controller.load_config = (lambda: self.ss_config)
-                            endpoint_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                            endpoint_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                             endpoint_controller.add_access()
 
                             out, err = self.capsys.readouterr()
@@ -308,13 +310,13 @@ class TestEndpoint(unittest.TestCase):
                                         local_group_code=None,
                                         service_client_type=ServiceClientType.GLOBALGROUP,
                                         rights_given_at=datetime.now().isoformat())]):
-                        with mock.patch(
+                        with mock.patch('xrdsst.api.endpoints_api.EndpointsApi.get_endpoint_service_clients', return_value=[]), mock.patch(
                                 'xrdsst.api.endpoints_api.EndpointsApi.add_endpoint_service_clients',
                                 side_effect=ApiException(http_resp=AlreadyEnabledResponse())):
                             endpoint_controller = EndpointController()
                             endpoint_controller.app = app
                             endpoint_controller.load_config = (lambda: self.ss_config)
-                            endpoint_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                            endpoint_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                             endpoint_controller.add_access()
 
                             out, err = self.capsys.readouterr()
@@ -358,7 +360,7 @@ class TestEndpoint(unittest.TestCase):
                     endpoint_controller = EndpointController()
                     endpoint_controller.app = app
                     endpoint_controller.load_config = (lambda: self.ss_config)
-                    endpoint_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    endpoint_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     endpoint_controller.update()
 
                     out, err = self.capsys.readouterr()
@@ -388,7 +390,7 @@ class TestEndpoint(unittest.TestCase):
                     endpoint_controller = EndpointController()
                     endpoint_controller.app = app
                     endpoint_controller.load_config = (lambda: self.ss_config)
-                    endpoint_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    endpoint_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     endpoint_controller.update()
 
                     out, err = self.capsys.readouterr()
@@ -417,7 +419,7 @@ class TestEndpoint(unittest.TestCase):
                     endpoint_controller = EndpointController()
                     endpoint_controller.app = app
                     endpoint_controller.load_config = (lambda: self.ss_config)
-                    endpoint_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    endpoint_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     endpoint_controller.update()
 
                     out, err = self.capsys.readouterr()
@@ -438,7 +440,7 @@ class TestEndpoint(unittest.TestCase):
                     endpoint_controller = EndpointController()
                     endpoint_controller.app = app
                     endpoint_controller.load_config = (lambda: self.ss_config)
-                    endpoint_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    endpoint_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     endpoint_controller.delete()
 
                     out, err = self.capsys.readouterr()
@@ -466,7 +468,7 @@ class TestEndpoint(unittest.TestCase):
                     endpoint_controller = EndpointController()
                     endpoint_controller.app = app
                     endpoint_controller.load_config = (lambda: self.ss_config)
-                    endpoint_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    endpoint_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     endpoint_controller.delete()
 
                     out, err = self.capsys.readouterr()
@@ -514,3 +516,58 @@ class TestEndpoint(unittest.TestCase):
                         with self.capsys.disabled():
                             sys.stdout.write(out)
                             sys.stderr.write(err)
+
+    def test_endpoint_sync_only_missing(self):
+        def service_client(client_id):
+            return ServiceClient(id=client_id, name=client_id, local_group_code=None, service_client_type=ServiceClientType.SUBSYSTEM,
+                                 rights_given_at=datetime.now().isoformat())
+
+        ss_config = copy.deepcopy(self.ss_config)
+        ss_config['endpoint_parallelism'] = 4
+        ss_config['security_server'][0]['clients'][0]['service_descriptions'][0]['endpoints'] = [
+            {'method': 'POST', 'path': '/testPath', 'access': ['DEV:GOV:1234:SUB1', 'DEV:GOV:1234:SUB2']},
+            {'method': 'GET', 'path': '/testPath'},
+            {'method': 'PUT', 'path': '/testPath/{id}'}
+        ]
+        with XRDSSTTest() as app:
+            with mock.patch('xrdsst.api.clients_api.ClientsApi.find_clients', return_value=[Client(
+                    id='DEV:GOV:9876:SUB1',
+                    instance_id='DEV',
+                    member_class='GOV',
+                    member_code='9876',
+                    subsystem_code='SUB1',
+                    connection_type=ConnectionType.HTTP,
+                    status=ClientStatus.REGISTERED,
+                    owner=True,
+                    has_valid_local_sign_cert=True
+            )]), mock.patch('xrdsst.api.clients_api.ClientsApi.get_client_service_descriptions',
+                            return_value=[EndpointTestData.add_description_response]), \
+                    mock.patch('xrdsst.api.services_api.ServicesApi.add_endpoint',
+                               return_value=EndpointTestData.add_description_response) as add_endpoint, \
+                    mock.patch('xrdsst.api.clients_api.ClientsApi.find_service_client_candidates',
+                               return_value=[service_client('DEV:GOV:1234:SUB1'), service_client('DEV:GOV:1234:SUB2')]), \
+                    mock.patch('xrdsst.api.endpoints_api.EndpointsApi.get_endpoint_service_clients',
+                               return_value=[service_client('DEV:GOV:1234:SUB1')]), \
+                    mock.patch('xrdsst.api.endpoints_api.EndpointsApi.add_endpoint_service_clients',
+                               return_value=EndpointTestData.add_access_response) as add_endpoint_service_clients:
+                endpoint_controller = EndpointController()
+                endpoint_controller.app = app
+                endpoint_controller.load_config = (lambda: ss_config)
+                endpoint_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
+                endpoint_controller.add()
+                endpoint_controller.add_access()
+
+                assert sorted((call[1]['body'].method, call[1]['body'].path) for call in add_endpoint.call_args_list) == \
+                    [('GET', '/testPath'), ('PUT', '/testPath/{id}')]
+                add_endpoint_service_clients.assert_called_once()
+                assert add_endpoint_service_clients.call_args[0][0] == '1'
+                assert [sc.id for sc in add_endpoint_service_clients.call_args[1]['body'].items] == ['DEV:GOV:1234:SUB2']
+
+                out, err = self.capsys.readouterr()
+                assert out.count("Service endpoint 'POST /testPath'for service'DEV:GOV:9876:SUB1:Petstore' already added") == 1
+                assert out.index("Added service endpoint 'GET /testPath'") < out.index("Added service endpoint 'PUT /testPath/{id}'")
+                assert out.count("Client access rights: 'DEV:GOV:1234:SUB1' for endpoint 'POST' '/testPath'") == 1
+
+                with self.capsys.disabled():
+                    sys.stdout.write(out)
+                    sys.stderr.write(err)
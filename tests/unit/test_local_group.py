@@ -195,7 +195,7 @@ class TestService(unittest.TestCase):
                     local_group_controller = LocalGroupController()
                     local_group_controller.app = app
                     local_group_controller.load_config = (lambda: self.ss_config)
-                    local_group_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    local_group_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     local_group_controller.add()
 
                     out, err = self.capsys.readouterr()
@@ -221,7 +221,7 @@ class TestService(unittest.TestCase):
                     local_group_controller = LocalGroupController()
                     local_group_controller.app = app
                     local_group_controller.load_config = (lambda: self.ss_config)
-                    local_group_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    local_group_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     local_group_controller.add()
 
                     out, err = self.capsys.readouterr()
@@ -242,7 +242,7 @@ class TestService(unittest.TestCase):
                         local_group_controller = LocalGroupController()
                         local_group_controller.app = app
                         local_group_controller.load_config = (lambda: self.ss_config)
-                        local_group_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                        local_group_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                         local_group_controller.add_member()
 
                         out, err = self.capsys.readouterr()
@@ -270,7 +270,7 @@ class TestService(unittest.TestCase):
                         local_group_controller = LocalGroupController()
                         local_group_controller.app = app
                         local_group_controller.load_config = (lambda: self.ss_config)
-                        local_group_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                        local_group_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                         local_group_controller.add_member()
 
                         out, err = self.capsys.readouterr()
@@ -291,7 +291,7 @@ class TestService(unittest.TestCase):
                         local_group_controller = LocalGroupController()
                         local_group_controller.app = app
                         local_group_controller.load_config = (lambda: self.ss_config)
-                        local_group_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                        local_group_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                         local_group_controller.add_member()
 
                         out, err = self.capsys.readouterr()
@@ -306,13 +306,13 @@ class TestService(unittest.TestCase):
             with mock.patch('xrdsst.api.clients_api.ClientsApi.get_client_local_groups',
                             return_value=[ClientTestData.client_local_group_response]):
                 with mock.patch('xrdsst.api.clients_api.ClientsApi.find_clients',
-                                return_value=[ClientTestData.client_local_group_response_not_found]):
+                                return_value=[ClientTestData.find_client_member_not_found]):
                     with mock.patch('xrdsst.api.local_groups_api.LocalGroupsApi.add_local_group_member',
                                     return_value={}):
                         local_group_controller = LocalGroupController()
                         local_group_controller.app = app
                         local_group_controller.load_config = (lambda: self.ss_config)
-                        local_group_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                        local_group_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                         local_group_controller.add_member()
 
                         out, err = self.capsys.readouterr()
@@ -330,7 +330,7 @@ class TestService(unittest.TestCase):
                 local_group_controller = LocalGroupController()
                 local_group_controller.app = app
                 local_group_controller.load_config = (lambda: self.ss_config)
-                local_group_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                local_group_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                 local_group_controller.list()
 
                 assert local_group_controller.app._last_rendered[0][0] == ['ID', 'CODE', 'DESCRIPTION', 'MEMBERS']
@@ -345,7 +345,7 @@ class TestService(unittest.TestCase):
                 local_group_controller.app = app
                 local_group_controller.load_config = (lambda: self.ss_config)
                 local_group_controller.get_server_status = (
-                    lambda x, y: StatusTestData.server_status_essentials_complete)
+                    lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                 local_group_controller.delete()
 
                 out, err = self.capsys.readouterr()
@@ -366,7 +366,7 @@ class TestService(unittest.TestCase):
                     local_group_controller.app = app
                     local_group_controller.load_config = (lambda: self.ss_config)
                     local_group_controller.get_server_status = (
-                        lambda x, y: StatusTestData.server_status_essentials_complete)
+                        lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     local_group_controller.delete_member()
 
                     out, err = self.capsys.readouterr()
@@ -0,0 +1,191 @@
+import copy
+import os
+import sys
+import unittest
+from unittest import mock
+
+import pytest
+
+from tests.util.test_util import ObjectStruct
+from xrdsst.configuration.configuration import Configuration
+from xrdsst.controllers.auto import AutoController
+from xrdsst.controllers.client import ClientController
+from xrdsst.controllers.endpoint import EndpointController
+from xrdsst.controllers.local_group import LocalGroupController
+from xrdsst.controllers.plan import PlanController, ServerPlan
+from xrdsst.controllers.service import ServiceController
+from xrdsst.main import XRDSSTTest, OPS
+
+
+class PlanTestData:
+    client = ObjectStruct(id='DEV:GOV:9876:SUB1', member_class='GOV', member_code='9876', subsystem_code='SUB1',
+                          status='REGISTERED', connection_type='HTTP')
+
+    service_description = ObjectStruct(
+        id='1', url='https://openapi3', type='OPENAPI3', disabled=False, client_id='DEV:GOV:9876:SUB1',
+        services=[ObjectStruct(id='DEV:GOV:9876:SUB1:Petstore', service_code='Petstore', timeout=120, ssl_auth=True,
+                               url='http://petstore.swagger.io/v1',
+                               endpoints=[ObjectStruct(id='5', method='GET', path='/pets')])]
+    )
+
+    local_group = ObjectStruct(id='7', code='group1', members=[ObjectStruct(id='DEV:GOV:1234:SUB1')])
+
+
+class TestPlan(unittest.TestCase):
+    os.environ["TOOLKIT_SS1_API_KEY"] = "66666666-8000-4011-a000-333336633333"
+    ss_config = {
+        'admin_credentials': 'TOOLKIT_ADMIN_CREDENTIALS',
+        'ssh_access': {'user': 'TOOLKIT_SSH_USER', 'private_key': 'TOOLKIT_SSH_PRIVATE_KEY'},
+        'security_server':
+            [{'name': 'ssX',
+              'url': 'https://non.existing.url.blah:8999/api/v1',
+              'api_key': 'TOOLKIT_SS1_API_KEY',
+              'api_key_url': 'https://localhost:4000/api/v1/api-keys',
+              'owner_member_class': 'GOV',
+              'owner_member_code': '1234',
+              'clients': [
+                  {
+                      'member_class': 'GOV',
+                      'member_code': '9876',
+                      'subsystem_code': 'SUB1',
+                      'member_name': 'NIIS',
+                      'connection_type': 'HTTP',
+                      'service_descriptions': [{
+                          'url': 'https://openapi3',
+                          'rest_service_code': 'Petstore',
+                          'type': 'OPENAPI3',
+                          'access': ['DEV:security-server-owners'],
+                          'url_all': False,
+                          'timeout_all': False,
+                          'ssl_auth_all': False,
+                          'services': [
+                              {
+                                  'service_code': 'Petstore',
+                                  'timeout': 120,
+                                  'ssl_auth': True,
+                                  'url': 'http://petstore.swagger.io/v1'
+                              }
+                          ],
+                          'endpoints': [
+                              {
+                                  'method': 'GET',
+                                  'path': '/pets',
+                                  'access': ['DEV:GOV:1234:SUB1']
+                              }
+                          ]
+                      }],
+                      'local_groups': [
+                          {
+                              'code': 'group1',
+                              'description': 'First group',
+                              'members': ['DEV:GOV:1234:SUB1']
+                          }
+                      ]
+                  }
+              ]}]
+    }
+
+    @pytest.fixture(autouse=True)
+    def capsys(self, capsys):
+        self.capsys = capsys
+
+    @staticmethod
+    def server_state(client=PlanTestData.client, service_description=PlanTestData.service_description, local_group=PlanTestData.local_group):
+        return mock.patch('xrdsst.api.clients_api.ClientsApi.find_clients', return_value=[client]), \
+            mock.patch('xrdsst.api.clients_api.ClientsApi.get_client_service_descriptions', return_value=[service_description]), \
+            mock.patch('xrdsst.api.services_api.ServicesApi.get_service_service_clients',
+                       return_value=[ObjectStruct(id='DEV:security-server-owners')]), \
+            mock.patch('xrdsst.api.endpoints_api.EndpointsApi.get_endpoint_service_clients',
+                       return_value=[ObjectStruct(id='DEV:GOV:1234:SUB1')]), \
+            mock.patch('xrdsst.api.clients_api.ClientsApi.get_client_local_groups', return_value=[local_group])
+
+    def test_plan_unchanged_configuration(self):
+        find_clients, get_descriptions, get_service_clients, get_endpoint_clients, get_local_groups = self.server_state()
+        with XRDSSTTest() as app, find_clients, get_descriptions, get_service_clients, get_endpoint_clients, get_local_groups, \
+                mock.patch('xrdsst.api.clients_api.ClientsApi.add_client') as add_client, \
+                mock.patch('xrdsst.api.clients_api.ClientsApi.add_client_service_description') as add_description:
+            plan_controller = PlanController()
+            plan_controller.app = app
+            plan_controller.load_config = (lambda: self.ss_config)
+            plans = plan_controller._default()
+
+            assert len(plans) == 1
+            assert plans[0].changes == []
+            assert plans[0].operations() == []
+            add_client.assert_not_called()
+            add_description.assert_not_called()
+
+            out, err = self.capsys.readouterr()
+            assert out.count("Planned 0 changes for 'ssX' in 0 operations.") == 1
+
+            with self.capsys.disabled():
+                sys.stdout.write(out)
+                sys.stderr.write(err)
+
+    def test_plan_changed_configuration(self):
+        config = copy.deepcopy(self.ss_config)
+        client_conf = config['security_server'][0]['clients'][0]
+        client_conf['service_descriptions'][0]['services'][0]['timeout'] = 60
+        client_conf['service_descriptions'][0]['endpoints'].append({'method': 'POST', 'path': '/pets', 'access': ['DEV:GOV:1234:SUB1']})
+        client_conf['service_descriptions'].append({'url': 'https://wsdl', 'type': 'WSDL', 'access': ['DEV:GOV:1234:SUB2']})
+        client_conf['local_groups'][0]['members'].append('DEV:GOV:1234:SUB2')
+        config['security_server'][0]['clients'].append({
+            'member_class': 'GOV', 'member_code': '9876', 'subsystem_code': 'SUB2', 'member_name': 'NIIS', 'connection_type': 'HTTPS'
+        })
+
+        find_clients, get_descriptions, get_service_clients, get_endpoint_clients, get_local_groups = self.server_state()
+        with find_clients, get_descriptions, get_service_clients, get_endpoint_clients, get_local_groups:
+            server_plan = PlanController.plan_server(Configuration(), config['security_server'][0])
+
+        assert server_plan.operations() == [
+            ServiceController.update_parameters, EndpointController.add, EndpointController.add_access,
+            ServiceController.add_description, ServiceController.enable_description, ServiceController.add_access,
+            LocalGroupController.add_member, ClientController.add, ClientController.register
+        ]
+        assert ('EndpointController.add', "endpoint 'POST /pets'") in \
+            [(operation.__qualname__, change) for operation, _, change in server_plan.changes]
+
+        def op_clients(operation):
+            return server_plan.op_config(config, operation)['security_server'][0]['clients']
+
+        assert [sd['url'] for sd in op_clients(ServiceController.add_description)[0]['service_descriptions']] == ['https://wsdl']
+        assert op_clients(EndpointController.add)[0]['service_descriptions'][0]['endpoints'] == [
+            {'method': 'POST', 'path': '/pets', 'access': ['DEV:GOV:1234:SUB1']}
+        ]
+        assert op_clients(EndpointController.add_access)[0]['service_descriptions'][0]['endpoints'] == [
+            {'method': 'POST', 'path': '/pets', 'access': ['DEV:GOV:1234:SUB1']}
+        ]
+        assert op_clients(LocalGroupController.add_member)[0]['local_groups'][0]['members'] == ['DEV:GOV:1234:SUB2']
+        assert [client['subsystem_code'] for client in op_clients(ClientController.add)] == ['SUB2']
+        assert op_clients(ClientController.update) == []
+
+    @mock.patch.object(XRDSSTTest, 'pargs', ObjectStruct(plan=True))
+    @mock.patch.object(LocalGroupController, 'add')
+    @mock.patch.object(ServiceController, 'add_description')
+    @mock.patch.object(ClientController, 'add')
+    def test_apply_plan_performs_planned_operations_only(self, client_add_mock, add_description_mock, local_group_add_mock):
+        config = copy.deepcopy(self.ss_config)
+        config['security_server'][0]['clients'][0]['subsystem_code'] = 'SUB2'
+        server_plan = ServerPlan(config['security_server'][0])
+        server_plan.change(ClientController.add, config['security_server'][0]['clients'][0], ['add client'])
+
+        with XRDSSTTest() as app, mock.patch.object(PlanController, 'plan_server', return_value=server_plan) as plan_server:
+            app.OP_DEPENDENCY_LIST = [OPS.ADD_CLIENT, OPS.ADD_SERVICE_DESC, OPS.ADD_LOCAL_GROUP]
+            app.OP_SERVER_STATUSES['ssX'] = {'api_config': Configuration(), 'status': None}
+            auto_controller = AutoController()
+            auto_controller.app = app
+            auto_controller._iterate_dependency_nodes('ssX', config)
+
+            plan_server.assert_called_once()
+            client_add_mock.assert_called_once()
+            add_description_mock.assert_not_called()
+            local_group_add_mock.assert_not_called()
+            planned_config = client_add_mock.call_args[0][0].load_config()
+            assert [client['subsystem_code'] for client in planned_config['security_server'][0]['clients']] == ['SUB2']
+
+            out, err = self.capsys.readouterr()
+            assert out.count("SKIPPED, no changes planned.") == 2
+
+            with self.capsys.disabled():
+                sys.stdout.write(out)
+                sys.stderr.write(err)
@@ -0,0 +1,114 @@
+import unittest
+from unittest import mock
+
+import urllib3
+
+from xrdsst.configuration.configuration import Configuration
+from xrdsst.rest.rest import RESTClientObject, ApiException, RetryPolicy, set_retry_policy, retry_safe, retry_stats, \
+    reset_retry_stats
+
+
+class TestRest(unittest.TestCase):
+    url = 'https://ss.somewhere:4000/api/v1/tokens'
+
+    @staticmethod
+    def connection_refused():
+        return urllib3.exceptions.MaxRetryError(None, '/api/v1/tokens', urllib3.exceptions.NewConnectionError(None, 'Connection refused'))
+
+    @staticmethod
+    def connection_reset():
+        return urllib3.exceptions.ProtocolError('Connection aborted.', ConnectionResetError())
+
+    def setUp(self):
+        set_retry_policy(RetryPolicy(retries=3, backoff=0.5, max_backoff=10.0))
+        reset_retry_stats()
+        self.rest_client = RESTClientObject(Configuration())
+
+    def tearDown(self):
+        set_retry_policy(None)
+        reset_retry_stats()
+
+    def test_idempotent_request_retried_until_success(self):
+        with mock.patch.object(RESTClientObject, 'request_once', side_effect=[ApiException(status=503), self.connection_reset(), 'OK']) as request_once, \
+                mock.patch('xrdsst.rest.rest.time.sleep') as sleep:
+            assert self.rest_client.request('GET', self.url) == 'OK'
+
+        assert request_once.call_count == 3
+        assert sleep.call_count == 2
+        assert retry_stats() == {'retries': 2, 'recovered': 1, 'exhausted': 0}
+
+    def test_retries_rate_limited(self):
+        with mock.patch.object(RESTClientObject, 'request_once', side_effect=[ApiException(status=503), ApiException(status=503), 'OK']), \
+                mock.patch('xrdsst.rest.rest.time.sleep'), \
+                mock.patch('xrdsst.api_client.extensions.limit_rate') as limit_rate:
+            assert self.rest_client.request('GET', self.url) == 'OK'
+
+        assert limit_rate.call_args_list == [mock.call('https://ss.somewhere:4000')] * 2
+
+    def test_retries_exhausted(self):
+        with mock.patch.object(RESTClientObject, 'request_once', side_effect=ApiException(status=504)) as request_once, \
+                mock.patch('xrdsst.rest.rest.time.sleep'):
+            with self.assertRaises(ApiException):
+                self.rest_client.request('DELETE', self.url)
+
+        assert request_once.call_count == 4
+        assert retry_stats() == {'retries': 3, 'recovered': 0, 'exhausted': 1}
+
+    def test_client_errors_not_retried(self):
+        with mock.patch.object(RESTClientObject, 'request_once', side_effect=ApiException(status=409)) as request_once:
+            with self.assertRaises(ApiException):
+                self.rest_client.request('PUT', self.url)
+
+        assert request_once.call_count == 1
+        assert retry_stats()['retries'] == 0
+
+    def test_post_retried_only_when_safe_or_not_sent(self):
+        with mock.patch.object(RESTClientObject, 'request_once', side_effect=[ApiException(status=503), 'OK']) as request_once, \
+                mock.patch('xrdsst.rest.rest.time.sleep'):
+            with self.assertRaises(ApiException):
+                self.rest_client.request('POST', self.url)
+            assert request_once.call_count == 1
+
+            with retry_safe():
+                assert self.rest_client.request('POST', self.url) == 'OK'
+
+        with mock.patch.object(RESTClientObject, 'request_once', side_effect=[self.connection_refused(), 'OK']), \
+                mock.patch('xrdsst.rest.rest.time.sleep'):
+            assert self.rest_client.request('POST', self.url) == 'OK'
+
+    def test_retry_delay_backoff_and_jitter(self):
+        policy = RetryPolicy(retries=5, backoff=0.5, max_backoff=3.0)
+        with mock.patch('xrdsst.rest.rest.random.uniform', side_effect=lambda low, high: high):
+            assert [policy.delay(attempt) for attempt in range(5)] == [0.5, 1.0, 2.0, 3.0, 3.0]
+        with mock.patch('xrdsst.rest.rest.random.uniform', side_effect=lambda low, high: low):
+            assert policy.delay(0) == 0
+
+        overloaded = ApiException(status=503)
+        overloaded.headers = {'Retry-After': '2'}
+        assert policy.delay(0, overloaded) >= 2.0
+
+    def test_retries_disabled(self):
+        set_retry_policy(RetryPolicy(retries=0))
+        with mock.patch.object(RESTClientObject, 'request_once', side_effect=ApiException(status=503)) as request_once:
+            with self.assertRaises(ApiException):
+                self.rest_client.request('GET', self.url)
+
+        assert request_once.call_count == 1
+        assert retry_stats() == {'retries': 0, 'recovered': 0, 'exhausted': 0}
+
+    def test_retried_overload_adapts_rate(self):
+        with mock.patch.object(RESTClientObject, 'request_once', side_effect=[ApiException(status=503), ApiException(status=503), 'OK']), \
+                mock.patch('xrdsst.rest.rest.time.sleep'), \
+                mock.patch('xrdsst.api_client.extensions.limit_rate'), \
+                mock.patch('xrdsst.api_client.extensions.adapt_rate') as adapt_rate:
+            assert self.rest_client.request('GET', self.url) == 'OK'
+
+        assert [(call[0][0], call[0][1].status) for call in adapt_rate.call_args_list] == [('https://ss.somewhere:4000', 503)] * 2
+
+    def test_redirects_followed_connection_errors_not_retried(self):
+        retries = self.rest_client.pool_manager.connection_pool_kw['retries']
+        redirect = urllib3.HTTPResponse(status=302, headers={'Location': '/api/v1/tokens/'})
+        assert not retries.increment('GET', self.url, response=redirect).is_exhausted()
+
+        with self.assertRaises(urllib3.exceptions.MaxRetryError):
+            retries.increment('GET', self.url, error=urllib3.exceptions.NewConnectionError(None, 'Connection refused'))
@@ -6,11 +6,15 @@ from unittest import mock
 
 import pytest
 
-from tests.util.test_util import StatusTestData
+from tests.util.test_util import StatusTestData, ObjectStruct
+from xrdsst.api import ClientsApi
+from xrdsst.api_client.api_client import ApiClient
+from xrdsst.configuration.configuration import Configuration
+from xrdsst.controllers.client import ClientController
 from xrdsst.controllers.service import ServiceController
 from xrdsst.models import Client, ConnectionType, ClientStatus, ServiceDescription, ServiceType, ServiceClient, ServiceClientType, Service
 from xrdsst.main import XRDSSTTest
-from xrdsst.rest.rest import ApiException
+from xrdsst.rest.rest import ApiException, _RETRY_SAFE
 
 
 class ServiceTestData:
@@ -191,7 +195,8 @@ class TestService(unittest.TestCase):
                                                 local_group_code=None,
                                                 service_client_type=ServiceClientType.GLOBALGROUP,
                                                 rights_given_at=datetime.now().isoformat())]):
-                                with mock.patch('xrdsst.api.services_api.ServicesApi.add_service_service_clients',
+                                with mock.patch('xrdsst.api.services_api.ServicesApi.get_service_service_clients', return_value=[]), \
+                                        mock.patch('xrdsst.api.services_api.ServicesApi.add_service_service_clients',
                                                 return_value=[ServiceClient(
                                                     id='DEV:security-server-owners',
                                                     name='Security server owners',
@@ -212,7 +217,7 @@ class TestService(unittest.TestCase):
                                         service_controller = ServiceController()
                                         service_controller.app = app
                                         service_controller.load_config = (lambda: self.ss_config)
-                                        service_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                                        service_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                                         service_controller.apply()
 
                                         out, err = self.capsys.readouterr()
@@ -243,7 +248,7 @@ class TestService(unittest.TestCase):
                     service_controller = ServiceController()
                     service_controller.app = app
                     service_controller.load_config = (lambda: self.ss_config)
-                    service_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    service_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     service_controller.add_description()
 
                     out, err = self.capsys.readouterr()
@@ -267,7 +272,7 @@ class TestService(unittest.TestCase):
                 service_controller = ServiceController()
                 service_controller.app = app
                 service_controller.load_config = (lambda: self.ss_config)
-                service_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                service_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                 service_controller.add_description()
 
                 out, err = self.capsys.readouterr()
@@ -302,7 +307,7 @@ class TestService(unittest.TestCase):
                     service_controller = ServiceController()
                     service_controller.app = app
                     service_controller.load_config = (lambda: self.ss_config)
-                    service_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    service_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     service_controller.add_description()
 
                     out, err = self.capsys.readouterr()
@@ -337,7 +342,7 @@ class TestService(unittest.TestCase):
                     service_controller = ServiceController()
                     service_controller.app = app
                     service_controller.load_config = (lambda: self.ss_config)
-                    service_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    service_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     service_controller.add_description()
 
                     out, err = self.capsys.readouterr()
@@ -367,7 +372,7 @@ class TestService(unittest.TestCase):
                         service_controller = ServiceController()
                         service_controller.app = app
                         service_controller.load_config = (lambda: self.ss_config)
-                        service_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                        service_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                         service_controller.enable_description()
 
                         out, err = self.capsys.readouterr()
@@ -404,7 +409,7 @@ class TestService(unittest.TestCase):
                         service_controller = ServiceController()
                         service_controller.app = app
                         service_controller.load_config = (lambda: self.ss_config)
-                        service_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                        service_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                         service_controller.enable_description()
 
                         out, err = self.capsys.readouterr()
@@ -437,7 +442,8 @@ class TestService(unittest.TestCase):
                                         local_group_code=None,
                                         service_client_type=ServiceClientType.GLOBALGROUP,
                                         rights_given_at=datetime.now().isoformat())]):
-                        with mock.patch('xrdsst.api.services_api.ServicesApi.add_service_service_clients',
+                        with mock.patch('xrdsst.api.services_api.ServicesApi.get_service_service_clients', return_value=[]), \
+                                mock.patch('xrdsst.api.services_api.ServicesApi.add_service_service_clients',
                                         return_value=[ServiceClient(
                                             id='DEV:security-server-owners',
                                             name='Security server owners',
@@ -447,7 +453,7 @@ class TestService(unittest.TestCase):
                             service_controller = ServiceController()
                             service_controller.app = app
                             service_controller.load_config = (lambda: self.ss_config)
-                            service_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                            service_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                             service_controller.add_access()
 
                             out, err = self.capsys.readouterr()
@@ -480,23 +486,28 @@ class TestService(unittest.TestCase):
             )]):
                 with mock.patch('xrdsst.api.clients_api.ClientsApi.get_client_service_descriptions',
                                 return_value=[ServiceTestData.add_description_response]):
-                    with mock.patch('xrdsst.api.clients_api.ClientsApi.find_service_client_candidates',
-                                    return_value=[ServiceClient(
-                                        id='DEV:security-server-owners',
-                                        name='Security server owners',
-                                        local_group_code=None,
-                                        service_client_type=ServiceClientType.GLOBALGROUP,
-                                        rights_given_at=datetime.now().isoformat())]):
+                    owners = ServiceClient(
+                        id='DEV:security-server-owners',
+                        name='Security server owners',
+                        local_group_code=None,
+                        service_client_type=ServiceClientType.GLOBALGROUP,
+                        rights_given_at=datetime.now().isoformat())
+                    with mock.patch('xrdsst.api.clients_api.ClientsApi.find_service_client_candidates', return_value=[owners]):
+                        # Granted by someone else between reading the service clients and adding the missing ones
                         with mock.patch('xrdsst.api.services_api.ServicesApi.add_service_service_clients',
-                                        side_effect=ApiException(http_resp=AlreadyAddedResponse())):
+                                        side_effect=ApiException(http_resp=AlreadyAddedResponse())) as add_service_clients, \
+                                mock.patch('xrdsst.api.services_api.ServicesApi.get_service_service_clients',
+                                           side_effect=lambda id: [owners] if add_service_clients.called else []):
                             service_controller = ServiceController()
                             service_controller.app = app
                             service_controller.load_config = (lambda: self.ss_config)
-                            service_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                            service_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                             service_controller.add_access()
 
                             out, err = self.capsys.readouterr()
                             assert out.count("already added") > 0
+                            assert out.count("services failed") == 0
+                            assert out.count("0 added to 0 services, 1 already given.") > 0
 
                             with self.capsys.disabled():
                                 sys.stdout.write(out)
@@ -532,7 +543,7 @@ class TestService(unittest.TestCase):
                         service_controller = ServiceController()
                         service_controller.app = app
                         service_controller.load_config = (lambda: self.ss_config)
-                        service_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                        service_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                         service_controller.update_parameters()
 
                         out, err = self.capsys.readouterr()
@@ -1037,3 +1048,83 @@ class TestService(unittest.TestCase):
                             with self.capsys.disabled():
                                 sys.stdout.write(out)
                                 sys.stderr.write(err)
+
+    def test_service_descriptions_cached_until_changed(self):
+        ss_api_config = Configuration()
+        ss_api_config.host = 'https://ssX:4000/api/v1'
+        clients_api = ClientsApi(ApiClient(ss_api_config))
+        client = Client(id='DEV:GOV:9876:SUB1', member_class='GOV', member_code='9876', subsystem_code='SUB1')
+        openapi_conf = {'url': 'https://openapi3', 'type': ServiceType.OPENAPI3}
+        service_controller = ServiceController()
+
+        with mock.patch('xrdsst.api.clients_api.ClientsApi.get_client_service_descriptions',
+                        return_value=[ServiceTestData.add_description_response]) as get_descriptions:
+            assert service_controller.get_client_service_description(clients_api, client, openapi_conf) is ServiceTestData.add_description_response
+            assert service_controller.get_client_service_description(clients_api, client, dict(openapi_conf, type=ServiceType.WSDL)) is None
+            assert service_controller.get_client_service_description(clients_api, client, dict(openapi_conf, url='https://other')) is None
+            assert get_descriptions.call_count == 1
+
+            with mock.patch('xrdsst.controllers.client.ClientController.find_client', return_value=client), \
+                    mock.patch('xrdsst.api.service_descriptions_api.ServiceDescriptionsApi.enable_service_description') as enable_description:
+                service_controller.remote_enable_service_description(ss_api_config, {'member_class': 'GOV', 'member_code': '9876', 'subsystem_code': 'SUB1'}, openapi_conf)
+                enable_description.assert_called_once_with('DEV:GOV:9876:SUB1')
+            assert get_descriptions.call_count == 1
+
+            service_controller.get_client_service_description(clients_api, client, openapi_conf)
+            assert get_descriptions.call_count == 2
+
+    def test_service_add_access_only_missing_grants(self):
+        def service_client(client_id):
+            return ServiceClient(id=client_id, name=client_id, local_group_code=None, service_client_type=ServiceClientType.SUBSYSTEM,
+                                 rights_given_at=datetime.now().isoformat())
+
+        service_description = ObjectStruct(
+            id='12', url='https://wsdl', type=ServiceType.WSDL, client_id='DEV:GOV:9876:SUB1',
+            services=[ObjectStruct(id='DEV:GOV:9876:SUB1:' + code, service_code=code) for code in ['getRandom', 'helloService', 'other']]
+        )
+        service_description_conf = {
+            'url': 'https://wsdl', 'type': 'WSDL', 'access': ['DEV:GOV:1234:SUB1', 'DEV:GOV:1234:SUB2', 'DEV:GOV:1234:SUB3'],
+            'services': [{'service_code': 'other', 'access': ['DEV:GOV:1234:SUB1']}]
+        }
+        existing_service_clients = {
+            'DEV:GOV:9876:SUB1:getRandom': [service_client('DEV:GOV:1234:SUB1'), service_client('DEV:GOV:1234:SUB2')],
+            'DEV:GOV:9876:SUB1:helloService': [service_client('DEV:GOV:1234:SUB1')],
+            'DEV:GOV:9876:SUB1:other': [service_client('DEV:GOV:1234:SUB1')]
+        }
+
+        retry_safe_adds = []
+        with XRDSSTTest() as app:
+            with mock.patch('xrdsst.api.clients_api.ClientsApi.find_service_client_candidates',
+                            return_value=[service_client('DEV:GOV:1234:SUB1'), service_client('DEV:GOV:1234:SUB2')]) as find_candidates, \
+                    mock.patch('xrdsst.api.services_api.ServicesApi.get_service_service_clients',
+                               side_effect=lambda id: existing_service_clients[id]), \
+                    mock.patch('xrdsst.api.services_api.ServicesApi.add_service_service_clients',
+                               side_effect=lambda *args, **kwargs: retry_safe_adds.append(getattr(_RETRY_SAFE, 'active', False))) as add_service_clients, \
+                    mock.patch('xrdsst.api.clients_api.ClientsApi.find_clients', return_value=[]):
+                service_controller = ServiceController()
+                service_controller.app = app
+                client = ObjectStruct(id='DEV:GOV:9876:SUB1')
+                clients_api = ClientsApi(ApiClient(Configuration()))
+                service_controller.remote_add_access_rights_for_services(
+                    Configuration(), service_description_conf, ClientController(), clients_api, client, service_description
+                )
+
+                find_candidates.assert_called_once()
+                add_service_clients.assert_called_once()
+                assert add_service_clients.call_args[0][0] == 'DEV:GOV:9876:SUB1:helloService'
+                assert [sc.id for sc in add_service_clients.call_args[1]['body'].items] == ['DEV:GOV:1234:SUB2']
+                assert retry_safe_adds == [True]
+
+                out, err = self.capsys.readouterr()
+                assert out.count("1 added to 1 services, 4 already given") == 1
+                assert out.count("['DEV:GOV:1234:SUB3'], service clients candidates not found") == 1
+
+                # Candidates are reused for the other service descriptions of the same client
+                service_controller.remote_add_access_rights_for_services(
+                    Configuration(), service_description_conf, ClientController(), clients_api, client, service_description
+                )
+                find_candidates.assert_called_once()
+
+                with self.capsys.disabled():
+                    sys.stdout.write(out)
+                    sys.stderr.write(err)
@@ -0,0 +1,55 @@
+import os
+import unittest
+from unittest import mock
+
+from xrdsst.core.ssh import SshTransport, OpenSshTransport, StubSshTransport, ssh_transport, set_ssh_transport, close_ssh_transport
+
+
+class TestSsh(unittest.TestCase):
+    def tearDown(self):
+        set_ssh_transport(None)
+
+    def test_open_ssh_transport_multiplexes_sessions(self):
+        transport = OpenSshTransport(control_persist=30)
+        with mock.patch('xrdsst.core.ssh.subprocess.getstatusoutput', return_value=(0, 'done')) as ssh_mock:
+            assert transport.run('/key', 'user', 'ss1', 'id') == (0, 'done')
+            assert transport.run('/key', 'user', 'ss1', 'whoami') == (0, 'done')
+            assert transport.run('/key', 'user', 'ss2', 'id') == (0, 'done')
+
+            commands = [call[0][0] for call in ssh_mock.call_args_list]
+            control_dir = transport._control_dir
+            assert os.path.isdir(control_dir)
+            assert all(map(lambda c: c.count('-o ControlMaster=auto') == 1, commands))
+            assert all(map(lambda c: c.count('-o ControlPersist=30') == 1, commands))
+            assert all(map(lambda c: c.count('ControlPath="' + control_dir + '/%C"') == 1, commands))
+            assert commands[1].endswith('-i "/key" user@ss1 "whoami"')
+
+            ssh_mock.reset_mock()
+            transport.close()
+
+            stop_commands = sorted(call[0][0] for call in ssh_mock.call_args_list)
+            assert len(stop_commands) == 2  # One master connection per host
+            assert stop_commands[0].endswith('-O exit user@ss1')
+            assert stop_commands[1].endswith('-O exit user@ss2')
+            assert not os.path.exists(control_dir)
+
+    def test_ssh_transport_run_abstract(self):
+        with self.assertRaises(TypeError):
+            SshTransport()
+
+    def test_open_ssh_transport_close_unused(self):
+        with mock.patch('xrdsst.core.ssh.subprocess.getstatusoutput') as ssh_mock:
+            OpenSshTransport().close()
+            ssh_mock.assert_not_called()
+
+    def test_shared_transport(self):
+        assert isinstance(ssh_transport(), OpenSshTransport)
+        assert ssh_transport() is ssh_transport()
+
+        stub_transport = StubSshTransport()
+        set_ssh_transport(stub_transport)
+        assert ssh_transport() is stub_transport
+
+        close_ssh_transport()
+        assert stub_transport.closed
+        assert ssh_transport() is not stub_transport
@@ -1,17 +1,30 @@
 import copy
 import os
+import socket
 import sys
+import tempfile
+import threading
+import time
 import unittest
 from unittest import mock
 
+import networkx
+import urllib3
 import pytest
 
 from datetime import datetime, timedelta
 from xrdsst.core.definitions import ROOT_DIR
-from tests.util.test_util import ObjectStruct, DiagnosticsTestData, InitTestData
+from tests.util.test_util import ObjectStruct, DiagnosticsTestData, InitTestData, StatusTestData
+from xrdsst.api_client.extensions import add_state_change_listener, remove_state_change_listener, notify_state_change
 from xrdsst.api import UserApi, SystemApi, DiagnosticsApi, InitializationApi, SecurityServersApi, TokensApi
+from xrdsst.configuration.configuration import Configuration
+from xrdsst.controllers.base import BaseController
 from xrdsst.controllers.status import StatusController
-from xrdsst.main import XRDSSTTest
+from xrdsst.core.api_util import status_server, StatusRequestMemo, refresh_server_status, ServerStatus, StatusServerInitialization, \
+    StatusToken, StatusFacet
+from xrdsst.core.status_cache import StatusCache, encode_server_status
+from xrdsst.core.util import preflight_connectivity, is_ss_connectable, reset_connectivity, _probe_connectivity
+from xrdsst.main import XRDSSTTest, OPS
 from xrdsst.models import Version, User, GlobalConfDiagnostics, InitializationStatus, TokenStatus, SecurityServer, \
     TimestampingService, Token, PossibleAction, TokenType
 from xrdsst.rest.rest import ApiException
@@ -200,3 +213,363 @@ class TestStatus(unittest.TestCase):
             with self.capsys.disabled():
                 sys.stdout.write(out)
                 sys.stderr.write(err)
+
+    # Calls of slow() API stubs: total, currently running and the most running at the same time.
+    slow_calls = {'total': 0, 'running': 0, 'peak': 0}
+    slow_calls_lock = threading.Lock()
+
+    @staticmethod
+    def slow(result, delay=0.3):
+        def _slow(*args, **kwargs):
+            calls, lock = TestStatus.slow_calls, TestStatus.slow_calls_lock
+            with lock:
+                calls['total'] += 1
+                calls['running'] += 1
+                calls['peak'] = max(calls['peak'], calls['running'])
+            time.sleep(delay)
+            with lock:
+                calls['running'] -= 1
+            return result
+        return _slow
+
+    @mock.patch('xrdsst.core.api_util.is_ss_connectable', lambda x: (True, 'good connectivity (test injected)'))
+    @mock.patch.object(UserApi, 'get_user', sysadm_secoff)
+    @mock.patch.object(SystemApi, 'system_version', slow.__func__(Version(info="6.25.0")))
+    @mock.patch.object(DiagnosticsApi, 'get_global_conf_diagnostics', slow.__func__(DiagnosticsTestData.global_ok_success))
+    @mock.patch.object(InitializationApi, 'get_initialization_status', slow.__func__(InitTestData.all_initialized))
+    @mock.patch.object(SecurityServersApi, 'get_security_servers', slow.__func__([
+        SecurityServer(id="TEST:GOV:8672:SSLONG", instance_id="TEST", member_class="GOV", server_address="4.2.2.1", server_code="SSLONG")
+    ]))
+    @mock.patch.object(SystemApi, 'get_configured_timestamping_services', slow.__func__([TimestampingService(name="one tsa", url="https://one.tsa")]))
+    @mock.patch.object(TokensApi, 'get_token', slow.__func__(Token(
+        available=True, id="0", keys=[], logged_in=True, name="softToken-0", possible_actions=[],
+        read_only=False, saved_to_configuration=True, status=TokenStatus.OK, type=TokenType.SOFTWARE))
+    )
+    def test_status_server_queries_concurrent(self):
+        TestStatus.slow_calls.update(total=0, running=0, peak=0)
+        api_config = Configuration()
+        api_config.host = 'https://unrealz5BAlxpy9yo0XpplIQbPC.com:443/api/v1'
+        server_status = status_server(api_config, self.ss_config['security_server'][0])
+
+        assert TestStatus.slow_calls['total'] == 6
+        assert TestStatus.slow_calls['peak'] > 1
+        assert server_status.version_status.version == "6.25.0"
+        assert server_status.global_status.class_ == "OK"
+        assert server_status.server_init_status.server_code == "SSLONG"
+        assert server_status.timestamping_status[0].name == "one tsa"
+        assert server_status.token_status.logged_in
+        assert server_status.status_keys.key_count == 0
+
+    def test_status_server_duplicate_requests_avoided(self):
+        calls = {'get_token': 0, 'get_initialization_status': 0}
+
+        def counted(name, result):
+            def _counted(*args, **kwargs):
+                calls[name] += 1
+                time.sleep(0.1)
+                return result
+            return _counted
+
+        with mock.patch('xrdsst.core.api_util.is_ss_connectable', lambda x: (True, 'good connectivity (test injected)')), \
+                mock.patch.object(UserApi, 'get_user', sysadm_secoff), \
+                mock.patch.object(SystemApi, 'system_version', (lambda x: Version(info="6.25.0"))), \
+                mock.patch.object(DiagnosticsApi, 'get_global_conf_diagnostics', (lambda x: DiagnosticsTestData.global_ok_success)), \
+                mock.patch.object(InitializationApi, 'get_initialization_status', counted('get_initialization_status', InitTestData.all_initialized)), \
+                mock.patch.object(SecurityServersApi, 'get_security_servers', (lambda x, **kwargs: [
+                    SecurityServer(id="TEST:GOV:8672:SSLONG", instance_id="TEST", member_class="GOV", server_address="4.2.2.1", server_code="SSLONG")
+                ])), \
+                mock.patch.object(SystemApi, 'get_configured_timestamping_services', (lambda x: [])), \
+                mock.patch.object(TokensApi, 'get_token', counted('get_token', Token(
+                    available=True, id="0", keys=[], logged_in=True, name="softToken-0", possible_actions=[],
+                    read_only=False, saved_to_configuration=True, status=TokenStatus.OK, type=TokenType.SOFTWARE))):
+            api_config = Configuration()
+            api_config.host = 'https://unrealz5BAlxpy9yo0XpplIQbPC.com:443/api/v1'
+            server_status = status_server(api_config, self.ss_config['security_server'][0])
+
+        assert calls == {'get_token': 1, 'get_initialization_status': 1}
+        assert server_status.token_status.logged_in
+        assert server_status.status_keys.key_count == 0
+
+    def test_status_server_op_path_facets_only(self):
+        with XRDSSTTest() as app:
+            base_controller = BaseController()
+            base_controller.app = app
+            assert base_controller.op_status_facets(networkx.shortest_path(app.OP_GRAPH, OPS.INIT, OPS.ADD_CLIENT)) == \
+                (StatusFacet.INIT, StatusFacet.TOKEN)
+            assert base_controller.op_status_facets([OPS.INIT]) == ()
+
+        with mock.patch('xrdsst.core.api_util.is_ss_connectable', lambda x: (True, 'good connectivity (test injected)')), \
+                mock.patch.object(UserApi, 'get_user', sysadm_secoff), \
+                mock.patch.object(SystemApi, 'system_version') as version_mock, \
+                mock.patch.object(DiagnosticsApi, 'get_global_conf_diagnostics') as global_mock, \
+                mock.patch.object(SystemApi, 'get_configured_timestamping_services') as tsa_mock, \
+                mock.patch.object(InitializationApi, 'get_initialization_status', (lambda x: InitTestData.all_initialized)), \
+                mock.patch.object(SecurityServersApi, 'get_security_servers', (lambda x, **kwargs: [
+                    SecurityServer(id="TEST:GOV:8672:SSLONG", instance_id="TEST", member_class="GOV", server_address="4.2.2.1", server_code="SSLONG")
+                ])), \
+                mock.patch.object(TokensApi, 'get_token', (lambda x, y: Token(
+                    available=True, id="0", keys=[], logged_in=True, name="softToken-0", possible_actions=[],
+                    read_only=False, saved_to_configuration=True, status=TokenStatus.OK, type=TokenType.SOFTWARE))):
+            api_config = Configuration()
+            api_config.host = 'https://unrealz5BAlxpy9yo0XpplIQbPC.com:443/api/v1'
+            server_status = status_server(api_config, self.ss_config['security_server'][0], (StatusFacet.TOKEN,))
+
+            version_mock.assert_not_called()
+            global_mock.assert_not_called()
+            tsa_mock.assert_not_called()
+
+        assert server_status.connectivity_status[0]
+        assert server_status.roles_status.permitted
+        assert server_status.server_init_status.has_anchor
+        assert server_status.token_status.logged_in
+        assert server_status.timestamping_status == []
+
+    def test_status_request_memo(self):
+        memo = StatusRequestMemo()
+        assert memo.get('a', lambda: 1) == 1
+        assert memo.get('a', lambda: 2) == 1
+        assert memo.get('b', lambda: 3) == 3
+
+        def failing():
+            raise ApiException(status=500)
+
+        with pytest.raises(ApiException):
+            memo.get('c', failing)
+        with pytest.raises(ApiException):
+            memo.get('c', lambda: 4)
+
+        assert memo.requests == 3
+        assert memo.avoided == 2
+
+    def test_refresh_server_status_facets(self):
+        previous = ServerStatus(security_server_name='longServerName', server_init_status=StatusServerInitialization(has_anchor=True),
+                                timestamping_status=[], token_status=StatusToken(id_='0', logged_in=False))
+        with mock.patch.object(TokensApi, 'get_token', (lambda x, y: Token(
+                available=True, id="0", keys=[], logged_in=True, name="softToken-0", possible_actions=[],
+                read_only=False, saved_to_configuration=True, status=TokenStatus.OK, type=TokenType.SOFTWARE))), \
+                mock.patch.object(InitializationApi, 'get_initialization_status') as init_mock, \
+                mock.patch.object(SystemApi, 'get_configured_timestamping_services') as tsa_mock:
+            api_config = Configuration()
+            api_config.host = 'https://unrealz5BAlxpy9yo0XpplIQbPC.com:443/api/v1'
+            refreshed = refresh_server_status(api_config, self.ss_config['security_server'][0], previous, (StatusFacet.TOKEN,))
+
+            init_mock.assert_not_called()
+            tsa_mock.assert_not_called()
+
+        assert refreshed.token_status.logged_in
+        assert refreshed.timestamping_status == []
+        assert refreshed.server_init_status is previous.server_init_status
+        assert not previous.token_status.logged_in
+
+    def test_connectivity_preflight_concurrent_and_cached(self):
+        responding, silent, closed = socket.socket(), socket.socket(), socket.socket()
+        for sock in (responding, silent, closed):
+            sock.bind(('127.0.0.1', 0))
+        responding.listen()
+        silent.listen()
+        urls = ['https://127.0.0.1:%d/api/v1' % sock.getsockname()[1] for sock in (responding, silent, closed)]
+        closed.close()
+
+        def respond():
+            conn, _ = responding.accept()
+            conn.recv(16)
+            conn.send(b'HTTP/1.1 400 Bad Request\r\n\r\n')
+            conn.close()
+
+        probes = {'total': 0, 'running': 0, 'peak': 0}
+
+        async def probe_connectivity(ss_url, sock_timeout):
+            probes['total'] += 1
+            probes['running'] += 1
+            probes['peak'] = max(probes['peak'], probes['running'])
+            try:
+                return await _probe_connectivity(ss_url, sock_timeout)
+            finally:
+                probes['running'] -= 1
+
+        responder = threading.Thread(target=respond)
+        responder.start()
+        try:
+            reset_connectivity()
+            with mock.patch('xrdsst.core.util._probe_connectivity', probe_connectivity):
+                connectivity = preflight_connectivity(urls + ['https://nowhere/api/v1', urls[1]], sock_timeout=0.5)
+            responder.join()
+
+            assert probes['total'] == 3  # Each parseable URL probed once, all at the same time
+            assert probes['peak'] == 3
+            assert connectivity[urls[0]] == (True, '')
+            assert connectivity[urls[1]] == (False, 'timed out')
+            assert not connectivity[urls[2]][0]
+            assert connectivity['https://nowhere/api/v1'] == (False, "Unparsable scheme://host:port for 'https://nowhere/api/v1'.")
+
+            with mock.patch('xrdsst.core.util._probe_connectivity') as probe_mock:
+                assert is_ss_connectable(urls[0]) == (True, '')
+                assert is_ss_connectable(urls[1]) == (False, 'timed out')
+                probe_mock.assert_not_called()
+        finally:
+            reset_connectivity()
+            responding.close()
+            silent.close()
+
+    def test_status_cache_roundtrip_expiry_and_invalidation(self):
+        with tempfile.TemporaryDirectory(prefix='xrdsst-') as cache_dir:
+            config = dict(self.ss_config, status_cache={'ttl': 60, 'file': os.path.join(cache_dir, 'status')})
+            ss_url = config['security_server'][0]['url']
+            ss_key = StatusCache.status_key(config['security_server'][0], BaseController.api_key_config(config['security_server'][0], 'KEY-1'))
+            status_cache = StatusCache.from_config(config)
+            status_cache.put(ss_key, StatusTestData.server_status_essentials_complete)
+            assert os.stat(config['status_cache']['file']).st_mode & 0o077 == 0
+            assert ss_key.startswith(ss_url + ' ')
+            assert StatusCache.status_key(config['security_server'][0], BaseController.api_key_config(config['security_server'][0], 'KEY-2')) != ss_key
+
+            cached = StatusCache.from_config(config).get(ss_key)
+            expected = StatusTestData.server_status_essentials_complete
+            assert cached.connectivity_status == (True, '')
+            assert cached.global_status.updated == expected.global_status.updated
+            assert cached.server_init_status.server_code == 'SECS'
+            assert cached.token_status.id == expected.token_status.id
+            assert cached.timestamping_status[0].url == 'https://some.where.com'
+            assert vars(cached.status_certs) == vars(expected.status_certs)
+            assert StatusCache.from_config(self.ss_config) is None
+
+            with mock.patch('xrdsst.core.status_cache.time.time', return_value=time.time() + 60):
+                assert status_cache.get(ss_key) is None
+
+            add_state_change_listener(StatusCache, status_cache.invalidate)
+            try:
+                notify_state_change('/'.join(ss_url.split('/')[:3]), 'GET')
+                assert status_cache.get(ss_key) is not None
+                with mock.patch.object(StatusCache, '_load', wraps=status_cache._load) as load_mock:
+                    notify_state_change('/'.join(ss_url.split('/')[:3]), 'PUT')
+                    notify_state_change('/'.join(ss_url.split('/')[:3]), 'PATCH')
+                    assert load_mock.call_count == 1  # Once invalidated, not again until next status is cached
+                assert status_cache.get(ss_key) is None
+
+                status_cache.put(ss_key, StatusTestData.server_status_essentials_complete)
+                notify_state_change('/'.join(ss_url.split('/')[:3]), 'DELETE')
+                assert status_cache.get(ss_key) is None
+
+                # Status cached by another process, not seen in this one
+                status_cache._save({ss_key: {'created': time.time(), 'status': encode_server_status(StatusTestData.server_status_essentials_complete)}})
+                notify_state_change('/'.join(ss_url.split('/')[:3]), 'PUT')
+                assert status_cache.get(ss_key) is None
+            finally:
+                remove_state_change_listener(StatusCache)
+
+    def test_status_cache_reused_by_consecutive_commands(self):
+        with tempfile.TemporaryDirectory(prefix='xrdsst-') as cache_dir:
+            config = dict(self.ss_config, security_server=self.ss_config['security_server'][:1],
+                          status_cache={'ttl': 60, 'file': os.path.join(cache_dir, 'status')})
+            with mock.patch.dict(os.environ, {'TOOLKIT_SS1_API_KEY': '66666666-8000-4011-a000-333336633333'}), \
+                    mock.patch.object(BaseController, 'get_server_status', return_value=StatusTestData.server_status_essentials_complete) as status_mock:
+                for _ in range(2):
+                    with XRDSSTTest() as app:
+                        status_controller = StatusController()
+                        status_controller.app = app
+                        status_controller.load_config = (lambda: config)
+                        servers = status_controller._default()
+                        assert servers[0].server_init_status.server_code == 'SECS'
+
+                assert status_mock.call_count == 1
+
+                StatusCache.from_config(config).invalidate('/'.join(config['security_server'][0]['url'].split('/')[:3]))
+                with XRDSSTTest() as app:
+                    base_controller = BaseController()
+                    base_controller.app = app
+                    base_controller.update_op_statuses(config, (StatusFacet.TOKEN,))
+                    assert status_mock.call_count == 2
+                    base_controller.update_op_statuses(config, (StatusFacet.TOKEN,))
+                    assert status_mock.call_count == 3  # Statuses of some facets only are not cached
+
+            self.capsys.readouterr()
+
+    def test_status_watch_refreshes_changed_facets_within_budget(self):
+        config = dict(self.ss_config, security_server=[
+            dict(self.ss_config['security_server'][0], name='ssA', url='https://ssA:4000/api/v1'),
+            dict(self.ss_config['security_server'][0], name='ssB', url='https://ssB:4000/api/v1')
+        ])
+        servers = [copy.copy(StatusTestData.server_status_essentials_complete) for _ in range(2)]
+        servers[0].security_server_name, servers[1].security_server_name = 'ssA', 'ssB'
+        refreshed_facets = []
+
+        def refresh(api_config, security_server, server_status, facets):
+            refreshed_facets.append(facets)
+            if security_server['name'] == 'ssB':
+                time.sleep(0.3)  # Over the budget, completes during the next round
+            refreshed = copy.copy(server_status)
+            refreshed.token_status = copy.copy(server_status.token_status)
+            refreshed.token_status.logged_in = not server_status.token_status.logged_in
+            return refreshed
+
+        with XRDSSTTest() as app, \
+                mock.patch.object(StatusController, 'create_api_config', return_value=Configuration()), \
+                mock.patch.object(StatusController, 'refresh_server_status', side_effect=refresh), \
+                mock.patch.object(StatusController, 'get_server_status') as status_mock:
+            status_controller = StatusController()
+            status_controller.app = app
+            status_controller._watch(config, servers, 0.01, 0.2, rounds=2)
+
+            status_mock.assert_not_called()
+            assert all(facets == StatusController.WATCHED_FACETS for facets in refreshed_facets)
+            assert len(refreshed_facets) == 3  # 'ssB' refresh not restarted while previous one still in progress
+            assert servers[0].token_status.logged_in == StatusTestData.server_status_essentials_complete.token_status.logged_in
+            assert servers[1].token_status.logged_in != StatusTestData.server_status_essentials_complete.token_status.logged_in
+
+            out, err = self.capsys.readouterr()
+            assert out.count("Status refresh of 'ssB' exceeds 0.200 s budget, previous status retained.") == 1
+            assert out.count("Status changed for 1 of 2 security servers at ") == 1  # 'ssA' only
+            assert out.count("Status changed for 2 of 2 security servers at ") == 1  # 'ssA' toggled back, 'ssB' completed
+            assert [row[1].split('\n')[0] for row in app._last_rendered[0][1:]] == ['ssA', 'ssB']
+
+            with self.capsys.disabled():
+                sys.stdout.write(out)
+                sys.stderr.write(err)
+
+    def test_status_watch_rounds_scheduled_from_round_start(self):
+        clock = [100.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+
+        def refresh(api_config, security_server, server_status, facets):
+            clock[0] += 3.0  # Round takes 3 s of the 10 s interval
+            return server_status
+
+        servers = [copy.copy(StatusTestData.server_status_essentials_complete)]
+        with XRDSSTTest() as app, \
+                mock.patch.object(StatusController, 'create_api_config', return_value=Configuration()), \
+                mock.patch.object(StatusController, 'refresh_server_status', side_effect=refresh), \
+                mock.patch('xrdsst.controllers.status.time.monotonic', side_effect=lambda: clock[0]), \
+                mock.patch('xrdsst.controllers.status.time.sleep', side_effect=sleep):
+            status_controller = StatusController()
+            status_controller.app = app
+            status_controller._watch(dict(self.ss_config, security_server=self.ss_config['security_server'][:1]), servers, 10.0, 5.0, rounds=3)
+
+        assert sleeps == [10.0, 7.0, 7.0]
+        self.capsys.readouterr()
+
+    def test_status_watch_marks_unreachable_server(self):
+        servers = [copy.copy(StatusTestData.server_status_essentials_complete)]
+        connection_refused = urllib3.exceptions.MaxRetryError(None, '/api/v1/tokens', urllib3.exceptions.NewConnectionError(None, 'Connection refused'))
+
+        with XRDSSTTest() as app, \
+                mock.patch.object(StatusController, 'create_api_config', return_value=Configuration()), \
+                mock.patch.object(StatusController, 'refresh_server_status', side_effect=connection_refused), \
+                mock.patch.object(StatusController, 'get_server_status', return_value=StatusTestData.server_status_essentials_complete) as status_mock:
+            status_controller = StatusController()
+            status_controller.app = app
+            config = dict(self.ss_config, security_server=self.ss_config['security_server'][:1])
+            status_controller._watch(config, servers, 0.01, 1.0, rounds=1)
+
+            assert not servers[0].connectivity_status[0]
+            assert app._last_rendered[0][1][2] == 'NO ACCESS'
+            status_mock.assert_not_called()
+
+            status_controller._watch(config, servers, 0.01, 1.0, rounds=1)  # Connectivity tested again, complete status collected
+            status_mock.assert_called_once()
+            assert servers[0] is StatusTestData.server_status_essentials_complete
+
+        out, err = self.capsys.readouterr()
+        assert out.count("Status refresh of 'longServerName' failed, no connectivity (") == 1
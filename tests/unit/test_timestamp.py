@@ -108,7 +108,7 @@ class TestTimestamp(unittest.TestCase):
             timestamp_controller = TimestampController()
             timestamp_controller.app = app
             timestamp_controller.load_config = (lambda: self.ss_config)
-            timestamp_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+            timestamp_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
             timestamp_controller.init()
 
     def test_timestamp_service_init_nonresolving_url(self):
@@ -74,7 +74,7 @@ class TestTls(unittest.TestCase):
                 tls_controller.app = app
                 tls_controller.load_config = (lambda: self.ss_config)
 
-                # cert_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                # cert_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                 reported_downloads = tls_controller.download()
 
                 assert len(reported_downloads) == 2
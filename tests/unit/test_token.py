@@ -256,7 +256,7 @@ class TestToken(unittest.TestCase):
                 token_controller = TokenController()
                 token_controller.app = app
                 token_controller.load_config = (lambda: self.ss_config)
-                token_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                token_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                 token_controller.login()
 
                 out, err = self.capsys.readouterr()
@@ -273,7 +273,7 @@ class TestToken(unittest.TestCase):
             token_controller = TokenController()
             token_controller.app = app
             token_controller.load_config = (lambda: self.ss_config)
-            token_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+            token_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
             token_controller.login()
 
             out, err = self.capsys.readouterr()
@@ -301,7 +301,7 @@ class TestToken(unittest.TestCase):
                     token_controller = TokenController()
                     token_controller.app = app
                     token_controller.load_config = (lambda: self.ss_config)
-                    token_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    token_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     token_controller.init_keys()
 
                     out, err = self.capsys.readouterr()
@@ -326,7 +326,7 @@ class TestToken(unittest.TestCase):
                             token_controller = TokenController()
                             token_controller.app = app
                             token_controller.load_config = (lambda: self.ss_config)
-                            token_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete_token_logged_out())
+                            token_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete_token_logged_out())
                             token_controller.init_keys()
 
                             out, err = self.capsys.readouterr()
@@ -348,7 +348,7 @@ class TestToken(unittest.TestCase):
                     token_controller = TokenController()
                     token_controller.app = app
                     token_controller.load_config = (lambda: self.ss_config)
-                    token_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                    token_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
                     self.assertRaises(IndexError, lambda: token_controller.init_keys())
 
     def test_token_list_nonresolving_url(self):
@@ -371,7 +371,7 @@ class TestToken(unittest.TestCase):
                             token_controller = TokenController()
                             token_controller.app = app
                             token_controller.load_config = (lambda: self.ss_config)
-                            token_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                            token_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
 
                             configuration = token_controller.create_api_config(self.ss_config["security_server"][0], self.ss_config)
                             token_controller.remote_token_add_auth_key_with_csrs(configuration, self.ss_config["security_server"][0], "GOV", "7392", "UNS-SSX")
@@ -397,7 +397,7 @@ class TestToken(unittest.TestCase):
                             token_controller = TokenController()
                             token_controller.app = app
                             token_controller.load_config = (lambda: self.ss_config)
-                            token_controller.get_server_status = (lambda x, y: StatusTestData.server_status_essentials_complete)
+                            token_controller.get_server_status = (lambda x, y, facets=None: StatusTestData.server_status_essentials_complete)
 
                             configuration = token_controller.create_api_config(self.ss_config["security_server"][0], self.ss_config)
                             client = {'member_class': "GOV", 'member_code': "7392", "member_name": "UNS-SSX"}
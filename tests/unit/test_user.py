@@ -3,8 +3,9 @@ import unittest
 from pathlib import Path
 from unittest import mock
 
-from xrdsst.controllers.user import UserController
+from xrdsst.controllers.user import UserController, UserException
 from xrdsst.core.definitions import ROOT_DIR
+from xrdsst.core.ssh import StubSshTransport, set_ssh_transport
 from xrdsst.main import XRDSSTTest
 
 
@@ -77,4 +78,34 @@ class TestUser(unittest.TestCase):
             user_controller.load_config = (lambda: self._ss_config)
             response = user_controller.create_user(self._ss_config)
             assert response is None
-        self._ss_config["ssh_access"] = {'user': 'TOOLKIT_SSH_USER', 'private_key': 'TOOLKIT_SSH_PRIVATE_KEY'}
\ No newline at end of file
+        self._ss_config["ssh_access"] = {'user': 'TOOLKIT_SSH_USER', 'private_key': 'TOOLKIT_SSH_PRIVATE_KEY'}
+    def test_add_user_with_groups_over_shared_transport(self):
+        stub_transport = StubSshTransport()
+        set_ssh_transport(stub_transport)
+        try:
+            with XRDSSTTest() as app:
+                user_controller = UserController()
+                user_controller.app = app
+                groups = UserController._GROUP_NAMES
+                assert user_controller.add_user_with_groups(groups, 'xrd', 'secret', 'key', 'ssh_user', self._ss_config['security_server'][0])
+
+            assert len(stub_transport.commands) == 2 + len(groups)
+            assert all(map(lambda c: c[:2] == ('ssh_user', 'no.there.com'), stub_transport.commands))
+            assert stub_transport.commands[1][2].count('sudo passwd xrd') == 1
+            assert stub_transport.closed  # Closed with application
+        finally:
+            set_ssh_transport(None)
+
+    def test_add_user_with_groups_fails_on_password(self):
+        stub_transport = StubSshTransport(lambda ssh_user, address, command: (1, 'passwd failed') if 'passwd' in command else (0, ''))
+        set_ssh_transport(stub_transport)
+        try:
+            with XRDSSTTest() as app:
+                user_controller = UserController()
+                user_controller.app = app
+                with self.assertRaises(UserException):
+                    user_controller.add_user_with_groups(['xroad-security-officer'], 'xrd', 'secret', 'key', 'ssh_user', self._ss_config['security_server'][0])
+
+            assert len(stub_transport.commands) == 2
+        finally:
+            set_ssh_transport(None)
@@ -1,9 +1,13 @@
 import os
 
+import pytest
+
+from tests.util.test_util import StatusTestData
+
 from xrdsst.controllers.base import BaseController
 from xrdsst.core.excplanation import http_status_code_to_text
 from xrdsst.core.util import default_sign_key_label, default_auth_key_label, get_admin_credentials, get_ssh_user, get_ssh_key
-from xrdsst.main import opdep_init
+from xrdsst.main import opdep_init, OPS
 
 
 def test_opdep_init_adds_app_opdep():
@@ -17,6 +21,23 @@ def test_opdep_init_adds_app_opdep():
     assert mock_app.OP_GRAPH.number_of_nodes() == len(mock_app.OP_DEPENDENCY_LIST)
 
 
+def test_opdep_init_server_statuses_per_app():
+    class FirstApp:
+        pass
+
+    class SecondApp:
+        pass
+
+    opdep_init(FirstApp)
+    opdep_init(SecondApp)
+    FirstApp.OP_SERVER_STATUSES['ssX'] = {'api_config': None, 'status': StatusTestData.server_status_essentials_complete}
+
+    assert SecondApp.OP_SERVER_STATUSES == {}
+    assert FirstApp.OP_GRAPH.nodes[OPS.TOKEN_LOGIN]['is_done']('ssX')
+    with pytest.raises(KeyError):
+        SecondApp.OP_GRAPH.nodes[OPS.TOKEN_LOGIN]['is_done']('ssX')
+
+
 def test_admin_credentials_from_root_level_when_empty_at_security_server_section():
     os.environ['TOOLKIT_ADMIN_CREDENTIALS'] = 'admin:pass'
     config = {
@@ -20,10 +20,11 @@ import tempfile
 
 # python 2 and python 3 compatibility library
 import six
+import urllib3
 from six.moves.urllib.parse import quote
 
 from xrdsst import models
-from xrdsst.api_client.extensions import limit_rate, extended_api_ex
+from xrdsst.api_client.extensions import limit_rate, adapt_rate, extended_api_ex, shared_rest_client, notify_state_change
 from xrdsst.configuration.configuration import Configuration
 from xrdsst.rest import rest
 from xrdsst.rest.rest import ApiException
@@ -67,8 +68,8 @@ class ApiClient(object):
             configuration = Configuration()
         self.configuration = configuration
 
-        self.pool = ThreadPool()
-        self.rest_client = rest.RESTClientObject(configuration)
+        self._pool = None
+        self.rest_client = shared_rest_client(configuration)
         self.default_headers = {}
         if header_name is not None:
             self.default_headers[header_name] = header_value
@@ -77,8 +78,20 @@ class ApiClient(object):
         self.user_agent = 'Swagger-Codegen/1.0.0/python'
 
     def __del__(self):
-        self.pool.close()
-        self.pool.join()
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+
+    @property
+    def pool(self):
+        """Thread pool for asynchronous requests, created on first use only.
+
+        Blocking calls (the only kind toolkit controllers make) never need it,
+        so creating cpu_count worker threads for every client is avoided.
+        """
+        if self._pool is None:
+            self._pool = ThreadPool()
+        return self._pool
 
     @property
     def user_agent(self):
@@ -99,14 +112,18 @@ class ApiClient(object):
             _return_http_data_only=None, collection_formats=None,
             _preload_content=True, _request_timeout=None):
 
-        limit_rate('/'.join(self.configuration.host.split('/')[:3]))
+        schemed_host = '/'.join(self.configuration.host.split('/')[:3])
+        limit_rate(schemed_host)
 
         try:
-            return self.__ratelimited_call_api(
+            result = self.__ratelimited_call_api(
                 resource_path, method, path_params, query_params, header_params, body, post_params, files, response_type,
                 auth_settings, _return_http_data_only, collection_formats, _preload_content, _request_timeout
             )
+            adapt_rate(schemed_host)
+            return result
         except ApiException as aex:
+            adapt_rate(schemed_host, aex)
             raise extended_api_ex(
                 aex, self, resource_path, method, path_params,
                 query_params, header_params, body, post_params,
@@ -114,6 +131,11 @@ class ApiClient(object):
                 _return_http_data_only, collection_formats,
                 _preload_content, _request_timeout
             )
+        except (urllib3.exceptions.HTTPError, ConnectionError) as err:
+            adapt_rate(schemed_host, err)
+            raise
+        finally:
+            notify_state_change(schemed_host, method)
 
     def __ratelimited_call_api(
             self, resource_path, method, path_params=None,
@@ -1,51 +1,306 @@
 # Extra provisions for generated API client. Currently include:
-#  * call rate limiter
+#  * call rate limiter, fixed or adapting to server load
+#  * shared REST client (connection pool) registry
+#  * state change listeners
 #  * exception extender
 
-import datetime
-import inspect
+import functools
 import logging
+import sys
 import threading
 import time
 
+import urllib3
+
+from xrdsst.rest.rest import ApiException, RESTClientObject
+
 _SS_RATE_LIMIT_SECOND = 20
 _SS_RATE_LIMIT_MINUTE = 600
-_SS_API_CLIENT_CALLS = {}  # host : { 'calls' : List(datetime), 'lock' : Lock }
+_SS_RATE_LIMIT_ADAPTIVE_MIN = 1
+_SS_RATE_LIMIT_ADAPTIVE_MAX = 100
+_SS_OVERLOAD_STATUSES = (429, 503)
+_SS_RATE_LIMITERS = {}  # host : RateLimiter
 _RATELIMITER_LOCK = threading.Lock()
+_SS_REST_CLIENTS = {}  # (host, credentials, TLS settings) : RESTClientObject
+_SS_REST_CLIENTS_STATS = {'created': 0, 'reused': 0}
+_REST_CLIENTS_LOCK = threading.Lock()
+_SS_READ_ONLY_METHODS = ('GET', 'HEAD', 'OPTIONS')
+_SS_STATE_CHANGE_LISTENERS = {}  # key : callable(schemed_host)
+_STATE_CHANGE_LISTENERS_LOCK = threading.Lock()
+
+
+# Token bucket holding up to /capacity/ call tokens, refilled at the rate of /capacity/ tokens per /period/ seconds.
+# Tokens taken from empty bucket are borrowed from future refills, the debt gives the exact time to wait.
+class _TokenBucket:
+    def __init__(self, capacity, period, now):
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Takes one token at /now/, returns seconds to wait until the token is actually available.
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    # Changes capacity (and refill rate) keeping the tokens already accumulated, up to the new capacity.
+    def resize(self, capacity, now):
+        self._refill(now)
+        self.capacity = capacity
+        self.rate = capacity / self.period
+        self.tokens = min(self.tokens, capacity)
+
+
+# Per host call rate limiter, keeping calls within both per second and per minute limits. Also counts the calls
+# delayed and the total delay.
+#
+# In adaptive mode the per second limit is additively increased with successful calls, by one call per second for
+# every second worth of successful calls, up to /max_per_second/, and halved (down to _SS_RATE_LIMIT_ADAPTIVE_MIN) when
+# the server signals overload -- by responding with 429 / 503 or resetting the connection. The per minute limit follows
+# the adapted per second limit, keeping the configured ratio between the two.
+class RateLimiter:
+    def __init__(self, per_second=_SS_RATE_LIMIT_SECOND, per_minute=_SS_RATE_LIMIT_MINUTE):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.throttled = 0
+        self.throttle_time = 0.0
+        self.backoffs = 0
+        self.set_limits(per_second, per_minute)
+
+    # Sets the limits, None or 0 for no limit. Adaptive limiting starts from /per_second/ (or the default, if unlimited).
+    def set_limits(self, per_second, per_minute, adaptive=False, max_per_second=_SS_RATE_LIMIT_ADAPTIVE_MAX):
+        with self._lock:
+            now = time.monotonic()
+            self.limits = (per_second, per_minute, adaptive, max_per_second)
+            self.adaptive = adaptive
+            self.max_per_second = max_per_second
+            self.per_second = (per_second or _SS_RATE_LIMIT_SECOND) if adaptive else per_second
+            self.per_minute = per_minute
+            self._minute_ratio = per_minute / self.per_second if adaptive and per_minute else None
+            self._last_backoff = None
+            self._second_bucket = _TokenBucket(self.per_second, 1.0, now) if self.per_second else None
+            self._minute_bucket = _TokenBucket(per_minute, 60.0, now) if per_minute else None
+
+    # Reserves the next call slot, returns the seconds waited for it.
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = max([bucket.take(now) for bucket in (self._second_bucket, self._minute_bucket) if bucket], default=0.0)
+            self.calls += 1
+            if wait > 0:
+                self.throttled += 1
+                self.throttle_time += wait
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    # Additive increase of adaptive per second limit after successful call.
+    def succeeded(self):
+        if not self.adaptive:
+            return
+        with self._lock:
+            if self.per_second < self.max_per_second:
+                self._set_per_second(min(self.max_per_second, self.per_second + 1 / self.per_second))
+
+    # Multiplicative decrease of adaptive per second limit after server signalled overload. Overload signals of the calls
+    # already under way when limit was decreased are ignored, at most one decrease per second.
+    def overloaded(self):
+        if not self.adaptive:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            if self._last_backoff is not None and now - self._last_backoff < 1.0:
+                return None
+            self._last_backoff = now
+            self.backoffs += 1
+            self._set_per_second(max(_SS_RATE_LIMIT_ADAPTIVE_MIN, self.per_second / 2))
+            return self.per_second
+
+    def _set_per_second(self, per_second):
+        now = time.monotonic()
+        self.per_second = per_second
+        self._second_bucket.resize(per_second, now)
+        if self._minute_ratio:
+            self.per_minute = per_second * self._minute_ratio
+            self._minute_bucket.resize(self.per_minute, now)
+
+
+# Returns rate limiter of schemed_host, created with default limits on first use.
+def _rate_limiter(schemed_host):
+    with _RATELIMITER_LOCK:
+        limiter = _SS_RATE_LIMITERS.get(schemed_host)
+        if not limiter:
+            limiter = _SS_RATE_LIMITERS[schemed_host] = RateLimiter()
+        return limiter
+
 
 # Delays call to schemed_host if rate limit has been reached.
 def limit_rate(schemed_host):
-    def _excess_rates(schemed_host):
-        calls = _SS_API_CLIENT_CALLS[schemed_host]['calls']
+    sleep_time = _rate_limiter(schemed_host).acquire()
+    if sleep_time > 0:
+        logging.debug("Rate limit nap of " + "{:.3f}".format(sleep_time) + " seconds for '" + schemed_host + "'.")
+
+
+# Sets rate limits for calls to schemed_host, None or 0 for no limit. Already applied limits are kept as they are,
+# including the per second limit adapted so far.
+def set_rate_limit(schemed_host, per_second=_SS_RATE_LIMIT_SECOND, per_minute=_SS_RATE_LIMIT_MINUTE,
+                   adaptive=False, max_per_second=_SS_RATE_LIMIT_ADAPTIVE_MAX):
+    limiter = _rate_limiter(schemed_host)
+    if limiter.limits != (per_second, per_minute, adaptive, max_per_second):
+        limiter.set_limits(per_second, per_minute, adaptive, max_per_second)
 
-        atm = datetime.datetime.now()
-        min_calls = list(filter(lambda dt: (atm - dt) < datetime.timedelta(seconds=60), calls))
-        sec_calls = list(filter(lambda dt: (atm - dt) < datetime.timedelta(seconds=1), calls))
 
-        calls.clear()
-        calls.extend(min_calls)
+# Returns whether /error/ from the call is the server signalling overload: 429 / 503 response or connection reset.
+def _is_overload(error):
+    if isinstance(error, ApiException):
+        return error.status in _SS_OVERLOAD_STATUSES
+    if isinstance(error, urllib3.exceptions.MaxRetryError):
+        error = error.reason
+    return isinstance(error, (ConnectionResetError, urllib3.exceptions.ProtocolError))
 
-        limit_sec_exceeded = len(sec_calls) >= _SS_RATE_LIMIT_SECOND
-        limit_min_exceeded = len(min_calls) >= _SS_RATE_LIMIT_MINUTE
 
-        return limit_sec_exceeded, limit_min_exceeded
+# Feeds outcome of the call to schemed_host back to its rate limiter, /error/ being None for successful call.
+def adapt_rate(schemed_host, error=None):
+    limiter = _rate_limiter(schemed_host)
+    if error is None:
+        limiter.succeeded()
+    elif _is_overload(error):
+        per_second = limiter.overloaded()
+        if per_second:
+            logging.debug("Rate limit for '" + schemed_host + "' reduced to " + "{:.2f}".format(per_second) + " calls per second.")
 
+
+# Drops rate limiters with their limits and statistics.
+def reset_rate_limits():
     with _RATELIMITER_LOCK:
-        if not _SS_API_CLIENT_CALLS.get(schemed_host):
-            _SS_API_CLIENT_CALLS[schemed_host] = {}
-            _SS_API_CLIENT_CALLS[schemed_host]['lock'] = threading.Lock()
-            _SS_API_CLIENT_CALLS[schemed_host]['calls'] = []
+        _SS_RATE_LIMITERS.clear()
+
+
+# Returns counts of rate limited calls, of these delayed by rate limits, total delay in seconds and count of adaptive
+# limit decreases.
+def rate_limit_stats():
+    with _RATELIMITER_LOCK:
+        limiters = list(_SS_RATE_LIMITERS.values())
+    return {
+        'calls': sum(limiter.calls for limiter in limiters),
+        'throttled': sum(limiter.throttled for limiter in limiters),
+        'throttle_time': sum(limiter.throttle_time for limiter in limiters),
+        'backoffs': sum(limiter.backoffs for limiter in limiters)
+    }
+
+
+# Registers /listener/ under /key/ (replacing earlier listener with the same key) to be called with schemed host
+# of security server whenever API call with state changing /method/ has been made to that security server.
+def add_state_change_listener(key, listener):
+    with _STATE_CHANGE_LISTENERS_LOCK:
+        _SS_STATE_CHANGE_LISTENERS[key] = listener
+
+
+def remove_state_change_listener(key):
+    with _STATE_CHANGE_LISTENERS_LOCK:
+        _SS_STATE_CHANGE_LISTENERS.pop(key, None)
+
+
+# Notifies state change listeners of API call to /schemed_host/, if the call /method/ can change security server state.
+# Failed calls are notified too, these may still have changed something.
+def notify_state_change(schemed_host, method):
+    if method.upper() in _SS_READ_ONLY_METHODS:
+        return
+    with _STATE_CHANGE_LISTENERS_LOCK:
+        listeners = list(_SS_STATE_CHANGE_LISTENERS.values())
+    for listener in listeners:
+        listener(schemed_host)
+
+
+# Returns key identifying API client configurations that can safely share single connection pool.
+def _rest_client_key(configuration):
+    return (
+        configuration.host,
+        tuple(sorted(configuration.api_key.items())),
+        configuration.username,
+        configuration.password,
+        configuration.verify_ssl,
+        configuration.ssl_ca_cert,
+        configuration.cert_file,
+        configuration.key_file,
+        configuration.assert_hostname,
+        configuration.proxy
+    )
+
+
+# Returns REST client (with its keep-alive connection pool) shared by all API clients having equivalent configuration,
+# so that repeated ApiClient instantiation for the same security server does not redo the TCP and TLS handshakes.
+def shared_rest_client(configuration):
+    key = _rest_client_key(configuration)
+    with _REST_CLIENTS_LOCK:
+        rest_client = _SS_REST_CLIENTS.get(key)
+        if rest_client:
+            _SS_REST_CLIENTS_STATS['reused'] += 1
+            return rest_client
+
+        rest_client = RESTClientObject(configuration)
+        _SS_REST_CLIENTS[key] = rest_client
+        _SS_REST_CLIENTS_STATS['created'] += 1
+        return rest_client
+
+
+# Drops shared REST clients, closing their pooled connections. Limited to /host/ if given.
+def reset_shared_rest_clients(host=None):
+    with _REST_CLIENTS_LOCK:
+        for key in [k for k in _SS_REST_CLIENTS if host is None or k[0] == host]:
+            _SS_REST_CLIENTS.pop(key).pool_manager.clear()
+        if host is None:
+            _SS_REST_CLIENTS_STATS['created'] = 0
+            _SS_REST_CLIENTS_STATS['reused'] = 0
+
+
+# Returns counters for shared REST client usage, 'handshakes_saved' being the count of requests that went over
+# already established connection instead of opening a new one.
+def shared_rest_client_stats():
+    connections = 0
+    requests = 0
+    with _REST_CLIENTS_LOCK:
+        for rest_client in _SS_REST_CLIENTS.values():
+            pools = rest_client.pool_manager.pools
+            for pool_key in pools.keys():
+                pool = pools.get(pool_key)
+                if pool:
+                    connections += pool.num_connections
+                    requests += pool.num_requests
+
+        return {
+            'clients': _SS_REST_CLIENTS_STATS['created'],
+            'reused': _SS_REST_CLIENTS_STATS['reused'],
+            'connections': connections,
+            'requests': requests,
+            'handshakes_saved': max(0, requests - connections)
+        }
+
+
+def log_shared_rest_client_stats():
+    stats = shared_rest_client_stats()
+    if stats['requests'] > 0:
+        logging.debug(
+            "Shared REST clients: " + str(stats['clients']) + " created, " + str(stats['reused']) + " reuses, " +
+            str(stats['requests']) + " requests over " + str(stats['connections']) + " connections (" +
+            str(stats['handshakes_saved']) + " handshakes saved)."
+        )
+
 
-    with _SS_API_CLIENT_CALLS[schemed_host]['lock']:
-        sleep_time = 0
-        if any(_excess_rates(schemed_host)):
-            time.sleep(1)
-            sleep_time += 1
+@functools.lru_cache(maxsize=None)
+def _is_controller_module(filename):
+    return filename.split('/')[-3:-1] == ['xrdsst', 'controllers']
 
-        if sleep_time > 0:
-            logging.debug("Rate limit nap of " + str(sleep_time) + " seconds for '" + schemed_host + "'.")
 
-        _SS_API_CLIENT_CALLS[schemed_host]['calls'].append(datetime.datetime.now())
+def _code_location(code):
+    return code.co_filename.split('/')[-1] + "#" + code.co_name
 
 
 # Extends the traceless ApiException with information available at API call site.
@@ -65,16 +320,15 @@ def extended_api_ex(
         'header_params': header_params
     }
 
-    # IFF call is made from controller, add the controller -> API call schematic.
-    l_cs = inspect.stack()
-    len_l_cs = len(l_cs)
-    si = 0
-    is_controller_module = (lambda x: x.filename.split('/')[-3:-1] == ['xrdsst', 'controllers'])
-    while si < len_l_cs and not is_controller_module(l_cs[si]):
-        si += 1
-
-    if is_controller_module(l_cs[si]):
-        api_ex.api_call['controller_func'] = str(l_cs[si].filename.split('/')[-1]) + "#" + str(l_cs[si].function)
-        api_ex.api_call['module_func'] = str(l_cs[si - 1].filename.split('/')[-1]) + "#" + str(l_cs[si - 1].function)
+    # IFF call is made from controller, add the controller -> API call schematic. Walks the bare frames, as
+    # inspect.stack() would also read the source context of every frame, costly for runs with lots of API errors.
+    callee = frame = sys._getframe()
+    while frame:
+        if _is_controller_module(frame.f_code.co_filename):
+            api_ex.api_call['controller_func'] = _code_location(frame.f_code)
+            api_ex.api_call['module_func'] = _code_location(callee.f_code)
+            break
+        callee = frame
+        frame = frame.f_back
 
     return api_ex
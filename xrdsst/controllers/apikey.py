@@ -0,0 +1,31 @@
+from cement import ex
+from xrdsst.controllers.base import BaseController
+from xrdsst.core.api_key_cache import ApiKeyCache
+from xrdsst.core.util import revoke_cached_api_keys
+from xrdsst.resources.texts import texts
+
+
+class ApiKeyController(BaseController):
+    class Meta:
+        label = 'apikey'
+        stacked_on = 'base'
+        stacked_type = 'nested'
+        description = texts['apikey.controller.description']
+
+    @ex(label='revoke-all', help="Revoke all API keys in API key cache", arguments=[])
+    def revoke_all(self):
+        active_config = self.load_config()
+        self.revoke_all_cached(active_config)
+
+    # Revokes all API keys in configured API key cache, returns names of security servers with revoked keys.
+    def revoke_all_cached(self, config):
+        api_key_cache = ApiKeyCache.from_config(config)
+        if not api_key_cache:
+            self.log_info(texts['message.api_key_cache.disabled'])
+            return []
+
+        revoked = revoke_cached_api_keys(api_key_cache, config, api_key_cache.entries())
+        for ssn in revoked:
+            self.app.api_keys.pop(ssn, None)
+            BaseController.invalidate_api_config(self.app, ssn)
+        return revoked
@@ -1,10 +1,16 @@
 import copy
+import logging
+import time
+from datetime import datetime
 
 from cement import ex
 from xrdsst.controllers.base import BaseController
+from xrdsst.controllers.plan import PlanController
 from xrdsst.controllers.status import StatusController
+from xrdsst.core.api_util import StatusFacet
 from xrdsst.core.conf_keys import ConfKeysRoot, ConfKeysSecurityServer
-from xrdsst.core.util import op_node_to_ctr_cmd_text
+from xrdsst.core.parallel import single_server_config, write_unbuffered
+from xrdsst.core.util import op_node_to_ctr_cmd_text, reset_connectivity, is_ss_connectable
 from xrdsst.resources.texts import texts
 
 
@@ -26,18 +32,46 @@ class AutoController(BaseController):
         stacked_on = 'base'
         stacked_type = 'nested'
         description = texts['auto.controller.description']
+        arguments = [
+            (['--plan'], {'help': texts['auto.parameter.plan.description'], 'action': 'store_true', 'dest': 'plan'}),
+            (['--wait'], {'help': texts['auto.parameter.wait.description'], 'metavar': 'SECONDS', 'nargs': '?', 'type': float,
+                          'const': 3600.0, 'dest': 'wait'})
+        ]
+
+    # Polling interval bounds (seconds) while waiting for operation completion, when server reports no upcoming
+    # global configuration refresh; and the extra time allowed for the refresh to get applied.
+    WAIT_POLL_MIN = 5.0
+    WAIT_POLL_MAX = 60.0
+    WAIT_REFRESH_MARGIN = 5.0
 
     @ex(help='autoconfig', hide=True)
     def _default(self):
         active_config = self.load_config()
         self._auto(active_config)
 
+    # Returns true if only the changes planned against current security server state are to be performed.
+    def is_plan_mode(self):
+        return bool(getattr(self.app.pargs, 'plan', False)) if self.app.pargs else False
+
+    # Returns the longest time in seconds to wait for completion of operation requiring global configuration renewal,
+    # None if no waiting is to be done.
+    def wait_timeout(self):
+        timeout = getattr(self.app.pargs, 'wait', None) if self.app.pargs else None
+        return timeout if timeout and timeout > 0 else None
+
     def _auto(self, active_config):
         all_server_config = copy.deepcopy(active_config)
-        for i in range(0, len(all_server_config[ConfKeysRoot.CONF_KEY_ROOT_SERVER])):
-            single_server_config = all_server_config[ConfKeysRoot.CONF_KEY_ROOT_SERVER][i:(i+1)]
-            active_config[ConfKeysRoot.CONF_KEY_ROOT_SERVER] = single_server_config
-            self._single_server_auto(active_config)
+        parallelism = self.parallelism(all_server_config)
+        explicit_parallelism = getattr(self.app.pargs, 'parallel', None) if self.app.pargs else None
+        if self.wait_timeout() and not explicit_parallelism:  # Servers waiting for global conf renewal must not hold up the others.
+            parallelism = max(parallelism, len(all_server_config[ConfKeysRoot.CONF_KEY_ROOT_SERVER]))
+        if parallelism > 1 and len(all_server_config[ConfKeysRoot.CONF_KEY_ROOT_SERVER]) > 1:
+            # Every server walks the dependency chain on its own, only per-server statuses are updated meanwhile.
+            self.app.auto_apply = True
+            self.run_concurrently(all_server_config, self._single_server_auto, parallelism)
+        else:
+            for i in range(0, len(all_server_config[ConfKeysRoot.CONF_KEY_ROOT_SERVER])):
+                self._single_server_auto(single_server_config(all_server_config, i))
         status_controller = StatusController()
         status_controller.app = self.app
         status_controller.load_config = (lambda: all_server_config)
@@ -49,12 +83,12 @@ class AutoController(BaseController):
 
         self.update_op_statuses(active_config)
 
-        ss_api_config = self.app.OP_GRAPH.nodes[self.app.OP_DEPENDENCY_LIST[0]]['servers'][ssn]['api_config']
+        ss_api_config = self.app.OP_SERVER_STATUSES[ssn]['api_config']
         if not ss_api_config:
             self.log_info("SKIPPED AUTO ->'" + ssn + "'. " + texts['message.server.keyless'].format(ssn))
             return
 
-        first_status = self.app.OP_GRAPH.nodes[self.app.OP_DEPENDENCY_LIST[0]]['servers'][ssn]['status']
+        first_status = self.app.OP_SERVER_STATUSES[ssn]['status']
         if not first_status.connectivity_status[0]:
             self.log_info("SKIPPED AUTO ->'" + ssn + "' no connectivity, (" + first_status.connectivity_status[1] + ").")
             return
@@ -64,6 +98,8 @@ class AutoController(BaseController):
         self.log_info("AUTO ['status']->'" + ssn + "' AT THE END OF AUTOCONFIGURATION.")
 
     def _iterate_dependency_nodes(self, ssn, active_config):
+        server_plan = None
+        planned_operations = PlanController.planned_operations() if self.is_plan_mode() else []
         for dep_op in self.app.OP_DEPENDENCY_LIST:
             op_node = self.app.OP_GRAPH.nodes[dep_op]
             if not op_node['controller'] in self.app.Meta.handlers:
@@ -72,17 +108,34 @@ class AutoController(BaseController):
                 # Prep
                 op_text = op_node_to_ctr_cmd_text(self.app.OP_GRAPH, dep_op)
                 done_at_start = op_node['is_done'](ssn)
+                op_config = active_config
+                if op_node['operation'] in planned_operations:
+                    # Plan is made once, when the first planned operation is reached, and covers all the later ones too.
+                    if server_plan is None:
+                        server_plan = PlanController.plan_server(self.app.OP_SERVER_STATUSES[ssn]['api_config'],
+                                                                 active_config[ConfKeysRoot.CONF_KEY_ROOT_SERVER][0])
+                        if server_plan is None:
+                            self.log_info("AUTO ->'" + ssn + "' could not be planned, performing all operations.")
+                            planned_operations = []
+                    if server_plan is not None:
+                        if op_node['operation'] not in server_plan.operations():
+                            self.log_info("AUTO ['" + op_text + "']->'" + ssn + "' SKIPPED, no changes planned.")
+                            continue
+                        op_config = server_plan.op_config(active_config, op_node['operation'])
+
                 self.log_info("AUTO ['" + op_text + "']->'" + ssn + "'" + (" (redo) " if done_at_start else ''))
 
                 # Exec
                 ctr = op_node['controller']()
                 ctr.app = self.app
-                ctr.load_config = (lambda: active_config)
+                ctr.load_config = (lambda: op_config)
                 op_node['operation'](ctr)
 
-                # Eval outcome
-                self.update_op_statuses(active_config)
+                # Eval outcome, refreshing only the status facets that operation completion depends on
+                self.refresh_op_statuses(active_config, op_node['status_facets'])
                 done_at_end = op_node['is_done'](ssn)
+                if not done_at_end and op_node.get('waits_for_global_conf') and self.wait_timeout():
+                    done_at_end = self.wait_for_completion(ssn, active_config, op_text, op_node, self.wait_timeout())
 
                 if not done_at_end:
                     self.log_info(
@@ -93,3 +146,52 @@ class AutoController(BaseController):
                     if next_op:
                         self.log_info("Next AUTO operation would have been ['" + op_node_to_ctr_cmd_text(self.app.OP_GRAPH, next_op[0]) + "'].")
                     break
+
+    # Parks security server /ssn/ until operation of /op_node/ gets completed, for at most /timeout/ seconds. Sleeps
+    # until the global configuration refresh reported by the server, or with polling backoff if none is upcoming, then
+    # tests connectivity anew and refreshes the operation status facets along with global configuration status.
+    # Returns whether completion detected.
+    def wait_for_completion(self, ssn, active_config, op_text, op_node, timeout):
+        deadline = time.monotonic() + timeout
+        poll_delay = self.WAIT_POLL_MIN
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.log_progress("AUTO ['" + op_text + "']->'" + ssn + "' completion NOT detected in {:.0f} s of waiting.".format(timeout))
+                return False
+
+            until_refresh = self.until_global_conf_refresh(ssn)
+            if until_refresh > 0:
+                delay = until_refresh + self.WAIT_REFRESH_MARGIN
+            else:
+                delay = poll_delay
+                poll_delay = min(2 * poll_delay, self.WAIT_POLL_MAX)
+            delay = min(delay, remaining)
+
+            self.log_progress("AUTO ['" + op_text + "']->'" + ssn + "' waiting {:.0f} s for global configuration renewal.".format(delay))
+            time.sleep(delay)
+            ss_url = active_config[ConfKeysRoot.CONF_KEY_ROOT_SERVER][0][ConfKeysSecurityServer.CONF_KEY_URL]
+            reset_connectivity([ss_url])
+            connectivity = is_ss_connectable(ss_url)
+            if not connectivity[0]:
+                self.log_progress("AUTO ['" + op_text + "']->'" + ssn + "' no connectivity (" + str(connectivity[1]) + "), waiting further.")
+                continue
+            self.refresh_op_statuses(active_config, tuple(op_node['status_facets']) + (StatusFacet.GLOBAL,))
+            if op_node['is_done'](ssn):
+                self.log_progress("AUTO ['" + op_text + "']->'" + ssn + "' completion detected, resuming.")
+                return True
+
+    # Logs progress of waiting, written to console at once also when output of concurrently configured servers is
+    # otherwise buffered until the server is done.
+    @staticmethod
+    def log_progress(message):
+        logging.info(message)
+        write_unbuffered(message + '\n')
+
+    # Returns seconds until next global configuration refresh reported by security server /ssn/, 0 if not known or due.
+    def until_global_conf_refresh(self, ssn):
+        global_status = self.app.OP_SERVER_STATUSES[ssn]['status'].global_status
+        refresh = global_status.refresh if global_status else None
+        if not isinstance(refresh, datetime):
+            return 0
+        return max(0.0, (refresh - datetime.now(refresh.tzinfo)).total_seconds())
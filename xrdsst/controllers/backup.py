@@ -1,9 +1,14 @@
+import hashlib
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+import urllib3
 from cement import ex
 from xrdsst.api import BackupsApi
 from xrdsst.api_client.api_client import ApiClient
 from xrdsst.controllers.base import BaseController
+from xrdsst.core.conf_keys import ConfKeysRoot
 from xrdsst.core.util import parse_argument_list
 from xrdsst.resources.texts import texts
 from xrdsst.rest.rest import ApiException
@@ -27,6 +32,31 @@ class BackupListMapper:
         }
 
 
+# Result of downloading single backup file.
+class BackupDownload:
+    file_name: str = None
+    path: str = None
+    size: int = 0
+    resumed_from: int = 0
+    duration: float = 0.0
+    sha256: str = None
+    error: Exception = None
+
+    def __init__(self, file_name: str = None, path: str = None, size: int = 0, resumed_from: int = 0, duration: float = 0.0,
+                 sha256: str = None, error: Exception = None):
+        self.file_name = file_name
+        self.path = path
+        self.size = size
+        self.resumed_from = resumed_from
+        self.duration = duration
+        self.sha256 = sha256
+        self.error = error
+
+    # Returns download throughput in MB/s, resumed part of the file not included.
+    def throughput(self):
+        return (self.size - self.resumed_from) / (1024 * 1024) / self.duration if self.duration > 0 else 0.0
+
+
 class BackupController(BaseController):
     class Meta:
         label = 'backup'
@@ -35,6 +65,10 @@ class BackupController(BaseController):
         description = texts['backup.controller.description']
 
     FOR_SECURITY_SERVER = 'for security server'
+    DEFAULT_DOWNLOAD_DIR = '/tmp/'
+    DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+    PARTIAL_DOWNLOAD_SUFFIX = '.part'
+    DEFAULT_DOWNLOAD_PARALLELISM = 4
 
     @ex(help="List backups", arguments=[(['--ss'], {'help': 'Security server name', 'dest': 'ss'})])
     def list(self):
@@ -63,7 +97,8 @@ class BackupController(BaseController):
         self.add_server_backup(active_config, self.app.pargs.ss)
 
     @ex(help="Download backups", arguments=[(['--ss'], {'help': 'Security server name', 'dest': 'ss'}),
-                                            (['--file'], {'help': 'Backup file name', 'dest': 'file'})])
+                                            (['--file'], {'help': 'Backup file name', 'dest': 'file'}),
+                                            (['--output'], {'help': 'Directory to download backups to', 'dest': 'output'})])
     def download(self):
         active_config = self.load_config()
 
@@ -78,7 +113,9 @@ class BackupController(BaseController):
 
         file_names = parse_argument_list(self.app.pargs.file)
 
-        self.download_backup(active_config, self.app.pargs.ss, file_names)
+        output_dir = getattr(self.app.pargs, 'output', None) or BackupController.DEFAULT_DOWNLOAD_DIR
+
+        self.download_backup(active_config, self.app.pargs.ss, file_names, output_dir)
 
     @ex(help="Delete backups", arguments=[(['--ss'], {'help': 'Security server name', 'dest': 'ss'}),
                                           (['--file'], {'help': 'Backup file name', 'dest': 'file'})])
@@ -134,16 +171,26 @@ class BackupController(BaseController):
 
         BaseController.log_keyless_servers(ss_api_conf_tuple)
 
-    def download_backup(self, config, ss_name, file_names):
+    def download_backup(self, config, ss_name, file_names, output_dir=DEFAULT_DOWNLOAD_DIR):
         ss_api_conf_tuple = list(zip(config["security_server"], map(lambda ss: self.create_api_config(ss, config), config["security_server"])))
 
         for security_server in config["security_server"]:
             if security_server["name"] == ss_name:
                 ss_api_config = self.create_api_config(security_server, config)
-                self.remote_download_backup(ss_api_config, ss_name, file_names)
+                self.remote_download_backup(ss_api_config, ss_name, file_names, output_dir, self.download_parallelism(config))
 
         BaseController.log_keyless_servers(ss_api_conf_tuple)
 
+    # Returns number of backup files to download concurrently, DEFAULT_DOWNLOAD_PARALLELISM if not configured, 1 if invalid.
+    def download_parallelism(self, config):
+        parallel = config.get(ConfKeysRoot.CONF_KEY_ROOT_DOWNLOAD_PARALLELISM, BackupController.DEFAULT_DOWNLOAD_PARALLELISM) if config \
+            else BackupController.DEFAULT_DOWNLOAD_PARALLELISM
+        try:
+            return max(1, int(parallel))
+        except (TypeError, ValueError):
+            self.log_info(texts['message.parallelism.invalid'].format(parallel))
+            return 1
+
     def delete_backup(self, config, ss_name, file_names):
         ss_api_conf_tuple = list(zip(config["security_server"], map(lambda ss: self.create_api_config(ss, config), config["security_server"])))
 
@@ -195,24 +242,111 @@ class BackupController(BaseController):
         except ApiException as err:
             BaseController.log_api_error('BackupsApi->get_backups', err)
 
+    # Downloads backup files with /file_names/ to /output_dir/, at most /parallelism/ of them concurrently, returns the
+    # paths of downloaded files. Outcomes are logged in the order of /file_names/.
     @staticmethod
-    def remote_download_backup(ss_api_config, ss_name, file_names):
-        backups_api = BackupsApi(ApiClient(ss_api_config))
-        try:
-            response_list = []
-            for file_name in file_names:
-                response = backups_api.download_backup(filename=file_name, _preload_content=False)
-                if response is not None:
-                    with open(os.path.join('/tmp/', file_name), "wb") as file:
-                        file.write(response.data)
-                        response_list.append(file.name)
-                        BaseController.log_info("Downloaded backup '" + file_name + "' " + BackupController.FOR_SECURITY_SERVER + "' " + ss_name
-                                                + "' to '" + os.path.join('/tmp/', file_name) + "'")
+    def remote_download_backup(ss_api_config, ss_name, file_names, output_dir=DEFAULT_DOWNLOAD_DIR, parallelism=1):
+        os.makedirs(output_dir, exist_ok=True)
+
+        # Failure of single download must not lose the outcomes of others, all are captured for logging.
+        def _download(file_name):
+            try:
+                return BackupController.remote_stream_backup(ss_api_config, file_name, output_dir)
+            except Exception as err:
+                return BackupDownload(file_name=file_name, error=err)
+
+        start = time.monotonic()
+        if parallelism > 1 and len(file_names) > 1:
+            with ThreadPoolExecutor(max_workers=min(parallelism, len(file_names)), thread_name_prefix='xrdsst-backup') as executor:
+                downloads = list(executor.map(_download, file_names))
+        else:
+            downloads = list(map(_download, file_names))
+        duration = time.monotonic() - start
+
+        response_list = []
+        for download in downloads:
+            if download.error is not None:
+                if isinstance(download.error, ApiException):
+                    BaseController.log_api_error('BackupsApi->download_backup', download.error)
                 else:
-                    BaseController.log_info("Failed to download backup '" + file_name + "'")
-            return response_list
+                    BaseController.log_info("Failed to download backup '" + download.file_name + "': " + str(download.error) +
+                                            ", downloaded part is kept and download resumed on next attempt")
+            elif download.path is None:
+                BaseController.log_info("Failed to download backup '" + download.file_name + "'")
+            else:
+                response_list.append(download.path)
+                BaseController.log_info(
+                    "Downloaded backup '" + download.file_name + "' " + BackupController.FOR_SECURITY_SERVER + "' " + ss_name + "' to '" +
+                    download.path + "' (" + str(download.size) + " bytes" +
+                    (", resumed from " + str(download.resumed_from) if download.resumed_from else "") +
+                    ", {:.3f} s, {:.2f} MB/s, SHA-256 ".format(download.duration, download.throughput()) + download.sha256 + ")")
+
+        if len(downloads) > 1:
+            total = sum(download.size - download.resumed_from for download in downloads if download.path)
+            BaseController.log_info("Downloaded {} of {} backups, {} bytes in {:.3f} s, {:.2f} MB/s".format(
+                len(response_list), len(downloads), total, duration, total / (1024 * 1024) / duration if duration > 0 else 0.0))
+        return response_list
+
+    # Streams backup file to /output_dir/ in chunks, computing its SHA-256 on the way. The file is written under partial
+    # download name first, download of previously left partial file is resumed with HTTP Range request. Partial file
+    # the server refuses to resume from (416, or range other than requested) is discarded and download started over,
+    # on other failures it is kept for the next attempt.
+    @staticmethod
+    def remote_stream_backup(ss_api_config, file_name, output_dir, resume=True):
+        path = os.path.join(output_dir, file_name)
+        partial_path = path + BackupController.PARTIAL_DOWNLOAD_SUFFIX
+        offset = os.path.getsize(partial_path) if resume and os.path.isfile(partial_path) else 0
+
+        api_client = ApiClient(ss_api_config)
+        if offset:
+            api_client.set_default_header('Range', 'bytes=' + str(offset) + '-')
+
+        start = time.monotonic()
+        try:
+            response = BackupsApi(api_client).download_backup(filename=file_name, _preload_content=False)
         except ApiException as err:
-            BaseController.log_api_error('BackupsApi->download_backup', err)
+            if offset and err.status == 416:  # Range Not Satisfiable, backup changed meanwhile.
+                return BackupController.restart_stream_backup(ss_api_config, file_name, output_dir, err)
+            return BackupDownload(file_name=file_name, error=err)
+        if response is None:
+            return BackupDownload(file_name=file_name)
+
+        checksum = hashlib.sha256()
+        if response.status == 206:  # Range honoured, continue after the partial file.
+            content_range = response.getheader('Content-Range') or ''
+            if not content_range.startswith('bytes ' + str(offset) + '-'):
+                response.release_conn()
+                return BackupController.restart_stream_backup(ss_api_config, file_name, output_dir, "Content-Range '" + content_range + "'")
+            with open(partial_path, "rb") as partial_file:
+                for chunk in iter(lambda: partial_file.read(BackupController.DOWNLOAD_CHUNK_SIZE), b''):
+                    checksum.update(chunk)
+        else:
+            offset = 0
+
+        size = offset
+        try:
+            with open(partial_path, "ab" if offset else "wb") as file:
+                for chunk in response.stream(BackupController.DOWNLOAD_CHUNK_SIZE):
+                    file.write(chunk)
+                    checksum.update(chunk)
+                    size += len(chunk)
+        except (urllib3.exceptions.HTTPError, OSError) as err:
+            return BackupDownload(file_name=file_name, size=size, resumed_from=offset, duration=time.monotonic() - start, error=err)
+        finally:
+            response.release_conn()
+
+        os.replace(partial_path, path)
+        return BackupDownload(file_name=file_name, path=path, size=size, resumed_from=offset, duration=time.monotonic() - start,
+                              sha256=checksum.hexdigest())
+
+    # Discards partial download of /file_name/ that could not be resumed for given /reason/, downloads it from the start.
+    @staticmethod
+    def restart_stream_backup(ss_api_config, file_name, output_dir, reason):
+        BaseController.log_debug("Cannot resume download of backup '" + file_name + "' (" + str(reason) + "), downloading from the start")
+        partial_path = os.path.join(output_dir, file_name) + BackupController.PARTIAL_DOWNLOAD_SUFFIX
+        if os.path.isfile(partial_path):
+            os.remove(partial_path)
+        return BackupController.remote_stream_backup(ss_api_config, file_name, output_dir, resume=False)
 
     @staticmethod
     def remote_delete_backup(ss_api_config, ss_name, file_names):
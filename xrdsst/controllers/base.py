@@ -11,7 +11,7 @@ import os
 import logging
 import random
 import string
-import subprocess
+import time
 import xrdsst
 import yaml
 
@@ -21,14 +21,21 @@ from datetime import datetime
 from pathlib import Path
 from urllib.parse import urlparse
 
+from xrdsst.api_client.extensions import set_rate_limit, rate_limit_stats, _SS_RATE_LIMIT_SECOND, _SS_RATE_LIMIT_MINUTE, \
+    _SS_RATE_LIMIT_ADAPTIVE_MAX, add_state_change_listener, remove_state_change_listener
 from xrdsst.core.definitions import ROOT_DIR
-from xrdsst.core.conf_keys import validate_conf_keys, ConfKeysSecurityServer, ConfKeysRoot
+from xrdsst.core.api_key_cache import ApiKeyCache
+from xrdsst.core.conf_keys import validate_conf_keys, ConfKeysSecurityServer, ConfKeysRoot, ConfKeysRateLimit, ConfKeysRetry
 from xrdsst.core.excplanation import Excplanatory
-from xrdsst.core.util import op_node_to_ctr_cmd_text, get_admin_credentials, get_ssh_key, get_ssh_user
+from xrdsst.core.parallel import run_per_server
+from xrdsst.core.ssh import ssh_transport
+from xrdsst.core.status_cache import StatusCache
+from xrdsst.core.util import op_node_to_ctr_cmd_text, get_admin_credentials, get_ssh_key, get_ssh_user, revoke_cached_api_keys, \
+    preflight_connectivity
 from xrdsst.core.version import get_version
 from xrdsst.resources.texts import texts
 from xrdsst.configuration.configuration import Configuration
-from xrdsst.rest.rest import ApiException
+from xrdsst.rest.rest import ApiException, RetryPolicy, set_retry_policy, retry_stats
 
 BANNER = texts['app.description'] + ' ' + get_version() + '\n' + get_version_banner()
 
@@ -61,7 +68,8 @@ class BaseController(Controller):
         stacked_on = 'base'
         description = texts['app.description']
         arguments = [
-            (['-v', '--version'], {'action': 'version', 'version': BANNER})
+            (['-v', '--version'], {'action': 'version', 'version': BANNER}),
+            (['--parallel'], {'help': texts['root.parameter.parallel.description'], 'metavar': 'N', 'type': int, 'dest': 'parallel'})
         ]
 
     MESSAGE_SKIPPED = 'message.skipped'
@@ -76,8 +84,21 @@ class BaseController(Controller):
         return "X-Road-apikey token=" + api_key_uuid
 
     @staticmethod
-    def get_server_status(api_config, ss_config):
-        return xrdsst.core.api_util.status_server(api_config, ss_config)  # Allow somewhat sane mocking.
+    def get_server_status(api_config, ss_config, facets=None):
+        return xrdsst.core.api_util.status_server(api_config, ss_config, facets)  # Allow somewhat sane mocking.
+
+    @staticmethod
+    def refresh_server_status(api_config, ss_config, server_status, facets):
+        return xrdsst.core.api_util.refresh_server_status(api_config, ss_config, server_status, facets)
+
+    @staticmethod
+    def is_api_key_rejected(security_server, api_key):
+        return xrdsst.core.api_util.is_api_key_rejected(BaseController.api_key_config(security_server, api_key))
+
+    @staticmethod
+    def preflight_connectivity(config):
+        urls = [ss[ConfKeysSecurityServer.CONF_KEY_URL] for ss in config.get("security_server", []) if ss.get(ConfKeysSecurityServer.CONF_KEY_URL)]
+        return preflight_connectivity(urls)
 
     config_file = os.path.join(ROOT_DIR, _DEFAULT_CONFIG_FILE)
     config = None
@@ -101,12 +122,9 @@ class BaseController(Controller):
         curl_cmd = "curl -X POST -u " + admin_credentials + " --silent " + \
                    security_server["api_key_url"] + " --data \'" + json.dumps(roles).replace('"', '\\"') + "\'" + \
                    " --header \'Content-Type: application/json\' -k"
-        cmd = 'ssh -o IdentitiesOnly=yes -o UserKnownHostsFile=/dev/null -o StrictHostKeyChecking=no -o LogLevel=ERROR -i "{}" {}@{} "{}"'.format(
-            ssh_key, ssh_user, self.security_server_address(security_server), curl_cmd
-        )
         if os.path.isfile(ssh_key):
             try:
-                exitcode, data = subprocess.getstatusoutput(cmd)
+                exitcode, data = ssh_transport().run(ssh_key, ssh_user, self.security_server_address(security_server), curl_cmd)
                 if exitcode == 0:
                     api_key_json = json.loads(data)
                     self.api_key_id[security_server['name']] = api_key_json["id"], self.security_server_address(security_server)
@@ -125,6 +143,45 @@ class BaseController(Controller):
     def is_autoconfig(self):
         return self.app.auto_apply
 
+    # Returns number of security servers to configure concurrently, command line option overriding configuration file.
+    def parallelism(self, config):
+        parallel = getattr(self.app.pargs, 'parallel', None) if self.app.pargs else None
+        if parallel is None:
+            parallel = config.get(ConfKeysRoot.CONF_KEY_ROOT_PARALLELISM, 1) if config else 1
+
+        try:
+            return max(1, int(parallel))
+        except (TypeError, ValueError):
+            self.log_info(texts['message.parallelism.invalid'].format(parallel))
+            return 1
+
+    # Performs multi-server /operation/ for security servers in /config/, concurrently when parallelism is configured.
+    def run_per_server(self, config, operation):
+        security_servers = config.get(ConfKeysRoot.CONF_KEY_ROOT_SERVER) if config else None
+        parallelism = self.parallelism(config)
+        if parallelism < 2 or not security_servers or len(security_servers) < 2 or self.is_autoconfig():
+            return operation(config)
+
+        return self.run_concurrently(config, operation, parallelism)
+
+    # Performs /operation/ on single-server slices of /config/ on at most /parallelism/ worker threads, logging the
+    # per-server durations. First failure from any server is re-raised after all servers are done.
+    def run_concurrently(self, config, operation, parallelism):
+        start = time.monotonic()
+        server_runs = run_per_server(config, operation, parallelism)
+        self.log_info(texts['message.parallel.summary'].format(len(server_runs), min(parallelism, len(server_runs)), time.monotonic() - start))
+        for server_run in server_runs:
+            self.log_info(
+                "  " + server_run.security_server_name + ": " + "{:.3f} s".format(server_run.duration) +
+                ((" FAILED (" + str(server_run.error) + ")") if server_run.error else '')
+            )
+
+        failed_run = next((server_run for server_run in server_runs if server_run.error), None)
+        if failed_run:
+            raise failed_run.error
+
+        return [server_run.result for server_run in server_runs]
+
     # Returns operation graph node, deduced from call frame at given depth,
     def _op_node(self, depth):
         if not issubclass(self.__class__, BaseController):  # Nothing but error.
@@ -152,27 +209,62 @@ class BaseController(Controller):
 
         return networkx.shortest_path(self.app.OP_GRAPH, self.app.OP_DEPENDENCY_LIST[0], op_node)
 
-    # Updates operation graph with server-side /operation statuses/ AND /API config/ for security servers configured.
-    def update_op_statuses(self, active_config):
-        g = self.app.OP_GRAPH
-        for g_node in g:
-            node = g.nodes[g_node]
-            if node.__contains__('servers'):
-                node['servers'].clear()
-
+    # Updates server-side /operation statuses/ AND /API config/ for security servers configured, entries of other
+    # security servers are left untouched so that these can be concurrently updated too. Connectivity of all the servers
+    # is tested upfront concurrently, so that unreachable servers are rejected without waiting for each in turn.
+    # Complete status is collected unless only some status /facets/ are asked for.
+    def update_op_statuses(self, active_config, facets=None):
+        self.preflight_connectivity(active_config)
         for security_server in active_config["security_server"]:
             ssn = security_server['name']
             api_config = self.create_api_config(security_server, active_config)
-            status = self.get_server_status(api_config, security_server)
+            status = self.cached_server_status(api_config, security_server, active_config, facets)
+            self.app.OP_SERVER_STATUSES[ssn] = {'api_config': api_config, 'status': status}
+
+    # Returns server status, reusing recent snapshot from the status cache if one is configured in /config/. Only
+    # complete statuses of connectable servers are cached, status of only some /facets/ is served from complete one.
+    def cached_server_status(self, api_config, security_server, config, facets=None):
+        status_cache = StatusCache.from_config(config) if api_config else None
+        status_key = StatusCache.status_key(security_server, api_config) if status_cache else None
+        status = status_cache.get(status_key) if status_cache else None
+        if status is not None:
+            self.log_debug("Using cached status for security server: '" + security_server['name'] + "'")
+            return status
+
+        status = self.get_server_status(api_config, security_server, facets)
+        if status_cache and facets is None and status.connectivity_status and status.connectivity_status[0]:
+            status_cache.put(status_key, status)
+        return status
+
+    # Refreshes only given status /facets/ of the security servers in active configuration, complete status is
+    # collected for servers with no previously known status.
+    def refresh_op_statuses(self, active_config, facets):
+        if not facets:
+            return
 
-            for g_node in g:
-                node = g.nodes[g_node]
-                node['servers'][ssn] = {'api_config': api_config, 'status': status}
+        for security_server in active_config["security_server"]:
+            ssn = security_server['name']
+            known = self.app.OP_SERVER_STATUSES.get(ssn)
+            if not known or not known['status']:
+                api_config = self.create_api_config(security_server, active_config)
+                status = self.get_server_status(api_config, security_server)
+            else:
+                api_config = known['api_config']
+                status = self.refresh_server_status(api_config, security_server, known['status'], facets)
+            self.app.OP_SERVER_STATUSES[ssn] = {'api_config': api_config, 'status': status}
+
+    # Returns status facets needed for deciding whether operations preceding the last one on /op_full_path/ are done,
+    # operations without binary /done/ criteria need none.
+    def op_status_facets(self, op_full_path):
+        facets = []
+        for oop in op_full_path[:-1]:
+            facets.extend(facet for facet in self.app.OP_GRAPH.nodes[oop]['status_facets'] if facet not in facets)
+        return tuple(facets)
 
     # Given active configuration and full operation path to single operation, returns regrouped configuration and
     # the detailed reachability status for those configured servers for which last operation on the path is unreachable.
     def regroup_server_ops(self, active_config, op_full_path):
-        self.update_op_statuses(active_config)
+        self.update_op_statuses(active_config, self.op_status_facets(op_full_path))
 
         reachable_config = copy.deepcopy(active_config)  # Retains only security servers with reachable end-operation.
         # NB! Depending on server status, these (un)reachable operations will not necessarily be successive.
@@ -194,7 +286,7 @@ class BaseController(Controller):
 
     def regroup_per_security_server(self, security_server, reachable_ops, unreachable_ops, op_full_path, reachable_config, skipped_servers):
         ssn = security_server['name']
-        g_server_node = self.app.OP_GRAPH.nodes[self.app.OP_DEPENDENCY_LIST[0]]['servers'][ssn]
+        g_server_node = self.app.OP_SERVER_STATUSES[ssn]
         conn_status = g_server_node['status'].connectivity_status
         reachable_ops[ssn] = []
         unreachable_ops[ssn] = []
@@ -273,14 +365,33 @@ class BaseController(Controller):
         if self.app.api_keys.get(security_server.get(ConfKeysSecurityServer.CONF_KEY_NAME)):
             return self.app.api_keys[security_server[ConfKeysSecurityServer.CONF_KEY_NAME]]
 
-        # Fallback attempt to create the (temporary) API key, if there seems to be SSH access configured.
         api_key = None
         config = conf if conf else self.config
+        ssn = security_server.get(ConfKeysSecurityServer.CONF_KEY_NAME)
+
+        # Use API key cached by earlier invocation, if API key cache is configured and the key is still valid.
+        api_key_cache = ApiKeyCache.from_config(config)
+        if api_key_cache:
+            cached = api_key_cache.get(security_server)
+            if cached and BaseController.is_api_key_rejected(security_server, cached['key']):
+                self.log_debug("Cached API key for security server: '" + ssn + "' rejected, creating new API key")
+                api_key_cache.remove(ssn)
+                cached = None
+            if cached:
+                self.log_debug("Using cached API key for security server: '" + ssn + "'")
+                self.app.api_keys[ssn] = cached['key']
+                return cached['key']
+            for revoked_ssn in revoke_cached_api_keys(api_key_cache, config, [(essn, entry) for essn, entry in api_key_cache.expired() if essn == ssn]):
+                BaseController.invalidate_api_config(self.app, revoked_ssn)
 
+        # Fallback attempt to create the (temporary) API key, if there seems to be SSH access configured.
         if security_server.get(ConfKeysSecurityServer.CONF_KEY_API_KEY):
             try:
                 api_key = self.create_api_key(config, BaseController._TRANSIENT_API_KEY_ROLES, security_server)
-                self.app.api_keys[security_server[ConfKeysSecurityServer.CONF_KEY_NAME]] = api_key
+                self.app.api_keys[ssn] = api_key
+                if api_key and api_key_cache:  # Cached key outlives the invocation, not revoked at exit.
+                    key_id, address = self.api_key_id.pop(ssn)
+                    api_key_cache.put(security_server, api_key, key_id, address)
             except Exception as err:
                 self.log_api_error('BaseController->get_api_key:', err)
 
@@ -383,9 +494,47 @@ class BaseController(Controller):
         # and start logging immediately after configuration has been loaded, only detecting basic key-level
         # errors, non-mutable operations being undifferentiated.
         self._init_logging(self.config)
+        self.configure_rate_limits(self.config)
+        self.configure_retries(self.config)
+        self.configure_status_cache(self.config)
 
         return self.config
 
+    # Sets up dropping cached statuses of security servers on state changing API calls, if status cache is configured.
+    @staticmethod
+    def configure_status_cache(config):
+        status_cache = StatusCache.from_config(config)
+        if status_cache:
+            add_state_change_listener(StatusCache, status_cache.invalidate)
+        else:
+            remove_state_change_listener(StatusCache)
+
+    # Applies API call retry policy from configuration, defaults for the values not given.
+    @staticmethod
+    def configure_retries(config):
+        retry_conf = config.get(ConfKeysRoot.CONF_KEY_ROOT_RETRY) or {}
+        default_policy = RetryPolicy()
+        set_retry_policy(RetryPolicy(
+            int(retry_conf.get(ConfKeysRetry.CONF_KEY_RETRY_RETRIES, default_policy.retries)),
+            float(retry_conf.get(ConfKeysRetry.CONF_KEY_RETRY_BACKOFF, default_policy.backoff)),
+            float(retry_conf.get(ConfKeysRetry.CONF_KEY_RETRY_MAX_BACKOFF, default_policy.max_backoff))
+        ))
+
+    # Applies API call rate limits from configuration, security server specific limits override the root level ones.
+    @staticmethod
+    def configure_rate_limits(config):
+        root_limits = config.get(ConfKeysRoot.CONF_KEY_ROOT_RATE_LIMIT) or {}
+        for security_server in config[ConfKeysRoot.CONF_KEY_ROOT_SERVER]:
+            limits = dict(root_limits, **(security_server.get(ConfKeysSecurityServer.CONF_KEY_RATE_LIMIT) or {}))
+            if limits:
+                set_rate_limit(
+                    '/'.join(security_server[ConfKeysSecurityServer.CONF_KEY_URL].split('/')[:3]),
+                    limits.get(ConfKeysRateLimit.CONF_KEY_RATE_LIMIT_PER_SECOND, _SS_RATE_LIMIT_SECOND),
+                    limits.get(ConfKeysRateLimit.CONF_KEY_RATE_LIMIT_PER_MINUTE, _SS_RATE_LIMIT_MINUTE),
+                    bool(limits.get(ConfKeysRateLimit.CONF_KEY_RATE_LIMIT_ADAPTIVE, False)),
+                    limits.get(ConfKeysRateLimit.CONF_KEY_RATE_LIMIT_MAX_PER_SECOND, _SS_RATE_LIMIT_ADAPTIVE_MAX)
+                )
+
     def check_conf_errors(self, errors):
         if errors[ConfKeysSecurityServer.CONF_KEY_NAME] or errors[ConfKeysSecurityServer.CONF_KEY_URL]:
             print(*errors[ConfKeysSecurityServer.CONF_KEY_NAME], sep='\n', file=sys.stderr)
@@ -454,13 +603,38 @@ class BaseController(Controller):
                         )
                 detected.add(str(sec_server_configs[z][key]))
 
+    # Returns API configuration for given security server. Created only once per run and security server (also when
+    # no API key could be had), as creating one can involve transient API key creation over SSH.
     def create_api_config(self, security_server, config=None):
+        if self.app is None:  # Controller detached from application, nowhere to memoize.
+            return self._create_api_config(security_server, config)
+
+        ssn = security_server[ConfKeysSecurityServer.CONF_KEY_NAME]
+        if ssn not in self.app.api_configs:
+            self.app.api_configs[ssn] = self._create_api_config(security_server, config)
+        return self.app.api_configs[ssn]
+
+    # Drops memoized API configuration of given security server, of all security servers if none given.
+    # Must be called whenever the API key in use is revoked or replaced.
+    @staticmethod
+    def invalidate_api_config(app, ssn=None):
+        if ssn is None:
+            app.api_configs.clear()
+        else:
+            app.api_configs.pop(ssn, None)
+
+    def _create_api_config(self, security_server, config=None):
         api_key = self.get_api_key(config, security_server)
         if not api_key:
             return None
 
+        return BaseController.api_key_config(security_server, api_key)
+
+    # Configuration() is shallow copy of generated class default, own dictionary keeps API key from being shared.
+    @staticmethod
+    def api_key_config(security_server, api_key):
         api_config = Configuration()
-        api_config.api_key['Authorization'] = BaseController.authorization_header(api_key)
+        api_config.api_key = {'Authorization': BaseController.authorization_header(api_key)}
         api_config.host = security_server["url"]
         api_config.verify_ssl = False
         return api_config
@@ -470,7 +644,7 @@ class BaseController(Controller):
     def log_skipped_op_deps_unmet(self, full_op_path, unconfigured_servers):
         op_text = functools.partial(op_node_to_ctr_cmd_text, self.app.OP_GRAPH)
         for ssn in unconfigured_servers:
-            conn_status = self.app.OP_GRAPH.nodes[full_op_path[-1]]['servers'][ssn]['status'].connectivity_status
+            conn_status = self.app.OP_SERVER_STATUSES[ssn]['status'].connectivity_status
             if not conn_status[0]:
                 skip_msg = texts[BaseController.MESSAGE_SKIPPED].format(ssn) + ": no connectivity ({}).".format(str(conn_status[1]))
                 self.log_info(skip_msg)
@@ -508,6 +682,31 @@ class BaseController(Controller):
         logging.error("Exception calling " + msg + ": " + str(exception))
         print("Exception calling " + msg + ": " + str(exception), file=sys.stderr)
 
+    # Remembers API call rate limit and retry statistics at the start of the command, for log_api_call_stats().
+    @staticmethod
+    def mark_api_call_stats(app):
+        app.api_call_stats = (rate_limit_stats(), retry_stats())
+
+    # Logs summary of API calls delayed by rate limits, adaptive rate limit decreases and retries made during the command.
+    @staticmethod
+    def log_api_call_stats(app):
+        start_rate_limit_stats, start_retry_stats = getattr(app, 'api_call_stats', None) or (
+            {'throttled': 0, 'throttle_time': 0.0, 'backoffs': 0}, {'retries': 0, 'recovered': 0, 'exhausted': 0}
+        )
+        end_rate_limit_stats = rate_limit_stats()
+        if end_rate_limit_stats['throttled'] > start_rate_limit_stats['throttled']:
+            BaseController.log_info(texts['message.rate_limit.summary'].format(
+                end_rate_limit_stats['throttled'] - start_rate_limit_stats['throttled'],
+                end_rate_limit_stats['throttle_time'] - start_rate_limit_stats['throttle_time']
+            ))
+        if end_rate_limit_stats['backoffs'] > start_rate_limit_stats['backoffs']:
+            BaseController.log_info(texts['message.rate_limit.backoffs'].format(end_rate_limit_stats['backoffs'] - start_rate_limit_stats['backoffs']))
+        end_retry_stats = retry_stats()
+        if end_retry_stats['retries'] > start_retry_stats['retries']:
+            BaseController.log_info(texts['message.retry.summary'].format(
+                *[end_retry_stats[key] - start_retry_stats[key] for key in ('retries', 'recovered', 'exhausted')]
+            ))
+
     @staticmethod
     def log_info(message):
         logging.info(message)
@@ -85,7 +85,7 @@ class CertController(BaseController):
             active_config, insufficient_state_servers = self.regroup_server_ops(active_config, full_op_path)
             self.log_skipped_op_deps_unmet(full_op_path, insufficient_state_servers)
 
-        self.import_certificates(active_config)
+        self.run_per_server(active_config, self.import_certificates)
 
     @ex(help="Register authentication certificate(s)", arguments=[])
     def register(self):
@@ -99,7 +99,7 @@ class CertController(BaseController):
             active_config, insufficient_state_servers = self.regroup_server_ops(active_config, full_op_path)
             self.log_skipped_op_deps_unmet(full_op_path, insufficient_state_servers)
 
-        self.register_certificate(active_config)
+        self.run_per_server(active_config, self.register_certificate)
 
     @ex(help="Activate registered centrally approved authentication certificate", arguments=[])
     def activate(self):
@@ -113,7 +113,7 @@ class CertController(BaseController):
             active_config, insufficient_state_servers = self.regroup_server_ops(active_config, full_op_path)
             self.log_skipped_op_deps_unmet(full_op_path, insufficient_state_servers)
 
-        self.activate_certificate(active_config)
+        self.run_per_server(active_config, self.activate_certificate)
 
     @ex(help="Download certificate requests for sign and auth keys, if any.", arguments=[])
     def download_csrs(self):
@@ -1,3 +1,6 @@
+import threading
+import weakref
+
 import cement.utils.fs
 from cement import ex
 from xrdsst.api import ClientsApi
@@ -6,11 +9,60 @@ from xrdsst.controllers.base import BaseController
 from xrdsst.core.conf_keys import ConfKeysSecurityServer, ConfKeysSecServerClients
 from xrdsst.core.util import convert_swagger_enum, parse_argument_list
 from xrdsst.models import ClientAdd, Client, ConnectionType, ClientStatus
-from xrdsst.rest.rest import ApiException
+from xrdsst.rest.rest import ApiException, retry_safe
 from xrdsst.resources.texts import texts
 from xrdsst.controllers.token import TokenController
 
 
+# Index of security server clients (members and subsystems), built from single 'find_clients' query, for lookups by
+# (member class, member code, subsystem code) and by client id.
+class ClientIndex:
+    def __init__(self, clients):
+        self._by_id = {}
+        self._by_client_key = {}
+        self._by_member_name_key = {}
+        self._service_client_candidates = {}
+        for client in clients:
+            self._by_id[client.id] = client
+            self._by_client_key.setdefault(ClientIndex.client_key(client.member_class, client.member_code, client.subsystem_code), []).append(client)
+            if client.subsystem_code is None:
+                self._by_member_name_key.setdefault(
+                    ClientIndex.member_name_key(client.member_class, client.member_code, client.member_name), []).append(client)
+
+    @staticmethod
+    def client_key(member_class, member_code, subsystem_code=None):
+        return str(member_class), str(member_code), str(subsystem_code) if subsystem_code is not None else None
+
+    @staticmethod
+    def member_name_key(member_class, member_code, member_name):
+        return str(member_class), str(member_code), str(member_name)
+
+    # Returns list of clients matching given identifiers, subsystem_code None for members. Members are matched by
+    # /member_name/ too, if given.
+    def find(self, member_class, member_code, subsystem_code=None, member_name=None):
+        if subsystem_code is None and member_name is not None:
+            return list(self._by_member_name_key.get(ClientIndex.member_name_key(member_class, member_code, member_name), []))
+        return list(self._by_client_key.get(ClientIndex.client_key(member_class, member_code, subsystem_code), []))
+
+    def get(self, client_id):
+        return self._by_id.get(client_id)
+
+    # Returns service client candidates of client with /client_id/ by id, fetched with /fetch/ once per client.
+    def service_client_candidates(self, client_id, fetch):
+        candidates = self._service_client_candidates.get(client_id)
+        if candidates is None:
+            fetched = fetch()
+            if fetched is None:
+                return None
+            candidates = {candidate.id: candidate for candidate in fetched}
+            self._service_client_candidates[client_id] = candidates
+        return candidates
+
+
+_CLIENT_INDEXES = weakref.WeakKeyDictionary()  # API configuration : ClientIndex
+_CLIENT_INDEXES_LOCK = threading.Lock()
+
+
 class ClientsListMapper:
     @staticmethod
     def headers():
@@ -66,7 +118,7 @@ class ClientController(BaseController):
             active_config, unconfigured_servers = self.regroup_server_ops(active_config, full_op_path)
             self.log_skipped_op_deps_unmet(full_op_path, unconfigured_servers)
 
-        self.add_client(active_config)
+        self.run_per_server(active_config, self.add_client)
 
     @ex(help="Register client", arguments=[])
     def register(self):
@@ -80,7 +132,7 @@ class ClientController(BaseController):
             active_config, unconfigured_servers = self.regroup_server_ops(active_config, full_op_path)
             self.log_skipped_op_deps_unmet(full_op_path, unconfigured_servers)
 
-        self.register_client(active_config)
+        self.run_per_server(active_config, self.register_client)
 
     @ex(help="Update client", arguments=[])
     def update(self):
@@ -94,7 +146,7 @@ class ClientController(BaseController):
             active_config, unconfigured_servers = self.regroup_server_ops(active_config, full_op_path)
             self.log_skipped_op_deps_unmet(full_op_path, unconfigured_servers)
 
-        self.update_client(active_config)
+        self.run_per_server(active_config, self.update_client)
 
     @ex(help="Import TLS certificates", arguments=[])
     def import_tls_certs(self):
@@ -108,7 +160,7 @@ class ClientController(BaseController):
             active_config, unconfigured_servers = self.regroup_server_ops(active_config, full_op_path)
             self.log_skipped_op_deps_unmet(full_op_path, unconfigured_servers)
 
-        self.client_import_tls_cert(active_config)
+        self.run_per_server(active_config, self.client_import_tls_cert)
 
     @ex(help="Unregister client(s)",
         arguments=[
@@ -314,6 +366,7 @@ class ClientController(BaseController):
         clients_api = ClientsApi(ApiClient(ss_api_config))
         try:
             response = clients_api.add_client(body=client_add)
+            self.invalidate_client_index(clients_api)
             BaseController.log_info("Added client subsystem " + self.partial_client_id(client_conf) + " (got full id " + response.id + ")")
             return response
         except ApiException as err:
@@ -335,6 +388,7 @@ class ClientController(BaseController):
 
                 try:
                     clients_api.register_client(id=client.id)
+                    self.invalidate_client_index(clients_api)
                     BaseController.log_info("Registered client " + self.partial_client_id(client_conf))
                 except ApiException as reg_err:
                     BaseController.log_api_error('ClientsApi->register_client', reg_err)
@@ -355,6 +409,7 @@ class ClientController(BaseController):
                 try:
                     client.connection_type = convert_swagger_enum(ConnectionType, client_conf['connection_type'])
                     response = clients_api.update_client(client.id, body=client)
+                    self.invalidate_client_index(clients_api)
                     BaseController.log_info("Updated client " + self.partial_client_id(client_conf) + " connection type")
                     return response
                 except ApiException as reg_err:
@@ -378,6 +433,7 @@ class ClientController(BaseController):
         for client_id in client_ids:
             try:
                 clients_api.delete_client(client_id)
+                ClientController.invalidate_client_index(clients_api)
                 BaseController.log_info("Deleted client: '%s' for security server: '%s'" % (client_id, security_server_name))
             except ApiException as err:
                 if err.status == 404:
@@ -391,6 +447,7 @@ class ClientController(BaseController):
         for client_id in client_ids:
             try:
                 clients_api.unregister_client(client_id)
+                ClientController.invalidate_client_index(clients_api)
                 BaseController.log_info("Unregister client: '%s' for security server: '%s'" % (client_id, security_server))
             except ApiException as err:
                 if err.status == 409:
@@ -409,7 +466,8 @@ class ClientController(BaseController):
                 cert_file = open(cert_file_loc, "rb")
                 cert_data = cert_file.read()
                 cert_file.close()
-                response = clients_api.add_client_tls_certificate(client.id, body=cert_data)
+                with retry_safe():  # Certificate imported by lost attempt shows up as 409
+                    response = clients_api.add_client_tls_certificate(client.id, body=cert_data)
                 BaseController.log_info(
                     "Import TLS certificate '%s' for client '%s'" % (tls_cert, client.id))
                 return response
@@ -438,6 +496,7 @@ class ClientController(BaseController):
             else:
                 try:
                     clients_api.change_owner(member_id)
+                    ClientController.invalidate_client_index(clients_api)
                     BaseController.log_info("Change owner request submitted: "
                                             "'%s' for security server: '%s'" % (member_id, ss_name))
                     return client
@@ -463,19 +522,9 @@ class ClientController(BaseController):
         return clients
 
     def find_client(self, clients_api, client_conf):
-        if 'subsystem_code' in client_conf:
-            found_clients = clients_api.find_clients(
-                member_class=client_conf['member_class'],
-                member_code=client_conf['member_code'],
-                subsystem_code=client_conf["subsystem_code"]
-            )
-        else:
-            all_clients = clients_api.find_clients(
-                member_class=client_conf['member_class'],
-                member_code=str(client_conf['member_code']),
-                name=client_conf["member_name"]
-            )
-            found_clients = list(found_client for found_client in all_clients if found_client.subsystem_code is None)
+        found_clients = self.client_index(clients_api).find(
+            client_conf['member_class'], client_conf['member_code'], client_conf.get('subsystem_code'), client_conf.get('member_name')
+        )
         if not found_clients:
             BaseController.log_info(
                 client_conf["member_name"] + ": Client matching " + self.partial_client_id(client_conf) + " not found")
@@ -488,6 +537,30 @@ class ClientController(BaseController):
             return None
         return found_clients[0]
 
+    # Returns index of the clients of security server behind /clients_api/, queried once and reused until invalidated.
+    @staticmethod
+    def client_index(clients_api):
+        api_config = clients_api.api_client.configuration
+        with _CLIENT_INDEXES_LOCK:
+            client_index = _CLIENT_INDEXES.get(api_config)
+        if client_index is None:
+            client_index = ClientIndex(clients_api.find_clients(show_members=True, internal_search=True))
+            with _CLIENT_INDEXES_LOCK:
+                _CLIENT_INDEXES[api_config] = client_index
+        return client_index
+
+    # Returns service client candidates of client with /client_id/ by id, reused while client index is valid, None on failure.
+    def service_client_candidates(self, clients_api, client_id):
+        return self.client_index(clients_api).service_client_candidates(
+            client_id, lambda: self.get_clients_service_client_candidates(clients_api, client_id, None)
+        )
+
+    # Drops client index of security server behind /clients_api/, to be used after the clients have been changed.
+    @staticmethod
+    def invalidate_client_index(clients_api):
+        with _CLIENT_INDEXES_LOCK:
+            _CLIENT_INDEXES.pop(clients_api.api_client.configuration, None)
+
     @staticmethod
     def find_all_clients(clients_api, show_members=False, internal_search=False):
         try:
@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from cement import ex
 from xrdsst.api import ClientsApi, EndpointsApi, ServicesApi, ServiceDescriptionsApi
 from xrdsst.api_client.api_client import ApiClient
@@ -6,6 +8,7 @@ from xrdsst.controllers.service import ServiceController
 from xrdsst.controllers.client import ClientController
 from xrdsst.models import Endpoint, ServiceType, ServiceClients, EndpointUpdate
 from xrdsst.rest.rest import ApiException
+from xrdsst.core.conf_keys import ConfKeysRoot
 from xrdsst.resources.texts import texts
 from xrdsst.core.util import parse_argument_list, cut_big_string
 
@@ -82,7 +85,7 @@ class EndpointController(BaseController):
         if not self.is_autoconfig():
             active_config, unconfigured_servers = self.regroup_server_ops(active_config, full_op_path)
             self.log_skipped_op_deps_unmet(full_op_path, unconfigured_servers)
-        self.add_service_endpoints(active_config)
+        self.run_per_server(active_config, self.add_service_endpoints)
 
     @ex(help="Add access rights to endpoints ", arguments=[])
     def add_access(self):
@@ -95,7 +98,7 @@ class EndpointController(BaseController):
         if not self.is_autoconfig():
             active_config, unconfigured_servers = self.regroup_server_ops(active_config, full_op_path)
             self.log_skipped_op_deps_unmet(full_op_path, unconfigured_servers)
-        self.add_endpoint_access(active_config)
+        self.run_per_server(active_config, self.add_endpoint_access)
 
     @ex(help="List endpoints", arguments=[(['--ss'], {'help': 'Security server name', 'dest': 'ss'}),
                                           (['--description'], {'help': 'Service description ids', 'dest': 'description'})
@@ -209,13 +212,14 @@ class EndpointController(BaseController):
         ss_api_conf_tuple = list(zip(config["security_server"],
                                      map(lambda ss: self.create_api_config(ss, config), config["security_server"])))
 
+        parallelism = self.endpoint_parallelism(config)
         for service_description_dic in self.get_services_description(config):
             if "endpoints" in service_description_dic["service_description"]:
-                for endpoint_conf in service_description_dic["service_description"]["endpoints"]:
-                    self.remote_add_service_endpoints(service_description_dic["ss_api_config"],
-                                                      service_description_dic["client"],
-                                                      service_description_dic["service_description"],
-                                                      endpoint_conf)
+                self.remote_sync_service_endpoints(service_description_dic["ss_api_config"],
+                                                   service_description_dic["client"],
+                                                   service_description_dic["service_description"],
+                                                   service_description_dic["service_description"]["endpoints"],
+                                                   parallelism)
             else:
                 if service_description_dic["service_description"]["type"] != ServiceType().WSDL:
                     BaseController.log_info(
@@ -224,6 +228,15 @@ class EndpointController(BaseController):
                          service_description_dic["service_description"]["rest_service_code"]))
         BaseController.log_keyless_servers(ss_api_conf_tuple)
 
+    # Returns number of endpoints of single service description to create concurrently, 1 if not configured or invalid.
+    def endpoint_parallelism(self, config):
+        parallel = config.get(ConfKeysRoot.CONF_KEY_ROOT_ENDPOINT_PARALLELISM, 1) if config else 1
+        try:
+            return max(1, int(parallel))
+        except (TypeError, ValueError):
+            self.log_info(texts['message.parallelism.invalid'].format(parallel))
+            return 1
+
     def add_endpoint_access(self, config):
         ss_api_conf_tuple = list(zip(config["security_server"],
                                      map(lambda ss: self.create_api_config(ss, config), config["security_server"])))
@@ -306,6 +319,11 @@ class EndpointController(BaseController):
                                      client_conf,
                                      service_description_conf,
                                      endpoint_conf):
+        self.remote_sync_service_endpoints(ss_api_config, client_conf, service_description_conf, [endpoint_conf])
+
+    # Creates those of /endpoint_confs/ that the service of the client service description does not have yet, with
+    # at most /parallelism/ endpoints being created concurrently.
+    def remote_sync_service_endpoints(self, ss_api_config, client_conf, service_description_conf, endpoint_confs, parallelism=1):
         try:
             clients_api = ClientsApi(ApiClient(ss_api_config))
             client_controller = ClientController()
@@ -320,34 +338,67 @@ class EndpointController(BaseController):
                                                     " allowed, skipped endpoint creation " + EndpointController.FOR_SERVICE
                                                     + "'" + service_description.url + "'")
                         else:
-                            self.remote_add_endpoint(ss_api_config, service_description, service_description_conf,
-                                                     endpoint_conf)
+                            self.remote_add_endpoints(ss_api_config, service_description, service_description_conf,
+                                                      endpoint_confs, parallelism)
                 except ApiException as find_err:
                     BaseController.log_api_error(ClientController.CLIENTS_API_GET_CLIENT_SERVICE_DESCRIPTION, find_err)
         except ApiException as find_err:
             BaseController.log_api_error(ClientController.CLIENTS_API_FIND_CLIENTS, find_err)
 
+    # Adds endpoints of /endpoint_confs/ missing from the service of /service_description/, found by (method, path)
+    # from the endpoints already read with the service description. The endpoints are created on at most /parallelism/
+    # threads, outcomes are logged in configuration order.
     @staticmethod
-    def remote_add_endpoint(ss_api_config, service_description, service_description_conf, endpoint_conf):
-        endpoint = Endpoint(id=None, service_code=service_description_conf["rest_service_code"],
-                            method=endpoint_conf["method"], path=endpoint_conf["path"],
-                            generated=None)
-        try:
-            services_api = ServicesApi(ApiClient(ss_api_config))
-            response = services_api.add_endpoint(id=service_description.services[0].id, body=endpoint)
-            if response:
+    def remote_add_endpoints(ss_api_config, service_description, service_description_conf, endpoint_confs, parallelism=1):
+        service = service_description.services[0]
+        existing = EndpointController.endpoint_index(service)
+        missing = {}
+        for endpoint_conf in endpoint_confs:
+            endpoint_key = (endpoint_conf["method"], endpoint_conf["path"])
+            if endpoint_key in existing:
                 BaseController.log_info(
-                    "Added service endpoint '" + endpoint.method + " " + endpoint.path + "'" + EndpointController.FOR_SERVICE + "'" +
-                    service_description.services[0].id + "'")
-        except ApiException as err:
-            if err.status == 409:
+                    "Service endpoint '" + endpoint_conf["method"] + " " + endpoint_conf["path"] + "'" + EndpointController.FOR_SERVICE + "'" +
+                    service.id + "' already added")
+            else:
+                missing.setdefault(endpoint_key, Endpoint(id=None, service_code=service_description_conf["rest_service_code"],
+                                                          method=endpoint_conf["method"], path=endpoint_conf["path"],
+                                                          generated=None))
+        if not missing:
+            return
+
+        services_api = ServicesApi(ApiClient(ss_api_config))
+
+        def _add(endpoint):
+            try:
+                return endpoint, services_api.add_endpoint(id=service.id, body=endpoint), None
+            except ApiException as err:
+                return endpoint, None, err
+
+        if parallelism > 1 and len(missing) > 1:
+            with ThreadPoolExecutor(max_workers=min(parallelism, len(missing)), thread_name_prefix='xrdsst-endpoint') as executor:
+                outcomes = list(executor.map(_add, missing.values()))
+        else:
+            outcomes = list(map(_add, missing.values()))
+        ServiceController.invalidate_client_service_descriptions(ss_api_config, service_description.client_id)
+
+        for endpoint, response, err in outcomes:
+            if err is None:
+                if response:
+                    BaseController.log_info(
+                        "Added service endpoint '" + endpoint.method + " " + endpoint.path + "'" + EndpointController.FOR_SERVICE + "'" +
+                        service.id + "'")
+            elif err.status == 409:
                 BaseController.log_info(
                     "Service endpoint '" + endpoint.method + " " + endpoint.path + "'" + EndpointController.FOR_SERVICE + "'" +
-                    service_description.services[
-                        0].id + "' already added")
+                    service.id + "' already added")
             else:
                 BaseController.log_api_error('ServicesApi->add_endpoint', err)
 
+    # Returns endpoints of /service/ by (method, path).
+    @staticmethod
+    def endpoint_index(service):
+        return {(endpoint.method, endpoint.path): endpoint for endpoint in service.endpoints or []}
+
     def remote_add_endpoints_access(self, ss_api_config, client_conf, service_description_conf):
         try:
             client_controller = ClientController()
@@ -371,12 +422,14 @@ class EndpointController(BaseController):
 
     def remote_add_endpoint_access(self, ss_api_config, service_description, service_description_conf,
                                    service_clients_candidates):
+        endpoints = self.endpoint_index(service_description.services[0])
+        candidates = {candidate.id: candidate for candidate in service_clients_candidates or []}
+        endpoints_api = EndpointsApi(ApiClient(ss_api_config))
         for endpoint_conf in service_description_conf["endpoints"]:
             try:
                 access_list = endpoint_conf["access"] if "access" in endpoint_conf else []
                 if len(access_list) > 0:
-                    self.add_access_from_list(ss_api_config, service_description, service_clients_candidates,
-                                              endpoint_conf, access_list)
+                    self.add_access_from_list(endpoints_api, service_description, endpoints, candidates, endpoint_conf, access_list)
                 else:
                     BaseController.log_info(
                         "Skipping endpoint add access for service '%s', endpoint %s-%s no endpoints defined" %
@@ -394,6 +447,7 @@ class EndpointController(BaseController):
                     endpoint_update = EndpointUpdate(method=endpoint_method, path=endpoint_path)
                     try:
                         endpoints_api.update_endpoint(endpoint_id, body=endpoint_update)
+                        ServiceController.invalidate_client_service_descriptions(ss_api_config)
                         BaseController.log_info("Updated endpoint with id: '%s', method: '%s', path: '%s', security server: '%s'"
                                                 % (endpoint_id, endpoint_method, endpoint_path, ss_name))
                     except ApiException as err:
@@ -411,6 +465,7 @@ class EndpointController(BaseController):
                 if not endpoint.generated:
                     try:
                         endpoints_api.delete_endpoint(endpoint_id)
+                        ServiceController.invalidate_client_service_descriptions(ss_api_config)
                         BaseController.log_info("Deleted endpoint with id: '%s', security server: '%s'"
                                                 % (endpoint_id, ss_name))
                     except ApiException as err:
@@ -420,49 +475,53 @@ class EndpointController(BaseController):
         except ApiException:
             BaseController.log_info(self.endpoint_not_found_message(endpoint_id, ss_name))
 
-    def add_access_from_list(self, ss_api_config, service_description, service_clients_candidates, endpoint_conf,
-                             access_list):
-        for access in access_list:
-            candidate = [c for c in service_clients_candidates if c.id == access]
-            if len(candidate) == 0:
-                BaseController.log_info("Error adding client access rights '" + access + "' for the endpoint '"
-                                        + endpoint_conf["method"] + " " + endpoint_conf["path"]
-                                        + "'" + EndpointController.FOR_SERVICE + "'" + service_description.id
-                                        + "', no valid candidate found")
-            else:
-                self.add_access_based_on_service_client_candidate(ss_api_config, service_description, endpoint_conf,
-                                                                  access, candidate)
-
+    # Grants endpoint access for those of /access_list/ that are valid service client candidates and do not have access
+    # to the endpoint yet, all in single request.
     @staticmethod
-    def add_access_based_on_service_client_candidate(ss_api_config, service_description, endpoint_conf, access,
-                                                     candidate):
-        endpoint = [e for e in service_description.services[0].endpoints if e.method == endpoint_conf["method"]
-                    and e.path == endpoint_conf["path"]]
-        if len(endpoint) == 0:
+    def add_access_from_list(endpoints_api, service_description, endpoints, candidates, endpoint_conf, access_list):
+        endpoint = endpoints.get((endpoint_conf["method"], endpoint_conf["path"]))
+        if endpoint is None:
             BaseController.log_info(
-                "Error adding client access rights '" + access + "' for the endpoint '"
+                "Error adding client access rights '" + ", ".join(access_list) + "' for the endpoint '"
                 + endpoint_conf["method"] + " " + endpoint_conf["path"] + "'"
                 + EndpointController.FOR_SERVICE + "'" + service_description.id
                 + "', endpoint not found")
-        else:
-            try:
-                endpoints_api = EndpointsApi(ApiClient(ss_api_config))
-                response = endpoints_api.add_endpoint_service_clients(endpoint[0].id,
-                                                                      body=ServiceClients(items=candidate))
-                if response:
-                    BaseController.log_info("Added client access rights: '" + candidate[0].id + "' for endpoint '"
-                                            + endpoint[0].method + "' '" + endpoint[0].path
-                                            + "' in service '"
-                                            + service_description.services[0].id + "'")
-            except ApiException as err:
-                if err.status == 409:
-                    BaseController.log_info(
-                        "Added client access rights: '" + candidate[
-                            0].id + "' for endpoint '" + endpoint[0].method +
-                        "' '" + endpoint[0].path + "' in service '" +
-                        service_description.services[0].id + "' already added")
-                else:
-                    BaseController.log_api_error('EndpointsApi->add_endpoint_service_clients', err)
+            return
+
+        valid_access = []
+        for access in dict.fromkeys(access_list):
+            if access in candidates:
+                valid_access.append(access)
+            else:
+                BaseController.log_info("Error adding client access rights '" + access + "' for the endpoint '"
+                                        + endpoint_conf["method"] + " " + endpoint_conf["path"]
+                                        + "'" + EndpointController.FOR_SERVICE + "'" + service_description.id
+                                        + "', no valid candidate found")
+        if not valid_access:
+            return
+
+        existing = {service_client.id for service_client in endpoints_api.get_endpoint_service_clients(endpoint.id)}
+        missing = [candidates[access] for access in valid_access if access not in existing]
+        if len(missing) < len(valid_access):
+            BaseController.log_info("Client access rights: '" + ", ".join(access for access in valid_access if access in existing) +
+                                    "' for endpoint '" + endpoint.method + "' '" + endpoint.path + "' in service '" +
+                                    service_description.services[0].id + "' already added")
+        if not missing:
+            return
+
+        try:
+            response = endpoints_api.add_endpoint_service_clients(endpoint.id, body=ServiceClients(items=missing))
+            if response:
+                BaseController.log_info("Added client access rights: '" + ", ".join(candidate.id for candidate in missing) +
+                                        "' for endpoint '" + endpoint.method + "' '" + endpoint.path + "' in service '" +
+                                        service_description.services[0].id + "'")
+        except ApiException as err:
+            if err.status == 409:
+                BaseController.log_info(
+                    "Added client access rights: '" + ", ".join(candidate.id for candidate in missing) + "' for endpoint '" +
+                    endpoint.method + "' '" + endpoint.path + "' in service '" + service_description.services[0].id + "' already added")
+            else:
+                BaseController.log_api_error('EndpointsApi->add_endpoint_service_clients', err)
 
     def get_services_description(self, config):
         for security_server in config["security_server"]:
@@ -29,7 +29,7 @@ class InitServerController(BaseController):
             active_config, insufficient_state_servers = self.regroup_server_ops(active_config, full_op_path)
             self.log_skipped_op_deps_unmet(full_op_path, insufficient_state_servers)
 
-        self.initialize_server(active_config)
+        self.run_per_server(active_config, self.initialize_server)
 
     def initialize_server(self, config):
         ss_api_conf_tuple = list(zip(config["security_server"], map(lambda ss: self.create_api_config(ss, config), config["security_server"])))
@@ -58,7 +58,7 @@ class LocalGroupController(BaseController):
             active_config, unconfigured_servers = self.regroup_server_ops(active_config, full_op_path)
             self.log_skipped_op_deps_unmet(full_op_path, unconfigured_servers)
 
-        self.add_local_group(active_config)
+        self.run_per_server(active_config, self.add_local_group)
 
     @ex(help="add members", arguments=[])
     def add_member(self):
@@ -71,7 +71,7 @@ class LocalGroupController(BaseController):
         if not self.is_autoconfig():
             active_config, unconfigured_servers = self.regroup_server_ops(active_config, full_op_path)
             self.log_skipped_op_deps_unmet(full_op_path, unconfigured_servers)
-        self.add_local_group_members(active_config)
+        self.run_per_server(active_config, self.add_local_group_members)
 
     @ex(help="List local groups", arguments=[(['--ss'], {'help': 'Security Server name', 'dest': 'ss'}),
                                              (['--client'], {'help': 'Client id', 'dest': 'client'})])
@@ -267,17 +267,22 @@ class LocalGroupController(BaseController):
     def get_local_groups_members_for_add(self, ss_api_config, security_server_conf, client_conf, local_group_conf):
         clients_api = ClientsApi(ApiClient(ss_api_config))
         client_controller = ClientController()
-        client = ClientController().find_client(clients_api, client_conf)
+        client = client_controller.find_client(clients_api, client_conf)
         local_groups_members_add = []
         try:
             local_groups = self.get_client_local_groups(clients_api, client.id, local_group_conf["code"])
             if len(local_groups) > 0:
-                all_clients = client_controller.find_all_clients(clients_api, show_members=False, internal_search=False)
-
-                for local_group_member in local_group_conf[ConfKeysSecServerClientLocalGroups.CONF_KEY_SS_CLIENT_LOCAL_GROUP_MEMBERS]:
-                    member_client = list(filter(lambda c: c.id == local_group_member, all_clients))
-                    if len(member_client) > 0:
-                        local_groups_members_add.append(member_client[0].id)
+                # Local clients are found in the client index, only members from elsewhere need the global client search.
+                client_index = client_controller.client_index(clients_api)
+                members = local_group_conf[ConfKeysSecServerClientLocalGroups.CONF_KEY_SS_CLIENT_LOCAL_GROUP_MEMBERS]
+                all_clients = []
+                if any(client_index.get(member) is None for member in members):
+                    all_clients = client_controller.find_all_clients(clients_api, show_members=False, internal_search=False) or []
+
+                for local_group_member in members:
+                    member_client = client_index.get(local_group_member) or next(filter(lambda c: c.id == local_group_member, all_clients), None)
+                    if member_client:
+                        local_groups_members_add.append(member_client.id)
                     else:
                         BaseController.log_info(
                             "Error adding member: '%s', local group: '%s', client '%s',security server: '%s',"
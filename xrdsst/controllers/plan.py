@@ -0,0 +1,339 @@
+import hashlib
+import ssl
+
+import cement.utils.fs
+from cement import ex
+from xrdsst.api import ClientsApi, EndpointsApi, ServicesApi
+from xrdsst.api_client.api_client import ApiClient
+from xrdsst.controllers.base import BaseController
+from xrdsst.controllers.client import ClientController
+from xrdsst.controllers.endpoint import EndpointController
+from xrdsst.controllers.local_group import LocalGroupController
+from xrdsst.controllers.service import ServiceController
+from xrdsst.core.conf_keys import ConfKeysSecurityServer, ConfKeysSecServerClients, ConfKeysSecServerClientServiceDesc, \
+    ConfKeysSecServerClientLocalGroups
+from xrdsst.core.util import op_node_to_ctr_cmd_text
+from xrdsst.models import ClientStatus, ServiceType
+from xrdsst.rest.rest import ApiException
+from xrdsst.resources.texts import texts
+
+
+class PlanListMapper:
+    @staticmethod
+    def headers():
+        return ['SERVER', 'OPERATION', 'CLIENT', 'CHANGE']
+
+    @staticmethod
+    def as_list(change):
+        return [change.get('security_server'),
+                change.get('operation'),
+                change.get('client'),
+                change.get('change')]
+
+    @staticmethod
+    def as_object(change):
+        return {
+            'security_server': change.get('security_server'),
+            'operation': change.get('operation'),
+            'client': change.get('client'),
+            'change': change.get('change')
+        }
+
+
+# Changes needed to bring single security server to its configured state, by operation. For every operation with
+# changes, configuration of the security server pruned down to exactly those changes is kept.
+class ServerPlan:
+    def __init__(self, security_server_conf):
+        self.security_server_conf = security_server_conf
+        self.changes = []  # (operation, client, change)
+        self._op_clients = {}  # operation : { id(client configuration) : pruned client configuration }
+        self._op_server_keys = {}  # operation : { security server configuration key : pruned value }
+
+    # Records /changes/ to be made by /operation/ for client with /client_conf/, adding given /pruned/ values to the lists
+    # under same keys in pruned configuration of the client. For security server itself (no /client_conf/), /pruned/
+    # values replace those of security server configuration, None value dropping the key.
+    def change(self, operation, client_conf, changes, **pruned):
+        if client_conf is None:
+            self._op_server_keys.setdefault(operation, {}).update(pruned)
+            client = self.security_server_conf[ConfKeysSecurityServer.CONF_KEY_NAME]
+        else:
+            op_clients = self._op_clients.setdefault(operation, {})
+            if id(client_conf) not in op_clients:
+                op_clients[id(client_conf)] = dict(client_conf, **{key: [] for key in pruned})
+            for key, value in pruned.items():
+                op_clients[id(client_conf)][key].append(value)
+            client = ClientController.partial_client_id(client_conf)
+
+        self.changes.extend((operation, client, change) for change in changes)
+
+    # Returns operations that have changes to be made, in the order of first change.
+    def operations(self):
+        return list(dict.fromkeys(change[0] for change in self.changes))
+
+    # Returns /config/ with only this security server, its configuration pruned to the changes of /operation/.
+    def op_config(self, config, operation):
+        server_conf = dict(self.security_server_conf)
+        for key, value in self._op_server_keys.get(operation, {}).items():
+            if value is None:
+                server_conf.pop(key, None)
+            else:
+                server_conf[key] = value
+        server_conf[ConfKeysSecurityServer.CONF_KEY_CLIENTS] = list(self._op_clients.get(operation, {}).values())
+        return dict(config, security_server=[server_conf])
+
+
+class PlanController(BaseController):
+    class Meta:
+        label = 'plan'
+        stacked_on = 'base'
+        stacked_type = 'nested'
+        description = texts['plan.controller.description']
+
+    @ex(help='plan', hide=True)
+    def _default(self):
+        active_config = self.load_config()
+        return self.plan_servers(active_config)
+
+    # Operations that plans are made for, resolved on every call as the operations get mocked in tests.
+    @staticmethod
+    def planned_operations():
+        return [
+            ClientController.add, ClientController.register, ClientController.update, ClientController.import_tls_certs,
+            ServiceController.add_description, ServiceController.enable_description, ServiceController.add_access,
+            ServiceController.update_parameters, EndpointController.add, EndpointController.add_access,
+            LocalGroupController.add, LocalGroupController.add_member
+        ]
+
+    def plan_servers(self, config):
+        plans = []
+        render_data = []
+        for security_server in config["security_server"]:
+            ss_api_config = self.create_api_config(security_server, config)
+            if ss_api_config is None:
+                self.log_info(texts['message.server.keyless'].format(security_server['name']))
+                continue
+
+            server_plan = self.plan_server(ss_api_config, security_server)
+            if server_plan is not None:
+                plans.append(server_plan)
+                render_data.extend(self.plan_changes(server_plan))
+                self.log_info(texts['message.plan.summary'].format(len(server_plan.changes), security_server['name'],
+                                                                   len(server_plan.operations())))
+
+        if self.is_output_tabulated():
+            render_data = [PlanListMapper.headers()] + list(map(PlanListMapper.as_list, render_data))
+        else:
+            render_data = list(map(PlanListMapper.as_object, render_data))
+        self.render(render_data)
+        return plans
+
+    def plan_changes(self, server_plan):
+        op_texts = {}
+        for op_node in self.app.OP_GRAPH:
+            operation = self.app.OP_GRAPH.nodes[op_node].get('operation')
+            if operation:
+                op_texts[operation] = op_node_to_ctr_cmd_text(self.app.OP_GRAPH, op_node)
+        return [{'security_server': server_plan.security_server_conf['name'],
+                 'operation': op_texts.get(operation, getattr(operation, '__name__', str(operation))),
+                 'client': client,
+                 'change': change} for operation, client, change in server_plan.changes]
+
+    # Returns plan of the changes for security server to reach configured state, with all of the security server state
+    # needed read once, or None if the state could not be read.
+    @staticmethod
+    def plan_server(ss_api_config, security_server_conf):
+        server_plan = ServerPlan(security_server_conf)
+        clients_api = ClientsApi(ApiClient(ss_api_config))
+        try:
+            client_index = ClientController.client_index(clients_api)
+            PlanController.plan_server_tls_certificates(server_plan, clients_api, client_index, security_server_conf)
+            for client_conf in security_server_conf.get(ConfKeysSecurityServer.CONF_KEY_CLIENTS) or []:
+                PlanController.plan_client(server_plan, ss_api_config, clients_api, client_index, client_conf)
+        except ApiException as err:
+            BaseController.log_api_error('PlanController->plan_server', err)
+            return None
+        return server_plan
+
+    @staticmethod
+    def plan_server_tls_certificates(server_plan, clients_api, client_index, security_server_conf):
+        tls_certs = security_server_conf.get(ConfKeysSecurityServer.CONF_KEY_TLS_CERTS)
+        if not tls_certs:
+            return
+        owners = client_index.find(security_server_conf['owner_member_class'], security_server_conf['owner_member_code'])
+        missing = PlanController.missing_tls_certificates(clients_api, owners[0] if len(owners) == 1 else None, tls_certs)
+        if missing:
+            server_plan.change(ClientController.import_tls_certs, None, ["TLS certificate '" + cert + "'" for cert in missing],
+                               tls_certificates=missing)
+        else:
+            server_plan.change(ClientController.import_tls_certs, None, [], tls_certificates=None)
+
+    @staticmethod
+    def plan_client(server_plan, ss_api_config, clients_api, client_index, client_conf):
+        found_clients = client_index.find(client_conf['member_class'], client_conf['member_code'], client_conf.get('subsystem_code'),
+                                          client_conf.get('member_name'))
+        if len(found_clients) > 1:
+            BaseController.log_info(
+                client_conf["member_name"] + ": Error, multiple matching clients found for " + ClientController.partial_client_id(client_conf)
+            )
+            return
+        client = found_clients[0] if found_clients else None
+
+        if client is None:
+            server_plan.change(ClientController.add, client_conf, ['add client'])
+        if client is None or client.status == ClientStatus.SAVED:
+            server_plan.change(ClientController.register, client_conf, ['register client'])
+        if client is not None and client_conf.get('connection_type') and client.connection_type != client_conf['connection_type']:
+            server_plan.change(ClientController.update, client_conf,
+                               ["connection type '" + str(client.connection_type) + "' -> '" + client_conf['connection_type'] + "'"])
+
+        tls_certs = client_conf.get(ConfKeysSecServerClients.CONF_KEY_SS_CLIENT_TLS_CERTIFICATES)
+        if tls_certs:
+            missing = PlanController.missing_tls_certificates(clients_api, client, tls_certs)
+            if missing:
+                server_plan.change(ClientController.import_tls_certs, client_conf, ["TLS certificate '" + cert + "'" for cert in missing],
+                                   tls_certificates=missing)
+
+        service_descriptions = ServiceController.client_service_descriptions(clients_api, client.id) if client else {}
+        for service_description_conf in client_conf.get(ConfKeysSecServerClients.CONF_KEY_SS_CLIENT_SERVICE_DESCS) or []:
+            PlanController.plan_service_description(server_plan, ss_api_config, client_conf, service_description_conf,
+                                                    service_descriptions.get((service_description_conf['url'], service_description_conf['type'])))
+
+        if client_conf.get(ConfKeysSecServerClients.CONF_KEY_LOCAL_GROUPS) and \
+                ConfKeysSecServerClients.CONF_KEY_SS_CLIENT_SUBSYSTEM_CODE in client_conf:
+            PlanController.plan_local_groups(server_plan, clients_api, client, client_conf)
+
+    @staticmethod
+    def plan_service_description(server_plan, ss_api_config, client_conf, service_description_conf, service_description):
+        sd_text = "service description '" + service_description_conf['url'] + "'"
+        if service_description is None:
+            server_plan.change(ServiceController.add_description, client_conf, ['add ' + sd_text],
+                               service_descriptions=service_description_conf)
+        if service_description is None or service_description.disabled:
+            server_plan.change(ServiceController.enable_description, client_conf, ['enable ' + sd_text],
+                               service_descriptions=service_description_conf)
+
+        missing_access = PlanController.missing_service_access(ss_api_config, service_description_conf, service_description)
+        if missing_access:
+            server_plan.change(ServiceController.add_access, client_conf,
+                               ["access for '" + access + "' to " + service for service, access in missing_access],
+                               service_descriptions=service_description_conf)
+
+        if service_description_conf.get(ConfKeysSecServerClientServiceDesc.CONF_KEY_SS_CLIENT_SERVICE_DESC_SERVICES) and \
+                (service_description is None or PlanController.service_parameters_differ(service_description_conf, service_description)):
+            server_plan.change(ServiceController.update_parameters, client_conf, ['update service parameters of ' + sd_text],
+                               service_descriptions=service_description_conf)
+
+        if service_description_conf['type'] != ServiceType().WSDL and \
+                service_description_conf.get(ConfKeysSecServerClientServiceDesc.CONF_KEY_SS_CLIENT_SERVICE_DESC_ENDPOINTS):
+            PlanController.plan_endpoints(server_plan, ss_api_config, client_conf, service_description_conf, service_description)
+
+    @staticmethod
+    def plan_endpoints(server_plan, ss_api_config, client_conf, service_description_conf, service_description):
+        endpoints = {}
+        if service_description is not None and service_description.services:
+            endpoints = {(endpoint.method, endpoint.path): endpoint for endpoint in service_description.services[0].endpoints or []}
+
+        endpoints_api = EndpointsApi(ApiClient(ss_api_config))
+        missing_endpoints = []
+        missing_access_endpoints = []
+        for endpoint_conf in service_description_conf[ConfKeysSecServerClientServiceDesc.CONF_KEY_SS_CLIENT_SERVICE_DESC_ENDPOINTS]:
+            endpoint = endpoints.get((endpoint_conf['method'], endpoint_conf['path']))
+            if endpoint is None:
+                missing_endpoints.append(endpoint_conf)
+            access_list = endpoint_conf.get('access') or []
+            if access_list and endpoint is not None:
+                existing = {service_client.id for service_client in endpoints_api.get_endpoint_service_clients(endpoint.id)}
+                access_list = [access for access in access_list if access not in existing]
+            if access_list:
+                missing_access_endpoints.append(dict(endpoint_conf, access=access_list))
+
+        if missing_endpoints:
+            server_plan.change(EndpointController.add, client_conf,
+                               ["endpoint '" + endpoint_conf['method'] + " " + endpoint_conf['path'] + "'" for endpoint_conf in missing_endpoints],
+                               service_descriptions=dict(service_description_conf, endpoints=missing_endpoints))
+        if missing_access_endpoints:
+            server_plan.change(EndpointController.add_access, client_conf,
+                               ["access for '" + access + "' to endpoint '" + endpoint_conf['method'] + " " + endpoint_conf['path'] + "'"
+                                for endpoint_conf in missing_access_endpoints for access in endpoint_conf['access']],
+                               service_descriptions=dict(service_description_conf, endpoints=missing_access_endpoints))
+
+    @staticmethod
+    def plan_local_groups(server_plan, clients_api, client, client_conf):
+        local_groups = {}
+        if client is not None:
+            local_groups = {local_group.code: local_group for local_group in clients_api.get_client_local_groups(client.id)}
+
+        for local_group_conf in client_conf[ConfKeysSecServerClients.CONF_KEY_LOCAL_GROUPS]:
+            code = local_group_conf[ConfKeysSecServerClientLocalGroups.CONF_KEY_SS_CLIENT_LOCAL_GROUP_CODE]
+            local_group = local_groups.get(code)
+            if local_group is None:
+                server_plan.change(LocalGroupController.add, client_conf, ["local group '" + code + "'"], local_groups=local_group_conf)
+
+            members = local_group_conf.get(ConfKeysSecServerClientLocalGroups.CONF_KEY_SS_CLIENT_LOCAL_GROUP_MEMBERS) or []
+            if local_group is not None:
+                existing = {member.id for member in local_group.members or []}
+                members = [member for member in members if member not in existing]
+            if members:
+                server_plan.change(LocalGroupController.add_member, client_conf,
+                                   ["member '" + member + "' of local group '" + code + "'" for member in members],
+                                   local_groups=dict(local_group_conf, members=members))
+
+    # Returns (service id, access) pairs of the configured access rights that services of /service_description/ lack.
+    @staticmethod
+    def missing_service_access(ss_api_config, service_description_conf, service_description):
+        if not ServiceController.has_service_access(service_description_conf):
+            return []
+
+        if service_description is None:
+            return [(service_description_conf['url'], access) for access in service_description_conf.get('access') or []] + \
+                   [(service['service_code'], access)
+                    for service in service_description_conf.get('services') or [] for access in service.get('access') or []]
+
+        services_api = ServicesApi(ApiClient(ss_api_config))
+        missing = []
+        for service in service_description.services or []:
+            access_list = ServiceController.get_service_access_list(service_description_conf, service)
+            if access_list:
+                existing = {service_client.id for service_client in services_api.get_service_service_clients(id=service.id)}
+                missing.extend((service.id, access) for access in dict.fromkeys(access_list) if access not in existing)
+        return missing
+
+    # Returns true if any configured service parameter differs from the one of the services in /service_description/,
+    # parameters applied to all services of description are compared against all of them.
+    @staticmethod
+    def service_parameters_differ(service_description_conf, service_description):
+        services = service_description.services or []
+        for service_conf in service_description_conf[ConfKeysSecServerClientServiceDesc.CONF_KEY_SS_CLIENT_SERVICE_DESC_SERVICES]:
+            if not any(service.service_code == service_conf['service_code'] for service in services):
+                continue
+            for service in services:
+                own = service.service_code == service_conf['service_code']
+                for key, all_key, convert in [('url', 'url_all', str), ('timeout', 'timeout_all', int), ('ssl_auth', 'ssl_auth_all', bool)]:
+                    if key in service_conf and (own or service_description_conf.get(all_key)) and \
+                            convert(service_conf[key]) != convert(getattr(service, key)):
+                        return True
+        return False
+
+    # Returns those of /tls_certs/ files not yet among TLS certificates of /client/, all of them when there is no client.
+    @staticmethod
+    def missing_tls_certificates(clients_api, client, tls_certs):
+        if client is None:
+            return list(tls_certs)
+
+        existing = {str(cert.hash).replace(':', '').upper() for cert in clients_api.get_client_tls_certificates(client.id)}
+        return [tls_cert for tls_cert in tls_certs if PlanController.tls_certificate_hash(tls_cert) not in existing]
+
+    # Returns SHA-1 hash of the certificate in PEM or DER file, as X-Road presents certificate hashes, None if unreadable.
+    @staticmethod
+    def tls_certificate_hash(tls_cert):
+        location = cement.utils.fs.join_exists(tls_cert)
+        if not location[1]:
+            return None
+        try:
+            with open(location[0], "rb") as cert_file:
+                cert_data = cert_file.read()
+            if cert_data.lstrip().startswith(b'-----BEGIN'):
+                cert_data = ssl.PEM_cert_to_DER_cert(cert_data.decode('ascii'))
+            return hashlib.sha1(cert_data).hexdigest().upper()
+        except (OSError, ValueError):
+            return None
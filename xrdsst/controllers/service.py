@@ -1,3 +1,6 @@
+import threading
+import weakref
+
 from cement import ex
 from xrdsst.api import ClientsApi, ServiceDescriptionsApi, ServicesApi
 from xrdsst.api_client.api_client import ApiClient
@@ -6,11 +9,15 @@ from xrdsst.controllers.client import ClientController
 from xrdsst.core.util import parse_argument_list, cut_big_string
 from xrdsst.models import ServiceDescriptionAdd, ServiceClients, ServiceUpdate, ServiceDescriptionUpdate, ServiceType, ServiceDescriptionDisabledNotice, \
     ServiceClient
-from xrdsst.rest.rest import ApiException
+from xrdsst.rest.rest import ApiException, retry_safe
 from xrdsst.resources.texts import texts
 from xrdsst.core.conf_keys import ConfKeysSecServerClientServiceDesc, ConfKeysSecServerClients
 
 
+_SERVICE_DESCRIPTIONS = weakref.WeakKeyDictionary()  # API configuration : { client id : { (url, type) : ServiceDescription } }
+_SERVICE_DESCRIPTIONS_LOCK = threading.Lock()
+
+
 class ServiceDescriptionListMapper:
     @staticmethod
     def headers():
@@ -126,7 +133,7 @@ class ServiceController(BaseController):
             active_config, unconfigured_servers = self.regroup_server_ops(active_config, full_op_path)
             self.log_skipped_op_deps_unmet(full_op_path, unconfigured_servers)
 
-        self.add_service_description(active_config)
+        self.run_per_server(active_config, self.add_service_description)
 
     @ex(help="Enable service description", arguments=[])
     def enable_description(self):
@@ -140,7 +147,7 @@ class ServiceController(BaseController):
             active_config, unconfigured_servers = self.regroup_server_ops(active_config, full_op_path)
             self.log_skipped_op_deps_unmet(full_op_path, unconfigured_servers)
 
-        self.enable_service_description(active_config)
+        self.run_per_server(active_config, self.enable_service_description)
 
     @ex(help="Add access rights for service", arguments=[])
     def add_access(self):
@@ -154,7 +161,7 @@ class ServiceController(BaseController):
             active_config, unconfigured_servers = self.regroup_server_ops(active_config, full_op_path)
             self.log_skipped_op_deps_unmet(full_op_path, unconfigured_servers)
 
-        self.add_access_rights(active_config)
+        self.run_per_server(active_config, self.add_access_rights)
 
     @ex(label='update-parameters', help="Update service parameters", arguments=[])
     def update_parameters(self):
@@ -168,7 +175,7 @@ class ServiceController(BaseController):
             active_config, unconfigured_servers = self.regroup_server_ops(active_config, full_op_path)
             self.log_skipped_op_deps_unmet(full_op_path, unconfigured_servers)
 
-        self.update_service_parameters(active_config)
+        self.run_per_server(active_config, self.update_service_parameters)
 
     @ex(help="List service descriptions", arguments=[(['--client'], {'help': 'Client id', 'dest': 'client'})])
     def list_descriptions(self):
@@ -424,6 +431,7 @@ class ServiceController(BaseController):
             if client:
                 try:
                     response = clients_api.add_client_service_description(client.id, body=description_add)
+                    ServiceController.invalidate_client_service_descriptions(ss_api_config, client.id)
                     if response:
                         BaseController.log_info(
                             "Added service description for client '" + client.id + "' with type '" + response.type + "' and url '" + response.url +
@@ -450,6 +458,7 @@ class ServiceController(BaseController):
                     if service_description:
                         try:
                             service_descriptions_api.enable_service_description(service_description.id)
+                            self.invalidate_client_service_descriptions(ss_api_config, client.id)
                             BaseController.log_info(ServiceController.SERVICE_DESCRIPTION_FOR + "'" + client_controller.partial_client_id(client_conf) +
                                                     "'" + ServiceController.WITH_ID + "'" + service_description.id + "' enabled successfully.")
                         except ApiException as err:
@@ -484,66 +493,91 @@ class ServiceController(BaseController):
                 try:
                     service_description = self.get_client_service_description(clients_api, client, service_description_conf)
                     if service_description:
-                        for service in service_description.services:
-                            self.remote_add_access_rights_for_service(ss_api_config,
-                                                                      service_description_conf,
-                                                                      client_controller,
-                                                                      clients_api,
-                                                                      client,
-                                                                      service)
+                        self.remote_add_access_rights_for_services(ss_api_config,
+                                                                   service_description_conf,
+                                                                   client_controller,
+                                                                   clients_api,
+                                                                   client,
+                                                                   service_description)
                 except ApiException as find_err:
                     BaseController.log_api_error(ClientController.CLIENTS_API_GET_CLIENT_SERVICE_DESCRIPTION, find_err)
         except ApiException as find_err:
             BaseController.log_api_error(ClientController.CLIENTS_API_FIND_CLIENTS, find_err)
 
-    def remote_add_access_rights_for_service(self,
-                                             ss_api_config,
-                                             service_description_conf,
-                                             client_controller,
-                                             clients_api,
-                                             client,
-                                             service):
+    # Grants access rights configured for the services of /service_description/. Service client candidates are fetched once
+    # per client and reused across its service descriptions, and only the grants services do not have yet are added,
+    # outcome is reported in a single summary.
+    def remote_add_access_rights_for_services(self,
+                                              ss_api_config,
+                                              service_description_conf,
+                                              client_controller,
+                                              clients_api,
+                                              client,
+                                              service_description):
+        services_api = ServicesApi(ApiClient(ss_api_config))
+        candidates = None
+        added_services, added_grants, present_grants, failed_services = 0, 0, 0, 0
+        unavailable = set()
+        for service in service_description.services:
+            access_list = self.get_service_access_list(service_description_conf, service)
+            if not access_list:
+                continue
+
+            missing = []
+            try:
+                if candidates is None:
+                    candidates = client_controller.service_client_candidates(clients_api, client.id) or {}
+                existing = {service_client.id for service_client in services_api.get_service_service_clients(id=service.id)}
+                present_grants += len([access for access in access_list if access in existing])
+                unavailable.update(access for access in access_list if access not in existing and access not in candidates)
+                missing = [candidates[access] for access in dict.fromkeys(access_list) if access not in existing and access in candidates]
+                if missing:
+                    with retry_safe():  # Grants added by lost attempt show up as 409, recounted below
+                        services_api.add_service_service_clients(service.id, body=ServiceClients(items=missing))
+                    added_services += 1
+                    added_grants += len(missing)
+                    BaseController.log_debug("Added access rights for " + str([m.id for m in missing]) + " to use service '" + service.id + "'")
+            except ApiException as err:
+                if err.status == 409:  # Granted meanwhile, by someone else.
+                    present_grants += self.count_present_service_clients(services_api, service, missing)
+                    BaseController.log_info("Access rights for client '" + client.id + "' using service '" + service.id + "' already added")
+                else:
+                    failed_services += 1
+                    BaseController.log_api_error('ServicesApi->add_service_service_clients', err)
+
+        if candidates is None:
+            return
+
+        BaseController.log_info(
+            ("Added access rights" if added_grants else "No access rights to add") +
+            " for client '" + client.id + "' service description '" + service_description.url + "': " +
+            str(added_grants) + " added to " + str(added_services) + " services, " + str(present_grants) + " already given" +
+            ((", " + str(failed_services) + " services failed") if failed_services else "") + "."
+        )
+        if unavailable:
+            BaseController.log_info("Could not add access rights for client '" + client.id + "' service description '" + service_description.url +
+                                    "' to " + str(sorted(unavailable)) + ", service clients candidates not found")
+
+    # Returns how many of /service_clients/ have access to /service/ now, re-reading the service clients of /service/.
+    @staticmethod
+    def count_present_service_clients(services_api, service, service_clients):
         try:
-            services_api = ServicesApi(ApiClient(ss_api_config))
-            access_list = service_description_conf["access"] if "access" in service_description_conf else []
-            configurable_services = service_description_conf["services"] if "services" in service_description_conf else []
-            for configurable_service in configurable_services:
-                if service.service_code == configurable_service["service_code"]:
-                    service_access_list = configurable_service["access"] if "access" in configurable_service else []
-                    access_list = service_access_list if len(service_access_list) > 0 else access_list
-
-            self.remote_add_access_from_access_list(client_controller,
-                                                    clients_api,
-                                                    services_api,
-                                                    client,
-                                                    service,
-                                                    access_list)
+            existing = {service_client.id for service_client in services_api.get_service_service_clients(id=service.id)}
         except ApiException as err:
-            if err.status == 409:
-                BaseController.log_info("Access rights for client '" + client.id + "' using service '" + service.id + "' already added")
-            else:
-                BaseController.log_api_error('ServicesApi->add_service_service_clients', err)
+            BaseController.log_api_error('ServicesApi->get_service_service_clients', err)
+            return 0
+        return len([service_client for service_client in service_clients if service_client.id in existing])
 
+    # Returns access list of /service/, service specific access list taking precedence over service description wide one.
     @staticmethod
-    def remote_add_access_from_access_list(client_controller,
-                                           clients_api,
-                                           services_api,
-                                           client,
-                                           service,
-                                           access_list):
-        if len(access_list) > 0:
-            service_clients_candidates = client_controller.get_clients_service_client_candidates(clients_api, client.id, access_list)
-            if len(service_clients_candidates) == 0:
-                BaseController.log_info("Could not add access rights for client '" + client.id +
-                                        "' for using service '"
-                                        + service.id + "',service clients candidates not found)")
-            else:
-                response = services_api.add_service_service_clients(service.id,
-                                                                    body=ServiceClients(items=service_clients_candidates))
-                if response:
-                    for service_clients in service_clients_candidates:
-                        BaseController.log_info("Added access rights for client '" + service_clients.id +
-                                                "' to use service '" + service.id + "' (full id " + response[0].id + ")")
+    def get_service_access_list(service_description_conf, service):
+        access_list = service_description_conf["access"] if "access" in service_description_conf else []
+        configurable_services = service_description_conf["services"] if "services" in service_description_conf else []
+        for configurable_service in configurable_services:
+            if service.service_code == configurable_service["service_code"]:
+                service_access_list = configurable_service["access"] if "access" in configurable_service else []
+                access_list = service_access_list if len(service_access_list) > 0 else access_list
+        return access_list or []
 
     def update_client_service_parameters(self, ss_api_config, security_server):
         for client in security_server["clients"]:
@@ -650,6 +684,7 @@ class ServiceController(BaseController):
                     if service_description:
                         for service in service_description.services:
                             self.remote_update_service_parameter(ss_api_config, service_description_conf, service)
+                        self.invalidate_client_service_descriptions(ss_api_config, client.id)
                 except ApiException as find_err:
                     BaseController.log_api_error(ClientController.CLIENTS_API_GET_CLIENT_SERVICE_DESCRIPTION, find_err)
         except ApiException as find_err:
@@ -742,6 +777,7 @@ class ServiceController(BaseController):
                     try:
                         service_descriptions_api = ServiceDescriptionsApi(ApiClient(ss_api_config))
                         service_descriptions_api.delete_service_description(id=service_description.id)
+                        ServiceController.invalidate_client_service_descriptions(ss_api_config, client_id)
                         BaseController.log_info(ServiceController.SERVICE_DESCRIPTION_FOR + "'" + client_id +
                                                 "'" + ServiceController.WITH_ID + "'" + service_description.id + "' deleted successfully.")
                     except ApiException as err:
@@ -833,6 +869,7 @@ class ServiceController(BaseController):
                                                                       type=service_description.type,
                                                                       ignore_warnings=True)
             response = service_descriptions_api.update_service_description(service_description.id, body=service_description_update)
+            ServiceController.invalidate_client_service_descriptions(ss_api_config, client)
             BaseController.log_info(ServiceController.SERVICE_DESCRIPTION_FOR + "'" + client +
                                     "'" + ServiceController.WITH_ID + "'" + service_description.id + "' updated successfully.")
             return response
@@ -844,6 +881,7 @@ class ServiceController(BaseController):
         try:
             service_descriptions_api = ServiceDescriptionsApi(ApiClient(ss_api_config))
             response = service_descriptions_api.refresh_service_description(service_description.id)
+            ServiceController.invalidate_client_service_descriptions(ss_api_config, client_id)
             BaseController.log_info(ServiceController.SERVICE_DESCRIPTION_FOR + "'" + client_id +
                                     "'" + ServiceController.WITH_ID + "'" + service_description.id + "' refreshed successfully.")
             return response
@@ -856,6 +894,7 @@ class ServiceController(BaseController):
             service_descriptions_api = ServiceDescriptionsApi(ApiClient(ss_api_config))
             service_description_disabled_notice = ServiceDescriptionDisabledNotice(disabled_notice=notice)
             service_descriptions_api.disable_service_description(service_description.id, body=service_description_disabled_notice)
+            ServiceController.invalidate_client_service_descriptions(ss_api_config, client_id)
             BaseController.log_info(ServiceController.SERVICE_DESCRIPTION_FOR + "'" + client_id +
                                     "'" + ServiceController.WITH_ID + "'" + service_description.id + "' disabled successfully.")
         except ApiException as err:
@@ -917,12 +956,34 @@ class ServiceController(BaseController):
 
     @staticmethod
     def get_client_service_description(clients_api, client, service_description_conf):
-        url = service_description_conf['url']
-        service_type = service_description_conf['type']
-        service_descriptions = clients_api.get_client_service_descriptions(client.id)
-        for service_description in service_descriptions:
-            if service_description.url == url and service_description.type == service_type:
-                return service_description
+        return ServiceController.client_service_descriptions(clients_api, client.id).get(
+            (service_description_conf['url'], service_description_conf['type'])
+        )
+
+    # Returns service descriptions of client with /client_id/ by (url, type), queried once and reused until invalidated.
+    @staticmethod
+    def client_service_descriptions(clients_api, client_id):
+        api_config = clients_api.api_client.configuration
+        with _SERVICE_DESCRIPTIONS_LOCK:
+            service_descriptions = _SERVICE_DESCRIPTIONS.get(api_config, {}).get(client_id)
+        if service_descriptions is None:
+            service_descriptions = {}
+            for service_description in clients_api.get_client_service_descriptions(client_id):
+                service_descriptions.setdefault((service_description.url, service_description.type), service_description)
+            with _SERVICE_DESCRIPTIONS_LOCK:
+                _SERVICE_DESCRIPTIONS.setdefault(api_config, {})[client_id] = service_descriptions
+        return service_descriptions
+
+    # Drops cached service descriptions of client with /client_id/, of all clients if None, to be used after changing them.
+    @staticmethod
+    def invalidate_client_service_descriptions(ss_api_config, client_id=None):
+        if ss_api_config is None:
+            return
+        with _SERVICE_DESCRIPTIONS_LOCK:
+            if client_id is None:
+                _SERVICE_DESCRIPTIONS.pop(ss_api_config, None)
+            else:
+                _SERVICE_DESCRIPTIONS.get(ss_api_config, {}).pop(client_id, None)
 
     @staticmethod
     def has_service_access(service_desc_conf):
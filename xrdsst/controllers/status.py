@@ -1,7 +1,15 @@
+import time
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import urllib3
 from cement import ex
 
 from xrdsst.controllers.base import BaseController
-from xrdsst.core.api_util import ServerStatus, status_server, StatusRoles
+from xrdsst.core.api_util import ServerStatus, StatusRoles, StatusFacet
+from xrdsst.core.conf_keys import ConfKeysSecurityServer
+from xrdsst.core.util import reset_connectivity
 from xrdsst.resources.texts import texts
 
 
@@ -106,15 +114,109 @@ class StatusController(BaseController):
         stacked_on = 'base'
         stacked_type = 'nested'
         description = texts['status.controller.description']
+        arguments = [
+            (['--watch'], {'help': texts['status.parameter.watch.description'], 'metavar': 'SECONDS', 'type': float, 'dest': 'watch'}),
+            (['--budget'], {'help': texts['status.parameter.budget.description'], 'metavar': 'SECONDS', 'type': float, 'dest': 'budget'})
+        ]
+
+    # Status facets that can change while the security servers are watched, the rest are kept as first collected.
+    # Initialization is watched too, token and certificate statuses are queried only for initialized servers.
+    WATCHED_FACETS = (StatusFacet.INIT, StatusFacet.GLOBAL, StatusFacet.TOKEN, StatusFacet.KEYS_AND_CERTS)
 
     @ex(help='status', hide=True)
     def _default(self):
-        return self._status(self.load_config())  # Returned for status comparisons in tests only
+        config = self.load_config()
+        servers = self._status(config)
+        interval = self.watch_interval()
+        if interval and config.get("security_server"):
+            self._watch(config, servers, interval, self.watch_budget(interval))
+        return servers  # Returned for status comparisons in tests only
+
+    # Returns status refresh interval in seconds when watching statuses, None for one-shot status.
+    def watch_interval(self):
+        interval = getattr(self.app.pargs, 'watch', None) if self.app.pargs else None
+        return interval if interval and interval > 0 else None
+
+    def watch_budget(self, interval):
+        budget = getattr(self.app.pargs, 'budget', None) if self.app.pargs else None
+        return budget if budget and budget > 0 else interval
+
+    # Refreshes statuses of all security servers concurrently every /interval/ seconds, for at most /rounds/ times
+    # (until interrupted if not given), rendering only servers with changed status. Refreshes taking longer than
+    # /budget/ seconds are not waited for, previous status of such server is retained until the refresh completes.
+    def _watch(self, config, servers, interval, budget, rounds=None):
+        security_servers = config["security_server"]
+        rows = [StatusListMapper.as_list(server_status) for server_status in servers]
+        refreshing = {}  # server index : Future
+
+        with ThreadPoolExecutor(max_workers=len(security_servers), thread_name_prefix='xrdsst-watch') as executor:
+            completed_rounds = 0
+            next_round = time.monotonic() + interval
+            while rounds is None or completed_rounds < rounds:
+                time.sleep(max(0.0, next_round - time.monotonic()))
+                next_round = time.monotonic() + interval  # Rounds start every /interval/, however long they take.
+                completed_rounds += 1
+                for ix, security_server in enumerate(security_servers):
+                    if ix not in refreshing:
+                        refreshing[ix] = executor.submit(self.watch_server_status, security_server, config, servers[ix])
+                futures.wait(list(refreshing.values()), timeout=budget)
+
+                changed = []
+                for ix in sorted(refreshing):
+                    if not refreshing[ix].done():
+                        print(texts['message.status.watch.over_budget'].format(security_servers[ix]['name'], budget))
+                        continue
+                    try:
+                        servers[ix] = refreshing.pop(ix).result()
+                    except Exception as err:
+                        self.log_api_error('StatusController->watch:', err)
+                        continue
+                    row = StatusListMapper.as_list(servers[ix])
+                    if row != rows[ix]:
+                        rows[ix] = row
+                        changed.append(ix)
+
+                self.render_changes(servers, changed)
+
+    # Returns refreshed status of the /security_server/. Only watched facets of accessible server are queried anew,
+    # previously inaccessible server gets its connectivity tested again and complete status collected. Server that
+    # cannot be connected during refresh is given status without access.
+    def watch_server_status(self, security_server, config, server_status):
+        api_config = self.create_api_config(security_server, config)
+        if api_config is None:
+            return server_status
+
+        if server_status.connectivity_status and server_status.connectivity_status[0] and server_status.roles_status.permitted:
+            try:
+                return self.refresh_server_status(api_config, security_server, server_status, self.WATCHED_FACETS)
+            except (urllib3.exceptions.HTTPError, ConnectionError) as err:
+                print(texts['message.status.watch.unreachable'].format(security_server['name'], str(err)))
+                return ServerStatus(
+                    connectivity_status=(False, str(err)),
+                    security_server_name=security_server['name'],
+                    roles_status=StatusRoles(permitted=False, roles=None)
+                )
+
+        reset_connectivity([security_server[ConfKeysSecurityServer.CONF_KEY_URL]])
+        return self.get_server_status(api_config, security_server)
+
+    def render_changes(self, servers, changed):
+        if not changed:
+            return
+
+        if self.is_output_tabulated():
+            print(texts['message.status.watch.changes'].format(len(changed), len(servers), datetime.now().strftime('%H:%M:%S')))
+            render_data = [StatusListMapper.headers()]
+            render_data.extend(StatusListMapper.as_list(servers[ix]) for ix in changed)
+        else:
+            render_data = [StatusListMapper.as_object(servers[ix]) for ix in changed]
+        self.render(render_data)
 
     def _status(self, config):
         render_data = []
         servers = []
         if config.get("security_server"):
+            self.preflight_connectivity(config)
             for security_server in config["security_server"]:
                 ss_api_config = self.create_api_config(security_server, config)
                 if ss_api_config is None:
@@ -123,7 +225,7 @@ class StatusController(BaseController):
                         roles_status=StatusRoles()
                     ))
                 else:
-                    servers.append(self.remote_status(ss_api_config, security_server))
+                    servers.append(self.cached_server_status(ss_api_config, security_server, config))
 
         if self.is_output_tabulated():
             render_data = [StatusListMapper.headers()]
@@ -136,7 +238,3 @@ class StatusController(BaseController):
             print(texts['message.config.serverless'])
 
         return servers
-
-    @staticmethod
-    def remote_status(ss_configuration, security_server):
-        return status_server(ss_configuration, security_server)
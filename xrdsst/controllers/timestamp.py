@@ -63,7 +63,7 @@ class TimestampController(BaseController):
             active_config, insufficient_state_servers = self.regroup_server_ops(active_config, full_op_path)
             self.log_skipped_op_deps_unmet(full_op_path, insufficient_state_servers)
 
-        self.timestamp_service_init(active_config)
+        self.run_per_server(active_config, self.timestamp_service_init)
 
     def timestamp_service_list(self, config):
         ss_api_conf_tuple = list(zip(config["security_server"], map(lambda ss: self.create_api_config(ss, config), config["security_server"])))
@@ -91,7 +91,7 @@ class TokenController(BaseController):
             active_config, insufficient_state_servers = self.regroup_server_ops(active_config, full_op_path)
             self.log_skipped_op_deps_unmet(full_op_path, insufficient_state_servers)
 
-        self.token_login(active_config)
+        self.run_per_server(active_config, self.token_login)
 
     @ex(help="Initializes two token keys with corresponding AUTH and SIGN CSR generated")
     def init_keys(self):
@@ -105,13 +105,13 @@ class TokenController(BaseController):
             active_config, insufficient_state_servers = self.regroup_server_ops(active_config, full_op_path)
             self.log_skipped_op_deps_unmet(full_op_path, insufficient_state_servers)
 
-        self.token_add_keys_with_csrs(active_config)
+        self.run_per_server(active_config, self.token_add_keys_with_csrs)
 
     @ex(help="Initializes new keys for renew the certificates")
     def create_new_keys(self):
         active_config = self.load_config()
 
-        self.token_add_keys_with_csrs(active_config, True)
+        self.run_per_server(active_config, lambda config: self.token_add_keys_with_csrs(config, True))
 
     def token_list(self, config):
         ss_api_conf_tuple = list(zip(config["security_server"], map(lambda ss: self.create_api_config(ss, config), config["security_server"])))
@@ -1,7 +1,6 @@
-import subprocess
-
 from cement import ex
 from xrdsst.controllers.base import BaseController
+from xrdsst.core.ssh import ssh_transport
 from xrdsst.core.util import get_admin_credentials, get_ssh_key, get_ssh_user
 from xrdsst.resources.texts import texts
 
@@ -32,7 +31,7 @@ class UserController(BaseController):
 
     @ex(help="Create admin user", arguments=[])
     def create_admin(self):
-        self.create_user(self.load_config())
+        self.run_per_server(self.load_config(), self.create_user)
 
     def create_user(self, conf):
         user_created = []
@@ -56,30 +55,23 @@ class UserController(BaseController):
                           ' created.')
         return user_created
 
+    # Runs all the commands over the shared SSH transport, i.e. on single multiplexed SSH connection to the server.
     def add_user_with_groups(self, groups, user_name, pwd, ssh_key, ssh_user, security_server):
         self.log_debug('Adding user \'' + user_name + '\' into groups \'' + str(groups) + '\' for security server: ' + security_server['name'])
+        address = self.security_server_address(security_server)
         ubuntu_cmd = "sudo adduser --quiet --disabled-password --gecos '' {} --shell /bin/false".format(user_name)
         centos_cmd = "sudo adduser {} -c '' --shell /bin/false".format(user_name)
         cmd = ubuntu_cmd + ' || ' + centos_cmd
-        add_user_cmd = 'ssh -o IdentitiesOnly=yes -o UserKnownHostsFile=/dev/null -o StrictHostKeyChecking=no -o LogLevel=ERROR -i "{}" {}@{} "{}"'.format(
-            ssh_key, ssh_user, self.security_server_address(security_server), cmd)
-        exitcode, data = subprocess.getstatusoutput(add_user_cmd)
+        exitcode, data = ssh_transport().run(ssh_key, ssh_user, address, cmd)
         if exitcode == 0:
             cmd = "echo -e '{}\n{}\n' | sudo passwd {}".format(pwd, pwd, user_name)
-            add_user_cmd = 'ssh -o IdentitiesOnly=yes -o UserKnownHostsFile=/dev/null -o StrictHostKeyChecking=no -o LogLevel=ERROR -i "{}" {}@{} "{}"'.format(
-                ssh_key, ssh_user, self.security_server_address(security_server), cmd)
-            exitcode, data = subprocess.getstatusoutput(add_user_cmd)
+            exitcode, data = ssh_transport().run(ssh_key, ssh_user, address, cmd)
             if exitcode == 0:
                 for group in groups:
                     ubuntu_cmd = "sudo adduser {} {}".format(user_name, group)
                     centos_cmd = "sudo usermod -a -G {} {}".format(group, user_name)
                     cmd = ubuntu_cmd + ' || ' + centos_cmd
-                    user_mod_cmd = 'ssh -o IdentitiesOnly=yes -o UserKnownHostsFile=/dev/null -o StrictHostKeyChecking=no ' \
-                                   + '-o LogLevel=ERROR -i "{}" {}@{} "{}"'.format(ssh_key,
-                                                                                   ssh_user,
-                                                                                   self.security_server_address(security_server),
-                                                                                   cmd)
-                    exitcode, data = subprocess.getstatusoutput(user_mod_cmd)
+                    exitcode, data = ssh_transport().run(ssh_key, ssh_user, address, cmd)
                     if exitcode != 0:
                         raise UserException("UserController->create_user: Adding user to group for {0} failed "
                                             "(exit_code = {1}, data = {2})".format(security_server['name'], exitcode, data))
@@ -0,0 +1,113 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from cryptography.fernet import Fernet, InvalidToken
+
+from xrdsst.core.conf_keys import ConfKeysRoot, ConfKeysApiKeyCache
+
+DEFAULT_API_KEY_CACHE_FILE = os.path.join(str(Path.home()), '.cache', 'xrdsst', 'api-keys')
+DEFAULT_API_KEY_CACHE_TTL = 3600
+
+_KDF_ITERATIONS = 200000
+# Serializes read-modify-write cycles of cache file between concurrently configured security servers.
+_API_KEY_CACHE_LOCK = threading.Lock()
+
+
+# Encrypted on-disk cache of transient API keys, allows reusing API key created by an earlier toolkit invocation
+# until its time-to-live expires, instead of creating (and revoking) API key on every invocation.
+class ApiKeyCache:
+    def __init__(self, file_name, secret: str, ttl: int = DEFAULT_API_KEY_CACHE_TTL):
+        self.file_name = file_name
+        self.ttl = ttl
+        self._secret = secret
+        self._salt = None
+        self._fernets = {}  # salt : Fernet, key derivation is deliberately slow
+
+    # Returns API key cache configured in /config/, None if cache is not configured or its secret is unavailable.
+    @staticmethod
+    def from_config(config):
+        cache_conf = config.get(ConfKeysRoot.CONF_KEY_ROOT_API_KEY_CACHE) if config else None
+        if not cache_conf:
+            return None
+
+        secret = os.getenv(cache_conf.get(ConfKeysApiKeyCache.CONF_KEY_API_KEY_CACHE_SECRET, ''), '')
+        if not secret:
+            return None
+
+        return ApiKeyCache(
+            os.path.expanduser(cache_conf.get(ConfKeysApiKeyCache.CONF_KEY_API_KEY_CACHE_FILE, DEFAULT_API_KEY_CACHE_FILE)),
+            secret,
+            int(cache_conf.get(ConfKeysApiKeyCache.CONF_KEY_API_KEY_CACHE_TTL, DEFAULT_API_KEY_CACHE_TTL))
+        )
+
+    # Returns cached, unexpired API key entry for given security server, None if there is none.
+    def get(self, security_server):
+        entry = self._load().get(security_server['name'])
+        if entry and entry['url'] == security_server['url'] and not self.is_expired(entry):
+            return entry
+        return None
+
+    # Returns entries that have outlived their time-to-live, as (security server name, entry) tuples.
+    def expired(self):
+        return [(ssn, entry) for ssn, entry in self._load().items() if self.is_expired(entry)]
+
+    # Returns all cached entries, as (security server name, entry) tuples.
+    def entries(self):
+        return list(self._load().items())
+
+    def is_expired(self, entry):
+        return time.time() - entry['created'] >= self.ttl
+
+    def put(self, security_server, key, key_id, address):
+        with _API_KEY_CACHE_LOCK:
+            entries = self._load()
+            entries[security_server['name']] = {
+                'key': key,
+                'id': key_id,
+                'address': address,
+                'url': security_server['url'],
+                'created': time.time()
+            }
+            self._save(entries)
+
+    def remove(self, ssn):
+        with _API_KEY_CACHE_LOCK:
+            entries = self._load()
+            if entries.pop(ssn, None):
+                self._save(entries)
+
+    def _fernet(self, salt):
+        if salt not in self._fernets:
+            derived = hashlib.pbkdf2_hmac('sha256', self._secret.encode('utf-8'), salt, _KDF_ITERATIONS)
+            self._fernets[salt] = Fernet(base64.urlsafe_b64encode(derived))
+        return self._fernets[salt]
+
+    # Unreadable or undecryptable (e.g. changed secret) cache counts as empty, it gets overwritten on next save.
+    def _load(self):
+        try:
+            with open(self.file_name, 'r') as cache_file:
+                stored = json.load(cache_file)
+            salt = base64.b64decode(stored['salt'])
+            entries = json.loads(self._fernet(salt).decrypt(stored['data'].encode('ascii')).decode('utf-8'))
+            self._salt = salt
+            return entries
+        except (OSError, ValueError, KeyError, InvalidToken):
+            return {}
+
+    # Keeps the salt of loaded cache, so that the key derived for it is reused. Fernet tokens have random IV of their own.
+    def _save(self, entries):
+        salt = self._salt = self._salt or os.urandom(16)
+        stored = {
+            'salt': base64.b64encode(salt).decode('ascii'),
+            'data': self._fernet(salt).encrypt(json.dumps(entries).encode('utf-8')).decode('ascii')
+        }
+        os.makedirs(os.path.dirname(self.file_name) or '.', mode=0o700, exist_ok=True)
+        tmp_file_name = self.file_name + '.' + str(os.getpid()) + '.tmp'
+        with open(os.open(tmp_file_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as cache_file:
+            json.dump(stored, cache_file)
+        os.replace(tmp_file_name, self.file_name)
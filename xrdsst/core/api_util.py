@@ -1,3 +1,7 @@
+import copy
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Tuple
 
@@ -327,11 +331,50 @@ class ServerStatus:
         self.status_certs = status_certs
 
 
-def remote_get_token(api_config, security_server):
+# Memo of GET requests made while collecting single status snapshot, identical requests (also concurrent ones)
+# hit the server only once. Not to be retained beyond the snapshot, as server state changes.
+class StatusRequestMemo:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results = {}
+        self.requests = 0
+        self.avoided = 0
+
+    # Returns result of /request/ made for /key/, making the request only if not already made or in progress.
+    def get(self, key, request):
+        with self._lock:
+            result = self._results.get(key)
+            if result is None:
+                result = self._results[key] = Future()
+                self.requests += 1
+                owner = True
+            else:
+                self.avoided += 1
+                owner = False
+
+        if owner:
+            try:
+                result.set_result(request())
+            except Exception as err:
+                result.set_exception(err)
+
+        return result.result()
+
+
+# Makes /request/ through /memo/ under /key/, if memo is given, directly otherwise.
+def _memoized(memo, key, request):
+    return memo.get(key, request) if memo else request()
+
+
+def remote_get_token(api_config, security_server, memo=None):
     token_id = security_server['software_token_id']
     token_api = TokensApi(ApiClient(api_config))
-    token = token_api.get_token(token_id)
-    return token
+    return _memoized(memo, ('get_token', token_id), lambda: token_api.get_token(token_id))
+
+
+def remote_get_initialization_status(api_config, memo=None):
+    initialization_api = InitializationApi(ApiClient(api_config))
+    return _memoized(memo, ('get_initialization_status',), initialization_api.get_initialization_status)
 
 
 # Returns 'global status' of X-Road according to security servers knowledge
@@ -366,12 +409,24 @@ def status_roles(api_config):
     return StatusRoles(permitted=True, roles=user.roles)
 
 
+# Returns whether security server rejects API key of /api_config/ as unauthorized, e.g. because the key has been revoked.
+# Other failures do not count as rejection, these surface with the actual API calls.
+def is_api_key_rejected(api_config):
+    user_api = UserApi(ApiClient(api_config))
+    try:
+        user_api.get_user()
+    except ApiException as aex:
+        return aex.status == 401
+    except Exception:
+        return False
+    return False
+
+
 # Returns security server anchor information, if available
-def status_anchor(api_config):
-    initialization_api = InitializationApi(ApiClient(api_config))
+def status_anchor(api_config, memo=None):
     system_api = SystemApi(ApiClient(api_config))
 
-    init_response = initialization_api.get_initialization_status()
+    init_response = remote_get_initialization_status(api_config, memo)
 
     if not init_response.is_anchor_imported:
         return StatusAnchor(has_anchor=False)
@@ -385,11 +440,10 @@ def status_anchor(api_config):
 
 
 # Returns security server basic initialization settings
-def status_server_initialization(api_config):
-    initialization_api = InitializationApi(ApiClient(api_config))
+def status_server_initialization(api_config, memo=None):
     security_servers_api = SecurityServersApi(ApiClient(api_config))
 
-    init_response = initialization_api.get_initialization_status()
+    init_response = remote_get_initialization_status(api_config, memo)
 
     ssi = StatusServerInitialization(
         has_anchor=init_response.is_anchor_imported,
@@ -422,8 +476,8 @@ def status_timestamping(api_config):
 
 
 # Returns token status information for security server token specified in the configuration file.
-def status_token(api_config, security_server):
-    token = remote_get_token(api_config, security_server)
+def status_token(api_config, security_server, memo=None):
+    token = remote_get_token(api_config, security_server, memo)
     return StatusToken(
         id_=token.id,
         name=token.name,
@@ -433,7 +487,7 @@ def status_token(api_config, security_server):
 
 
 # Returns triple of (key, csr, cert) statuses for security server token specified in the configuration file.
-def status_token_keys_and_certs(api_config, security_server):
+def status_token_keys_and_certs(api_config, security_server, memo=None):
     # From among multiple certificates, returns first that is closest to being in REGISTERED
     def best_cert(certs):
         return next(
@@ -450,7 +504,7 @@ def status_token_keys_and_certs(api_config, security_server):
             )
         )
 
-    token = remote_get_token(api_config, security_server)
+    token = remote_get_token(api_config, security_server, memo)
     token_key_count = len(token.keys)
 
     toolkit_auth_key_label = default_auth_key_label(security_server)
@@ -525,8 +579,18 @@ def status_token_keys_and_certs(api_config, security_server):
     return status_keys, status_csrs, status_certs
 
 
+# Runs argumentless /calls/ concurrently, returns their results in the given order. First exception is re-raised.
+def _concurrently(*calls):
+    with ThreadPoolExecutor(max_workers=len(calls), thread_name_prefix='xrdsst-status') as executor:
+        futures = [executor.submit(call) for call in calls]
+        return [future.result() for future in futures]
+
+
 # Return as much as possible about the server status in a given central+security server statuses.
-def status_server(api_config, security_server):
+# Mutually independent status queries are made concurrently, so the latency is close to that of slowest query.
+# Identical GET requests within the snapshot are made only once. If status /facets/ are given, only these are
+# queried after connectivity and roles, the rest of the status being left at defaults.
+def status_server(api_config, security_server, facets=None):
     is_connectable, conn_err_msg = is_ss_connectable(security_server[ConfKeysSecurityServer.CONF_KEY_URL])
     if not is_connectable:
         return ServerStatus(
@@ -551,20 +615,37 @@ def status_server(api_config, security_server):
             roles_status=roles_status
         )
 
-    version_status = status_system_version(api_config)
-    glob_status = status_global(api_config)
-    server_init_status = status_server_initialization(api_config)
+    if facets is not None:
+        # Other facets are only queried from initialized servers, so initialization status is always needed for these.
+        facets = tuple(facets) + ((StatusFacet.INIT,) if facets and StatusFacet.INIT not in facets else ())
+        partial_status = ServerStatus(
+            connectivity_status=(is_connectable, conn_err_msg),
+            security_server_name=security_server["name"],
+            roles_status=roles_status
+        )
+        return refresh_server_status(api_config, security_server, partial_status, facets)
+
+    memo = StatusRequestMemo()
+    version_status, glob_status, server_init_status = _concurrently(
+        lambda: status_system_version(api_config),
+        lambda: status_global(api_config),
+        lambda: status_server_initialization(api_config, memo)
+    )
 
     # If server has not been initialized, the following calls return errors a'la "Server conf is not initialized!"
     if server_init_status.has_anchor:
-        timestamping_status = status_timestamping(api_config)
-        token_status = status_token(api_config, security_server)
-        status_keys, status_csrs, status_certs = status_token_keys_and_certs(api_config, security_server)
+        timestamping_status, token_status, (status_keys, status_csrs, status_certs) = _concurrently(
+            lambda: status_timestamping(api_config),
+            lambda: status_token(api_config, security_server, memo),
+            lambda: status_token_keys_and_certs(api_config, security_server, memo)
+        )
     else:
         timestamping_status = []
         token_status = StatusToken()
         status_keys, status_csrs, status_certs = (StatusKeys(), StatusCsrs(), StatusCerts())
 
+    logging.debug("Status of security server '" + security_server["name"] + "' collected, " +
+                  str(memo.avoided) + " duplicate API calls avoided.")
     return ServerStatus(
         connectivity_status=(is_connectable, conn_err_msg),
         security_server_name=security_server["name"],
@@ -578,3 +659,48 @@ def status_server(api_config, security_server):
         status_csrs=status_csrs,
         status_certs=status_certs
     )
+
+
+# Parts of security server status that can be refreshed separately from the rest of the status.
+class StatusFacet:
+    GLOBAL = 'global'
+    INIT = 'init'
+    TIMESTAMPING = 'timestamping'
+    TOKEN = 'token'
+    KEYS_AND_CERTS = 'keys_and_certs'
+
+
+# Returns copy of previously collected /server_status/ with only the given status /facets/ queried anew.
+# Connectivity, roles and version status are retained as they were.
+def refresh_server_status(api_config, security_server, server_status, facets):
+    server_status = copy.copy(server_status)
+    memo = StatusRequestMemo()
+    if StatusFacet.INIT in facets:
+        server_status.server_init_status = status_server_initialization(api_config, memo)
+    has_anchor = server_status.server_init_status is not None and server_status.server_init_status.has_anchor
+
+    # If server has not been initialized, the following calls return errors a'la "Server conf is not initialized!"
+    def _refresh_timestamping():
+        server_status.timestamping_status = status_timestamping(api_config) if has_anchor else []
+
+    def _refresh_token():
+        server_status.token_status = status_token(api_config, security_server, memo) if has_anchor else StatusToken()
+
+    def _refresh_keys_and_certs():
+        server_status.status_keys, server_status.status_csrs, server_status.status_certs = \
+            status_token_keys_and_certs(api_config, security_server, memo) if has_anchor else (StatusKeys(), StatusCsrs(), StatusCerts())
+
+    def _refresh_global():
+        server_status.global_status = status_global(api_config)
+
+    refreshes = {
+        StatusFacet.GLOBAL: _refresh_global,
+        StatusFacet.TIMESTAMPING: _refresh_timestamping,
+        StatusFacet.TOKEN: _refresh_token,
+        StatusFacet.KEYS_AND_CERTS: _refresh_keys_and_certs
+    }
+    calls = [refreshes[facet] for facet in facets if facet in refreshes]
+    if calls:
+        _concurrently(*calls)
+
+    return server_status
@@ -38,6 +38,13 @@ class ConfKeysRoot:
     CONF_KEY_ROOT_ADMIN_CREDENTIALS = 'admin_credentials'
     CONF_KEY_ROOT_SSH_ACCESS = 'ssh_access'
     CONF_KEY_ROOT_LOGGING = 'logging'
+    CONF_KEY_ROOT_PARALLELISM = 'parallelism'
+    CONF_KEY_ROOT_ENDPOINT_PARALLELISM = 'endpoint_parallelism'
+    CONF_KEY_ROOT_DOWNLOAD_PARALLELISM = 'download_parallelism'
+    CONF_KEY_ROOT_API_KEY_CACHE = 'api_key_cache'
+    CONF_KEY_ROOT_STATUS_CACHE = 'status_cache'
+    CONF_KEY_ROOT_RATE_LIMIT = 'rate_limit'
+    CONF_KEY_ROOT_RETRY = 'retry'
 
     # Return the tuples ('child key', child conf keys class) for keys with descendants of their own
     @staticmethod
@@ -45,7 +52,11 @@ class ConfKeysRoot:
         return [
             (ConfKeysRoot.CONF_KEY_ROOT_SERVER, ConfKeysSecurityServer),
             (ConfKeysRoot.CONF_KEY_ROOT_SSH_ACCESS, ConfKeysSSHAccess),
-            (ConfKeysRoot.CONF_KEY_ROOT_LOGGING, ConfKeysLogging)
+            (ConfKeysRoot.CONF_KEY_ROOT_LOGGING, ConfKeysLogging),
+            (ConfKeysRoot.CONF_KEY_ROOT_API_KEY_CACHE, ConfKeysApiKeyCache),
+            (ConfKeysRoot.CONF_KEY_ROOT_STATUS_CACHE, ConfKeysStatusCache),
+            (ConfKeysRoot.CONF_KEY_ROOT_RATE_LIMIT, ConfKeysRateLimit),
+            (ConfKeysRoot.CONF_KEY_ROOT_RETRY, ConfKeysRetry)
         ]
 
 
@@ -59,6 +70,27 @@ class ConfKeysLogging:
         return []
 
 
+# Known keys for xrdsst configuration file API key cache section.
+class ConfKeysApiKeyCache:
+    CONF_KEY_API_KEY_CACHE_FILE = 'file'
+    CONF_KEY_API_KEY_CACHE_TTL = 'ttl'
+    CONF_KEY_API_KEY_CACHE_SECRET = 'secret'
+
+    @staticmethod
+    def descendant_conf_keys():
+        return []
+
+
+# Known keys for xrdsst configuration file status cache section.
+class ConfKeysStatusCache:
+    CONF_KEY_STATUS_CACHE_FILE = 'file'
+    CONF_KEY_STATUS_CACHE_TTL = 'ttl'
+
+    @staticmethod
+    def descendant_conf_keys():
+        return []
+
+
 class ConfKeysSSHAccess:
     CONF_KEY_USER = 'user'
     CONF_KEY_PRIVATE_KEY = 'private_key'
@@ -68,6 +100,29 @@ class ConfKeysSSHAccess:
         return []
 
 
+# Known keys for xrdsst configuration file API call rate limit sections, at root level and for security server.
+class ConfKeysRateLimit:
+    CONF_KEY_RATE_LIMIT_PER_SECOND = 'per_second'
+    CONF_KEY_RATE_LIMIT_PER_MINUTE = 'per_minute'
+    CONF_KEY_RATE_LIMIT_ADAPTIVE = 'adaptive'
+    CONF_KEY_RATE_LIMIT_MAX_PER_SECOND = 'max_per_second'
+
+    @staticmethod
+    def descendant_conf_keys():
+        return []
+
+
+# Known keys for xrdsst configuration file API call retry policy section.
+class ConfKeysRetry:
+    CONF_KEY_RETRY_RETRIES = 'retries'
+    CONF_KEY_RETRY_BACKOFF = 'backoff'
+    CONF_KEY_RETRY_MAX_BACKOFF = 'max_backoff'
+
+    @staticmethod
+    def descendant_conf_keys():
+        return []
+
+
 # Known keys for xrdsst configuration file security server configuration section.
 class ConfKeysSecurityServer:
     CONF_KEY_ANCHOR = 'configuration_anchor'
@@ -90,11 +145,13 @@ class ConfKeysSecurityServer:
     CONF_KEY_SSH_PRIVATE_KEY = 'ssh_private_key'
     CONF_KEY_TLS_CERTS = 'tls_certificates'
     CONF_KEY_PROFILE = 'profile'
+    CONF_KEY_RATE_LIMIT = 'rate_limit'
 
     @staticmethod
     def descendant_conf_keys():
         return [
-            (ConfKeysSecurityServer.CONF_KEY_CLIENTS, ConfKeysSecServerClients)
+            (ConfKeysSecurityServer.CONF_KEY_CLIENTS, ConfKeysSecServerClients),
+            (ConfKeysSecurityServer.CONF_KEY_RATE_LIMIT, ConfKeysRateLimit)
         ]
 
 
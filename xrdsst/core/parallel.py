@@ -0,0 +1,115 @@
+import io
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from xrdsst.core.conf_keys import ConfKeysRoot, ConfKeysSecurityServer
+
+
+# Stream that redirects writes from threads with registered buffer into that buffer, writes from other threads pass
+# through to the wrapped stream. Keeps console output of concurrently configured security servers apart.
+class ThreadBufferedStream:
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    def set_buffer(self, buffer):
+        self._local.buffer = buffer
+
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer if buffer is not None else self._stream).write(text)
+
+    def flush(self):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            self._stream.flush()
+
+    # Writes to the wrapped stream at once, whatever the thread.
+    def write_through(self, text):
+        written = self._stream.write(text)
+        self._stream.flush()
+        return written
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+# Writes /text/ to standard output at once, also from worker thread with buffered output, for progress reports of long
+# running operations.
+def write_unbuffered(text):
+    if isinstance(sys.stdout, ThreadBufferedStream):
+        return sys.stdout.write_through(text)
+    written = sys.stdout.write(text)
+    sys.stdout.flush()
+    return written
+
+
+# Result of running single operation on single security server.
+class ServerRun:
+    security_server_name: str = None
+    duration: float = 0.0
+    result = None
+    error: Exception = None
+
+    def __init__(self, security_server_name: str = None, duration: float = 0.0, result=None, error: Exception = None):
+        self.security_server_name = security_server_name
+        self.duration = duration
+        self.result = result
+        self.error = error
+
+    def __repr__(self):
+        return \
+            f'ServerRun(security_server_name="{self.security_server_name}",' \
+            f'duration={self.duration},' \
+            f'error={self.error})'
+
+
+# Returns copy of /config/ with only the security server at index /ix/ retained.
+def single_server_config(config, ix):
+    ss_config = dict(config)
+    ss_config[ConfKeysRoot.CONF_KEY_ROOT_SERVER] = config[ConfKeysRoot.CONF_KEY_ROOT_SERVER][ix:(ix + 1)]
+    return ss_config
+
+
+# Runs /operation/ separately for every security server in /config/, on at most /parallelism/ worker threads.
+# Console output of every server is buffered and written out in configuration order, as soon as all preceding
+# servers are done. Returns list of ServerRun in configuration order, exceptions are captured into these.
+def run_per_server(config, operation, parallelism):
+    security_servers = config[ConfKeysRoot.CONF_KEY_ROOT_SERVER]
+    out_stream, err_stream = sys.stdout, sys.stderr
+    buffered_out, buffered_err = ThreadBufferedStream(out_stream), ThreadBufferedStream(err_stream)
+
+    def _run(ix):
+        out_buffer, err_buffer = io.StringIO(), io.StringIO()
+        buffered_out.set_buffer(out_buffer)
+        buffered_err.set_buffer(err_buffer)
+        server_run = ServerRun(security_server_name=security_servers[ix][ConfKeysSecurityServer.CONF_KEY_NAME])
+        start = time.monotonic()
+        try:
+            server_run.result = operation(single_server_config(config, ix))
+        except Exception as err:
+            server_run.error = err
+        finally:
+            server_run.duration = time.monotonic() - start
+            buffered_out.set_buffer(None)
+            buffered_err.set_buffer(None)
+        return server_run, out_buffer.getvalue(), err_buffer.getvalue()
+
+    server_runs = []
+    sys.stdout, sys.stderr = buffered_out, buffered_err
+    try:
+        with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix='xrdsst') as executor:
+            futures = [executor.submit(_run, ix) for ix in range(0, len(security_servers))]
+            for future in futures:
+                server_run, out_text, err_text = future.result()
+                out_stream.write(out_text)
+                err_stream.write(err_text)
+                out_stream.flush()
+                err_stream.flush()
+                server_runs.append(server_run)
+    finally:
+        sys.stdout, sys.stderr = out_stream, err_stream
+
+    return server_runs
@@ -0,0 +1,106 @@
+import logging
+import shutil
+import subprocess
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+
+_SSH_OPTIONS = '-o IdentitiesOnly=yes -o UserKnownHostsFile=/dev/null -o StrictHostKeyChecking=no -o LogLevel=ERROR'
+# Seconds the multiplexed master connection stays open after its last session, should toolkit exit uncleanly.
+_SSH_CONTROL_PERSIST = 60
+
+
+# Runs shell commands on security servers. Implementations may keep connections open between the commands,
+# until closed.
+class SshTransport(ABC):
+    # Runs /command/ as /ssh_user/ authenticated with /ssh_key/ on host at /address/, returns (exitcode, output).
+    @abstractmethod
+    def run(self, ssh_key, ssh_user, address, command):
+        pass
+
+    def close(self):
+        pass
+
+
+# OpenSSH client transport, multiplexing all sessions to the same host and user over single master connection
+# (ControlMaster), so that only the first command to the host pays for the TCP and SSH handshakes.
+class OpenSshTransport(SshTransport):
+    def __init__(self, control_persist=_SSH_CONTROL_PERSIST):
+        self.control_persist = control_persist
+        self._control_dir = None
+        self._masters = set()
+        self._lock = threading.Lock()
+
+    def _control_options(self):
+        with self._lock:
+            if not self._control_dir:
+                self._control_dir = tempfile.mkdtemp(prefix='xrdsst-ssh-')  # Short, UNIX socket path length is limited.
+        return '-o ControlMaster=auto -o ControlPath="{}/%C" -o ControlPersist={}'.format(self._control_dir, self.control_persist)
+
+    def run(self, ssh_key, ssh_user, address, command):
+        cmd = 'ssh {} {} -i "{}" {}@{} "{}"'.format(_SSH_OPTIONS, self._control_options(), ssh_key, ssh_user, address, command)
+        with self._lock:
+            self._masters.add((ssh_key, ssh_user, address))
+        return subprocess.getstatusoutput(cmd)
+
+    # Stops master connections opened and removes their control sockets.
+    def close(self):
+        with self._lock:
+            masters, self._masters = self._masters, set()
+            control_dir, self._control_dir = self._control_dir, None
+        if not control_dir:
+            return
+
+        control_options = '-o ControlPath="{}/%C"'.format(control_dir)
+        for ssh_key, ssh_user, address in masters:
+            exitcode, data = subprocess.getstatusoutput('ssh {} {} -i "{}" -O exit {}@{}'.format(_SSH_OPTIONS, control_options, ssh_key, ssh_user, address))
+            if exitcode != 0:
+                logging.debug("No SSH master connection to stop for " + ssh_user + "@" + address + ": " + str(data))
+        shutil.rmtree(control_dir, ignore_errors=True)
+
+
+# Transport that does not connect anywhere, records the commands and answers them with /responder/, returning
+# (exitcode, output) for (ssh_user, address, command). For tests and dry runs.
+class StubSshTransport(SshTransport):
+    def __init__(self, responder=(lambda ssh_user, address, command: (0, ''))):
+        self.responder = responder
+        self.commands = []
+        self.closed = False
+
+    def run(self, ssh_key, ssh_user, address, command):
+        self.commands.append((ssh_user, address, command))
+        return self.responder(ssh_user, address, command)
+
+    def close(self):
+        self.closed = True
+
+
+_SSH_TRANSPORT = None
+_SSH_TRANSPORT_LOCK = threading.Lock()
+
+
+# Returns SSH transport shared by all remote shell operations, created on first use.
+def ssh_transport():
+    global _SSH_TRANSPORT
+    with _SSH_TRANSPORT_LOCK:
+        if _SSH_TRANSPORT is None:
+            _SSH_TRANSPORT = OpenSshTransport()
+        return _SSH_TRANSPORT
+
+
+# Replaces shared SSH transport with /transport/, closing the previous one. None resets to default on next use.
+def set_ssh_transport(transport):
+    global _SSH_TRANSPORT
+    with _SSH_TRANSPORT_LOCK:
+        previous, _SSH_TRANSPORT = _SSH_TRANSPORT, transport
+    if previous is not None and previous is not transport:
+        previous.close()
+
+
+# Closes shared SSH transport, if one has been created.
+def close_ssh_transport():
+    global _SSH_TRANSPORT
+    with _SSH_TRANSPORT_LOCK:
+        transport, _SSH_TRANSPORT = _SSH_TRANSPORT, None
+    if transport is not None:
+        transport.close()
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from dateutil.parser import parse as parse_datetime
+
+from xrdsst.core.api_util import ServerStatus, StatusRoles, StatusVersion, StatusGlobal, StatusServerInitialization, \
+    StatusServerTimestamping, StatusToken, StatusKeys, StatusCsrs, StatusCerts
+from xrdsst.core.conf_keys import ConfKeysRoot, ConfKeysStatusCache, ConfKeysSecurityServer
+
+DEFAULT_STATUS_CACHE_FILE = os.path.join(str(Path.home()), '.cache', 'xrdsst', 'status')
+DEFAULT_STATUS_CACHE_TTL = 60
+
+# ServerStatus attributes holding single status part, with the part type.
+_STATUS_PARTS = {
+    'roles_status': StatusRoles,
+    'version_status': StatusVersion,
+    'global_status': StatusGlobal,
+    'server_init_status': StatusServerInitialization,
+    'token_status': StatusToken,
+    'status_keys': StatusKeys,
+    'status_csrs': StatusCsrs,
+    'status_certs': StatusCerts
+}
+_DATETIME = '__datetime__'
+
+# Serializes read-modify-write cycles of cache file between concurrently configured security servers.
+_STATUS_CACHE_LOCK = threading.Lock()
+# (cache file, scheme://host:port) : cache file signature right after the host was invalidated. Further invalidations
+# are no-ops while the file stays unchanged, i.e. nothing has been cached since by this or any other process.
+_INVALIDATED_HOSTS = {}
+
+
+def _encode_part(part):
+    return {k: ({_DATETIME: v.isoformat()} if isinstance(v, datetime) else v) for k, v in vars(part).items()}
+
+
+def _decode_part(part_type, values):
+    part = part_type.__new__(part_type)  # Constructor argument names do not always match the attribute names.
+    part.__dict__.update({k: (parse_datetime(v[_DATETIME]) if isinstance(v, dict) and _DATETIME in v else v)
+                          for k, v in values.items()})
+    return part
+
+
+# Returns scheme://host:port of security server from status cache key.
+def _schemed_host(key):
+    return '/'.join(key.split(' ')[0].split('/')[:3])
+
+
+# Returns JSON serializable representation of the /server_status/.
+def encode_server_status(server_status):
+    encoded = {
+        'security_server_name': server_status.security_server_name,
+        'connectivity_status': server_status.connectivity_status,
+        'timestamping_status': [_encode_part(tsa) for tsa in server_status.timestamping_status or []]
+    }
+    encoded.update({attr: _encode_part(getattr(server_status, attr)) for attr in _STATUS_PARTS if getattr(server_status, attr) is not None})
+    return encoded
+
+
+# Returns ServerStatus from the representation given by encode_server_status().
+def decode_server_status(encoded):
+    server_status = ServerStatus(
+        security_server_name=encoded['security_server_name'],
+        connectivity_status=tuple(encoded['connectivity_status']) if encoded['connectivity_status'] else None,
+        timestamping_status=[_decode_part(StatusServerTimestamping, tsa) for tsa in encoded['timestamping_status']]
+    )
+    for attr, part_type in _STATUS_PARTS.items():
+        setattr(server_status, attr, _decode_part(part_type, encoded[attr]) if attr in encoded else None)
+    return server_status
+
+
+# On-disk cache of complete security server statuses keyed by security server URL and the credentials used, allows
+# consecutive toolkit invocations to reuse status collected by an earlier invocation until its time-to-live expires.
+# Entries of security server are dropped whenever toolkit calls state changing API operation on that security server.
+class StatusCache:
+    def __init__(self, file_name, ttl: int = DEFAULT_STATUS_CACHE_TTL):
+        self.file_name = file_name
+        self.ttl = ttl
+
+    # Returns status cache configured in /config/, None if cache is not configured.
+    @staticmethod
+    def from_config(config):
+        cache_conf = config.get(ConfKeysRoot.CONF_KEY_ROOT_STATUS_CACHE) if config else None
+        if not cache_conf:
+            return None
+
+        return StatusCache(
+            os.path.expanduser(cache_conf.get(ConfKeysStatusCache.CONF_KEY_STATUS_CACHE_FILE, DEFAULT_STATUS_CACHE_FILE)),
+            int(cache_conf.get(ConfKeysStatusCache.CONF_KEY_STATUS_CACHE_TTL, DEFAULT_STATUS_CACHE_TTL))
+        )
+
+    # Returns cache key for the status of /security_server/ queried with /api_config/: server URL with the hash of the
+    # Authorization header, as the status reported depends on the roles of the API key in use.
+    @staticmethod
+    def status_key(security_server, api_config):
+        credentials = api_config.api_key.get('Authorization') or ''
+        return security_server[ConfKeysSecurityServer.CONF_KEY_URL] + ' ' + hashlib.sha256(credentials.encode('utf-8')).hexdigest()[:16]
+
+    # Returns cached, unexpired status under /key/ (see status_key()), None if there is none.
+    def get(self, key):
+        entry = self._load().get(key)
+        if entry and time.time() - entry['created'] < self.ttl:
+            try:
+                return decode_server_status(entry['status'])
+            except (KeyError, TypeError, ValueError):
+                return None
+        return None
+
+    def put(self, key, server_status):
+        with _STATUS_CACHE_LOCK:
+            entries = {k: v for k, v in self._load().items() if time.time() - v['created'] < self.ttl}
+            entries[key] = {'created': time.time(), 'status': encode_server_status(server_status)}
+            self._save(entries)
+            _INVALIDATED_HOSTS.pop((self.file_name, _schemed_host(key)), None)
+
+    # Drops cached statuses of security servers at /schemed_host/ (scheme://host:port), whatever the API path and
+    # credentials. Cache file is not read nor rewritten again on repeated invalidations, until the file changes.
+    def invalidate(self, schemed_host):
+        with _STATUS_CACHE_LOCK:
+            if _INVALIDATED_HOSTS.get((self.file_name, schemed_host), False) == self._signature():
+                return
+            entries = self._load()
+            retained = {key: entry for key, entry in entries.items() if _schemed_host(key) != schemed_host}
+            if len(retained) != len(entries):
+                self._save(retained)
+            _INVALIDATED_HOSTS[(self.file_name, schemed_host)] = self._signature()
+
+    # Returns what changes whenever cache file is rewritten (replaced), None if there is no cache file.
+    def _signature(self):
+        try:
+            stat = os.stat(self.file_name)
+            return stat.st_ino, stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    # Unreadable cache counts as empty, it gets overwritten on next save.
+    def _load(self):
+        try:
+            with open(self.file_name, 'r') as cache_file:
+                entries = json.load(cache_file)
+            return entries if isinstance(entries, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, entries):
+        os.makedirs(os.path.dirname(self.file_name) or '.', mode=0o700, exist_ok=True)
+        tmp_file_name = self.file_name + '.' + str(os.getpid()) + '.tmp'
+        with open(os.open(tmp_file_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as cache_file:
+            json.dump(entries, cache_file)
+        os.replace(tmp_file_name, self.file_name)
@@ -1,10 +1,14 @@
+import asyncio
 import logging
 import os
-import subprocess
+import threading
+from urllib.error import URLError
+from urllib.parse import urlparse
 from xrdsst.core.conf_keys import ConfKeysSecServerClients
 import yaml
 
 from xrdsst.core.definitions import ROOT_DIR
+from xrdsst.core.ssh import ssh_transport
 
 
 def get_admin_credentials(security_server, config):
@@ -75,44 +79,125 @@ def convert_swagger_enum(_type, value):
     return value
 
 
-# Do fast (or slow :)) connection test for /ss_url/, allowing to set socket timeout, default is set to 1 second.
-# Returns tuple (is_connectable: bool, error_msg: str).
-def is_ss_connectable(ss_url, sock_timeout=1):
-    from socket import SOCK_STREAM, SHUT_RDWR, socket, AF_INET, error
-    from urllib.parse import urlparse
-    from urllib.error import URLError
-    from xrdsst.api_client.extensions import limit_rate
+# Connectivity probe results for the run, keyed by security server URL.
+_CONNECTIVITY = {}
+_CONNECTIVITY_LOCK = threading.Lock()
 
-    def has_protocol_host_port(url):
-        try:
-            result = urlparse(url)
-            return (
-                    all([result.scheme, result.netloc]) and
-                    len(result.netloc.split(':')) == 2 and
-                    result.netloc.split(':')[1].isnumeric()
-            )
-        except URLError:
-            return False
-
-    if not has_protocol_host_port(ss_url):  # For security server deployments, port seems pure necessity
-        return False, "Unparsable scheme://host:port for '{}'.".format(ss_url)
-
-    url_netloc = urlparse(ss_url).netloc
-    parts = url_netloc.split(':')
-    host, port = parts[0], int(parts[1])
-
-    limit_rate('/'.join(ss_url.split('/')[:3]))
+
+def _has_protocol_host_port(url):
+    try:
+        result = urlparse(url)
+        return (
+                all([result.scheme, result.netloc]) and
+                len(result.netloc.split(':')) == 2 and
+                result.netloc.split(':')[1].isnumeric()
+        )
+    except URLError:
+        return False
+
+
+def _conn_err_msg(err):
+    return os.strerror(err.errno) if err.errno else str(err)
+
+
+# Non-blocking connection test for /ss_url/ with /sock_timeout/ applying to both connect and the first response byte.
+async def _probe_connectivity(ss_url, sock_timeout):
+    host, port = urlparse(ss_url).netloc.split(':')
     try:
-        s = socket(AF_INET, SOCK_STREAM)
-        s.settimeout(sock_timeout)
-        s.connect((host, port))
-        s.send("HTTP 1.1 /\n".encode('utf-8'))  # Just enough to get back error
-        s.recv(1)
-        s.shutdown(SHUT_RDWR)
-        s.close()
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, int(port)), sock_timeout)
+    except asyncio.TimeoutError:
+        return False, 'timed out'
+    except OSError as err:
+        return False, _conn_err_msg(err)
+
+    try:
+        writer.write("HTTP 1.1 /\n".encode('utf-8'))  # Just enough to get back error
+        await asyncio.wait_for(reader.read(1), sock_timeout)
         return True, ''
-    except error as err:
-        return False, os.strerror(err.errno) if err.errno else str(err)
+    except asyncio.TimeoutError:
+        return False, 'timed out'
+    except OSError as err:
+        return False, _conn_err_msg(err)
+    finally:
+        writer.close()
+
+
+async def _probe_all_connectivity(ss_urls, sock_timeout):
+    return await asyncio.gather(*[_probe_connectivity(url, sock_timeout) for url in ss_urls])
+
+
+# Pre-flight connection test for all /ss_urls/ at once, probing concurrently the ones not yet probed during the run,
+# so that the whole fleet costs at most single socket timeout. Returns {url: (is_connectable: bool, error_msg: str)}.
+def preflight_connectivity(ss_urls, sock_timeout=1):
+    from xrdsst.api_client.extensions import limit_rate
+
+    with _CONNECTIVITY_LOCK:
+        pending = [url for url in dict.fromkeys(ss_urls) if url not in _CONNECTIVITY]
+
+    probed = {}
+    for url in pending:
+        if not _has_protocol_host_port(url):  # For security server deployments, port seems pure necessity
+            probed[url] = False, "Unparsable scheme://host:port for '{}'.".format(url)
+        else:
+            limit_rate('/'.join(url.split('/')[:3]))
+
+    probe_urls = [url for url in pending if url not in probed]
+    if probe_urls:
+        loop = asyncio.new_event_loop()
+        try:
+            results = loop.run_until_complete(_probe_all_connectivity(probe_urls, sock_timeout))
+        finally:
+            loop.close()
+        probed.update(zip(probe_urls, results))
+
+    with _CONNECTIVITY_LOCK:
+        _CONNECTIVITY.update(probed)
+        return {url: _CONNECTIVITY[url] for url in ss_urls}
+
+
+# Do fast (or slow :)) connection test for /ss_url/, allowing to set socket timeout, default is set to 1 second.
+# Result of earlier test (or pre-flight) during the run is reused. Returns tuple (is_connectable: bool, error_msg: str).
+def is_ss_connectable(ss_url, sock_timeout=1):
+    return preflight_connectivity([ss_url], sock_timeout)[ss_url]
+
+
+# Forgets connectivity test results of given security server URLs, of all URLs if none given.
+def reset_connectivity(ss_urls=None):
+    with _CONNECTIVITY_LOCK:
+        if ss_urls is None:
+            _CONNECTIVITY.clear()
+        for url in ss_urls or []:
+            _CONNECTIVITY.pop(url, None)
+
+
+# Revokes API key with /key_id/ on security server reachable over SSH at /address/, returns (exitcode, data).
+def revoke_remote_api_key(security_server, config, key_id, address):
+    credentials = get_admin_credentials(security_server, config)
+    ssh_key = get_ssh_key(security_server, config)
+    ssh_user = get_ssh_user(security_server, config)
+    url = security_server["api_key_url"]
+    curl_cmd = "curl -X DELETE -u " + credentials + " --silent " + url + "/" + str(key_id) + " -k"
+    return ssh_transport().run(ssh_key, ssh_user, address, curl_cmd)
+
+
+# Revokes cached API key /entries/ of security servers in /config/, dropping successfully revoked keys from
+# /api_key_cache/. Returns names of security servers with revoked keys.
+def revoke_cached_api_keys(api_key_cache, config, entries):
+    revoked = []
+    for ssn, entry in entries:
+        security_server = next((ss for ss in config["security_server"] if ss["name"] == ssn), None)
+        if not security_server:
+            logging.warning("Cached API key for security server " + ssn + " not revoked, security server not configured.")
+            continue
+        exitcode, data = revoke_remote_api_key(security_server, config, entry['id'], entry['address'])
+        if exitcode == 0:
+            api_key_cache.remove(ssn)
+            revoked.append(ssn)
+            log_info("Cached API key for security server " + ssn + " revoked.")
+        else:
+            logging.warning("Revocation of cached API key for security server " + ssn + " failed (exit_code = " +
+                            str(exitcode) + ", data = " + str(data) + ")")
+    return revoked
 
 
 def revoke_api_key(app):
@@ -132,15 +217,7 @@ def revoke_api_key(app):
             logging.debug('Revoking API key for security server ' + ssn)
             for security_server in config["security_server"]:
                 if ssn == security_server["name"]:
-                    credentials = get_admin_credentials(security_server, config)
-                    ssh_key = get_ssh_key(security_server, config)
-                    ssh_user = get_ssh_user(security_server, config)
-                    url = security_server["api_key_url"]
-                    curl_cmd = "curl -X DELETE -u " + credentials + " --silent " + url + "/" + str(
-                        api_key_id[ssn][0]) + " -k"
-                    cmd = "ssh -o IdentitiesOnly=yes -o UserKnownHostsFile=/dev/null -o StrictHostKeyChecking=no -o LogLevel=ERROR -i \"" + \
-                          ssh_key + "\" " + ssh_user + "@" + api_key_id[ssn][1] + " \"" + curl_cmd + "\""
-                    exitcode, data = subprocess.getstatusoutput(cmd)
+                    exitcode, data = revoke_remote_api_key(security_server, config, api_key_id[ssn][0], api_key_id[ssn][1])
                     api_key_token = app.api_keys[ssn]
                     if exitcode == 0:
                         log_info("API key '" + api_key_token + "' for security server " + ssn + " revoked.")
@@ -6,6 +6,8 @@ import urllib3
 from cement import App, TestApp, init_defaults
 from cement.core.exc import CaughtSignal
 from typing import Callable
+from xrdsst.api_client.extensions import log_shared_rest_client_stats
+from xrdsst.controllers.apikey import ApiKeyController
 from xrdsst.controllers.auto import AutoController
 from xrdsst.controllers.backup import BackupController
 from xrdsst.controllers.base import BaseController
@@ -26,6 +28,9 @@ from xrdsst.controllers.csr import CsrController
 from xrdsst.controllers.instance import InstanceController
 from xrdsst.controllers.security_server import SecurityServerController
 from xrdsst.controllers.internal_tls import InternalTlsController
+from xrdsst.controllers.plan import PlanController
+from xrdsst.core.api_util import StatusFacet
+from xrdsst.core.ssh import close_ssh_transport
 from xrdsst.core.util import revoke_api_key
 from xrdsst.core.validator import validate_config_init, validate_config_timestamp_init, validate_config_token_login, \
     validate_config_token_init_keys, validate_config_cert_import, validate_config_cert_register, validate_config_cert_activate, \
@@ -40,10 +45,6 @@ META = init_defaults('output.json', 'output.tabulate')
 META['output.json']['overridable'] = True
 META['output.tabulate']['overridable'] = True
 
-# Operation dependency graph representation for simple topological ordering
-OP_GRAPH = networkx.DiGraph()
-OP_DEPENDENCY_LIST = []
-
 OP_INIT = "INIT"
 OP_TOKEN_LOGIN = "TOKEN\nLOGIN"
 OP_TIMESTAMP_ENABLE = "TIMESTAMPING"
@@ -113,26 +114,29 @@ VALIDATORS = {
 
 # Initialize operational dependency graph for the security server operations
 def opdep_init(app):
-    def add_op_node(g, op: str, controller, operation: Callable, **kwargs):
-        g.add_node(op, controller=controller, operation=operation, servers={}, **kwargs)
+    # Operations with binary /done/ criteria declare the status facets their 'is_done' predicate depends on, only
+    # these need to be refreshed after the operation is executed. Operations completed only by global configuration
+    # renewal are marked with 'waits_for_global_conf', 'apply --wait' waits for their completion.
+    def add_op_node(g, op: str, controller, operation: Callable, status_facets=(), **kwargs):
+        g.add_node(op, controller=controller, operation=operation, status_facets=status_facets, **kwargs)
 
     def is_done_initialization(ssn):
-        sins = OP_GRAPH.nodes[OPS.INIT]['servers'][ssn]['status'].server_init_status
+        sins = app.OP_SERVER_STATUSES[ssn]['status'].server_init_status
 
         return \
             sins.has_anchor and sins.has_server_code and \
             sins.has_server_owner and sins.token_init_status == TokenInitStatus.INITIALIZED
 
     def is_done_tsa(ssn):
-        tsas = OP_GRAPH.nodes[OPS.TIMESTAMP_ENABLE]['servers'][ssn]['status'].timestamping_status
+        tsas = app.OP_SERVER_STATUSES[ssn]['status'].timestamping_status
         return tsas and len(tsas) > 0
 
     def is_done_token_login(ssn):
-        tins = OP_GRAPH.nodes[OPS.TOKEN_LOGIN]['servers'][ssn]['status'].token_status
+        tins = app.OP_SERVER_STATUSES[ssn]['status'].token_status
         return tins.logged_in and TokenStatus.OK == tins.status
 
     def is_done_token_keys_and_csrs(ssn):
-        sss = OP_GRAPH.nodes[OPS.GENKEYS_CSRS]['servers'][ssn]['status']
+        sss = app.OP_SERVER_STATUSES[ssn]['status']
 
         keys_done = (
                 (sss.status_keys.has_toolkit_sign_key and sss.status_keys.has_toolkit_auth_key) or
@@ -147,11 +151,11 @@ def opdep_init(app):
         return keys_done and csrs_done
 
     def is_done_cert_import(ssn):
-        sss = OP_GRAPH.nodes[OPS.IMPORT_CERTS]['servers'][ssn]['status']
+        sss = app.OP_SERVER_STATUSES[ssn]['status']
         return sss.status_certs.has_sign_cert and sss.status_certs.has_auth_cert
 
     def is_done_auth_cert_register(ssn):
-        sss = OP_GRAPH.nodes[OPS.REGISTER_AUTH_CERT]['servers'][ssn]['status']
+        sss = app.OP_SERVER_STATUSES[ssn]['status']
         return (
                 sss.status_certs.has_auth_cert and
                 sss.status_certs.auth_cert_actions and
@@ -159,27 +163,37 @@ def opdep_init(app):
         )
 
     def is_done_auth_cert_activate(ssn):
-        sss = OP_GRAPH.nodes[OPS.ACTIVATE_AUTH_CERT]['servers'][ssn]['status']
+        sss = app.OP_SERVER_STATUSES[ssn]['status']
         return (
                 sss.status_certs.has_auth_cert and
                 sss.status_certs.auth_cert_actions and
                 PossibleAction.DISABLE in sss.status_certs.auth_cert_actions
         )
 
-    g = OP_GRAPH
-
-    add_op_node(g, OPS.ACTIVATE_AUTH_CERT, CertController, CertController.activate, is_done=is_done_auth_cert_activate)
-    add_op_node(g, OPS.REGISTER_AUTH_CERT, CertController, CertController.register, is_done=is_done_auth_cert_register)
-    add_op_node(g, OPS.IMPORT_CERTS, CertController, CertController.import_, is_done=is_done_cert_import)
-    add_op_node(g, OPS.GENKEYS_CSRS, TokenController, TokenController.init_keys, is_done=is_done_token_keys_and_csrs)
-    add_op_node(g, OPS.TIMESTAMP_ENABLE, TimestampController, TimestampController.init, is_done=is_done_tsa)
-    add_op_node(g, OPS.INIT, InitServerController, InitServerController._default, is_done=is_done_initialization)
-    add_op_node(g, OPS.TOKEN_LOGIN, TokenController, TokenController.login, is_done=is_done_token_login)
+    # Operation dependency graph representation for simple topological ordering, created anew for every application
+    # so that 'is_done' predicates only ever see statuses of their own application.
+    g = networkx.DiGraph()
+
+    add_op_node(g, OPS.ACTIVATE_AUTH_CERT, CertController, CertController.activate, is_done=is_done_auth_cert_activate,
+                status_facets=(StatusFacet.KEYS_AND_CERTS,), waits_for_global_conf=True)
+    add_op_node(g, OPS.REGISTER_AUTH_CERT, CertController, CertController.register, is_done=is_done_auth_cert_register,
+                status_facets=(StatusFacet.KEYS_AND_CERTS,), waits_for_global_conf=True)
+    add_op_node(g, OPS.IMPORT_CERTS, CertController, CertController.import_, is_done=is_done_cert_import,
+                status_facets=(StatusFacet.KEYS_AND_CERTS,))
+    add_op_node(g, OPS.GENKEYS_CSRS, TokenController, TokenController.init_keys, is_done=is_done_token_keys_and_csrs,
+                status_facets=(StatusFacet.KEYS_AND_CERTS,))
+    add_op_node(g, OPS.TIMESTAMP_ENABLE, TimestampController, TimestampController.init, is_done=is_done_tsa,
+                status_facets=(StatusFacet.TIMESTAMPING,))
+    add_op_node(g, OPS.INIT, InitServerController, InitServerController._default, is_done=is_done_initialization,
+                status_facets=(StatusFacet.INIT,))
+    add_op_node(g, OPS.TOKEN_LOGIN, TokenController, TokenController.login, is_done=is_done_token_login,
+                status_facets=(StatusFacet.TOKEN,))
 
     # End-user operations without binary /done/ criteria.
 
     add_op_node(g, OPS.ADD_CLIENT, ClientController, ClientController.add, is_done=(lambda ssn: True))
-    add_op_node(g, OPS.REGISTER_CLIENT, ClientController, ClientController.register, is_done=(lambda ssn: True))
+    add_op_node(g, OPS.REGISTER_CLIENT, ClientController, ClientController.register, is_done=(lambda ssn: True),
+                waits_for_global_conf=True)
     add_op_node(g, OPS.UPDATE_CLIENT, ClientController, ClientController.update, is_done=(lambda ssn: True))
     add_op_node(g, OPS.ADD_SERVICE_DESC, ServiceController, ServiceController.add_description, is_done=(lambda ssn: True))
     add_op_node(g, OPS.ENABLE_SERVICE_DESC, ServiceController, ServiceController.enable_description, is_done=(lambda ssn: True))
@@ -214,6 +228,12 @@ def opdep_init(app):
     topologically_sorted = list(networkx.topological_sort(g))
     app.OP_GRAPH = g
     app.OP_DEPENDENCY_LIST = topologically_sorted
+    # Latest known /API config/ and /server status/ per security server name, kept apart from the read-only graph so
+    # that security servers can be processed concurrently.
+    app.OP_SERVER_STATUSES = {}
+
+    # API configurations created during the run, per security server name.
+    app.api_configs = {}
 
     # Do not presume autoconfig, activated on explicit invocation.
     app.auto_apply = False
@@ -233,7 +253,11 @@ class XRDSST(App):
         hooks = [
             ('pre_setup', opdep_init),
             ('pre_setup', lambda app: less_verbose_urllib()),
-            ('pre_close', revoke_api_key)
+            ('pre_setup', BaseController.mark_api_call_stats),
+            ('pre_close', revoke_api_key),
+            ('pre_close', lambda app: close_ssh_transport()),
+            ('pre_close', lambda app: log_shared_rest_client_stats()),
+            ('pre_close', BaseController.log_api_call_stats)
         ]
 
         # call sys.exit() on close
@@ -251,7 +275,8 @@ class XRDSST(App):
         handlers = [BaseController, StatusController, ClientController, CertController, TimestampController,
                     TokenController, InitServerController, AutoController, ServiceController, UserController,
                     EndpointController, MemberController, BackupController, LocalGroupController, DiagnosticsController,
-                    KeyController, CsrController, InstanceController, SecurityServerController, InternalTlsController]
+                    KeyController, CsrController, InstanceController, SecurityServerController, InternalTlsController,
+                    ApiKeyController, PlanController]
 
     api_keys = {}  # Keep key references for autoconfiguration and eventual revocation
 
@@ -5,6 +5,7 @@ texts = {
 
     # Root application parameters
     'root.parameter.configfile.description': "Specify configuration file to use instead of default 'config/xrdsst.yml'",
+    'root.parameter.parallel.description': "Configure up to N security servers concurrently, overrides configuration file 'parallelism'",
 
     # Controllers
     'auto.controller.description': 'Automatically performs all operations possible with configuration.',
@@ -26,13 +27,32 @@ texts = {
     'instance.controller.description': 'Commands for performing instance operations',
     'security_server.controller.description': 'Commands for performing security server operations',
     'internal_tls.controller.description': 'Commands for performing tls certificate operations',
+    'apikey.controller.description': 'Commands for managing cached API keys',
+    'plan.controller.description': 'Shows changes needed for security servers to reach configured state.',
+
+    # Controller parameters
+    'auto.parameter.plan.description': 'Perform only the changes planned against current security server state, as shown by plan command.',
+    'auto.parameter.wait.description': 'Wait up to SECONDS (default 3600) for global configuration renewal when operation completion '
+                                       'depends on it, resuming the configuration when completed.',
+    'status.parameter.watch.description': 'Keep refreshing the statuses every SECONDS, showing only the servers with changed status.',
+    'status.parameter.budget.description': 'Time in SECONDS single server status refresh may take in watch mode, defaults to watch interval.',
     # Messages
     'message.file.not.found': "File '{}' not found.",
     'message.file.unreadable': "Could not read file '{}'.",
     'message.config.unparsable': "Error parsing config: {}",
     'message.config.serverless': "No security servers defined in '{}'.",
     'message.server.keyless': "No API key available/acquired for '{}'.",
-    'message.skipped': "SKIPPED '{}'"
+    'message.skipped': "SKIPPED '{}'",
+    'message.parallelism.invalid': "Invalid parallelism '{}', security servers will be configured sequentially.",
+    'message.parallel.summary': "Configured {} security servers with {} workers in {:.3f} s:",
+    'message.rate_limit.summary': "{} API calls delayed by rate limits, {:.3f} s in total.",
+    'message.retry.summary': "Retried failed API calls {} times, {} calls succeeded on retry, {} failed after all retries.",
+    'message.rate_limit.backoffs': "Adaptive rate limits lowered {} times on security server overload signals.",
+    'message.plan.summary': "Planned {} changes for '{}' in {} operations.",
+    'message.status.watch.changes': "Status changed for {} of {} security servers at {}:",
+    'message.status.watch.over_budget': "Status refresh of '{}' exceeds {:.3f} s budget, previous status retained.",
+    'message.status.watch.unreachable': "Status refresh of '{}' failed, no connectivity ({}).",
+    'message.api_key_cache.disabled': "API key cache not configured or its secret not available, no cached API keys to revoke."
 }
 
 server_error_map = {
@@ -12,11 +12,15 @@
 
 from __future__ import absolute_import
 
+import contextlib
 import io
 import json
 import logging
+import random
 import re
 import ssl
+import threading
+import time
 
 import certifi
 # python 2 and python 3 compatibility library
@@ -32,6 +36,111 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
+class RetryPolicy(object):
+    """Retry policy for transient Admin API call failures.
+
+    Requests with idempotent methods are retried on connection errors and on
+    502/503/504 responses, waiting exponentially growing, randomized (full
+    jitter) delay between the attempts. POST and PATCH requests are only
+    retried when connection could not be established, unless made within
+    `retry_safe()` block.
+
+    :param retries: maximum number of retries per request, 0 disables retries
+    :param backoff: base delay in seconds, doubled for every retry
+    :param max_backoff: upper bound of single delay in seconds
+    """
+
+    IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+    RETRY_STATUSES = frozenset([502, 503, 504])
+
+    def __init__(self, retries=3, backoff=0.5, max_backoff=10.0):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def is_retryable(self, method, error):
+        """Returns whether request with `method` that failed with `error` may be retried."""
+        if isinstance(error, urllib3.exceptions.MaxRetryError) and \
+                isinstance(error.reason, (urllib3.exceptions.NewConnectionError, urllib3.exceptions.ConnectTimeoutError)):
+            return True  # Request never reached the server
+        if method not in self.IDEMPOTENT_METHODS and not getattr(_RETRY_SAFE, 'active', False):
+            return False
+        if isinstance(error, ApiException):
+            return error.status in self.RETRY_STATUSES
+        return isinstance(error, (urllib3.exceptions.MaxRetryError, urllib3.exceptions.ProtocolError,
+                                  urllib3.exceptions.TimeoutError, ConnectionError))
+
+    def delay(self, attempt, error=None):
+        """Returns seconds to wait before retry `attempt` (0 for the first),
+        honouring Retry-After header of the failed response, if any."""
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+        retry_after = (error.headers or {}).get('Retry-After') if isinstance(error, ApiException) else None
+        if retry_after and str(retry_after).isdigit():
+            delay = max(delay, min(self.max_backoff, float(retry_after)))
+        return delay
+
+
+_RETRY_POLICY = RetryPolicy()
+_RETRY_SAFE = threading.local()
+_RETRY_STATS = {'retries': 0, 'recovered': 0, 'exhausted': 0}
+_RETRY_STATS_LOCK = threading.Lock()
+
+
+def retry_policy():
+    """Returns retry policy applied by all REST clients."""
+    return _RETRY_POLICY
+
+
+def set_retry_policy(policy):
+    """Sets retry policy applied by all REST clients, None for default."""
+    global _RETRY_POLICY
+    _RETRY_POLICY = policy or RetryPolicy()
+
+
+@contextlib.contextmanager
+def retry_safe():
+    """Marks non-idempotent (POST, PATCH) requests made by current thread
+    within the block as safe to retry."""
+    previous = getattr(_RETRY_SAFE, 'active', False)
+    _RETRY_SAFE.active = True
+    try:
+        yield
+    finally:
+        _RETRY_SAFE.active = previous
+
+
+def retry_stats():
+    """Returns counts of retries made, of requests that succeeded after
+    retrying and of requests that failed after exhausting the retries."""
+    with _RETRY_STATS_LOCK:
+        return dict(_RETRY_STATS)
+
+
+def reset_retry_stats():
+    with _RETRY_STATS_LOCK:
+        for key in _RETRY_STATS:
+            _RETRY_STATS[key] = 0
+
+
+def _count_retry_stat(key):
+    with _RETRY_STATS_LOCK:
+        _RETRY_STATS[key] += 1
+
+
+def _adapt_retry_rate(url, error):
+    """Feeds `error` of the attempt about to be retried back to the call
+    rate limit of the security server at `url`."""
+    from xrdsst.api_client.extensions import adapt_rate  # Extensions build on this module.
+    adapt_rate('/'.join(url.split('/')[:3]), error)
+
+
+def _limit_retry_rate(url):
+    """Counts retry attempt against the call rate limit of the security
+    server at `url`, the same as the first attempt."""
+    from xrdsst.api_client.extensions import limit_rate  # Extensions build on this module.
+    limit_rate('/'.join(url.split('/')[:3]))
+
+
 class RESTResponse(io.IOBase):
 
     def __init__(self, resp):
@@ -71,7 +180,9 @@ class RESTClientObject(object):
             # if not set certificate file, use Mozilla's root certificates.
             ca_certs = certifi.where()
 
-        addition_pool_args = {}
+        # Retrying is left to RetryPolicy, connection failures still surface as MaxRetryError. Redirects are followed
+        # as with urllib3 default retries.
+        addition_pool_args = {'retries': urllib3.Retry(total=None, connect=0, read=0, status=0, redirect=3)}
         if configuration.assert_hostname is not None:
             addition_pool_args['assert_hostname'] = configuration.assert_hostname  # noqa: E501
 
@@ -107,7 +218,38 @@ class RESTClientObject(object):
     def request(self, method, url, query_params=None, headers=None,
                 body=None, post_params=None, _preload_content=True,
                 _request_timeout=None):
-        """Perform requests.
+        """Perform requests, retrying transient failures as allowed by the
+        retry policy. Parameters as for `request_once`.
+        """
+        method = method.upper()
+        policy = retry_policy()
+        attempt = 0
+        while True:
+            try:
+                r = self.request_once(method, url, query_params, dict(headers or {}), body,
+                                      post_params, _preload_content, _request_timeout)
+                if attempt > 0:
+                    _count_retry_stat('recovered')
+                return r
+            except (ApiException, urllib3.exceptions.HTTPError, ConnectionError) as err:
+                if not policy.is_retryable(method, err):
+                    raise
+                if attempt >= policy.retries:
+                    if attempt > 0:
+                        _count_retry_stat('exhausted')
+                    raise
+                delay = policy.delay(attempt, err)
+                logger.debug("retrying %s %s in %.3f s after %s", method, url, delay, type(err).__name__)
+                _count_retry_stat('retries')
+                _adapt_retry_rate(url, err)
+                attempt += 1
+                time.sleep(delay)
+                _limit_retry_rate(url)
+
+    def request_once(self, method, url, query_params=None, headers=None,
+                     body=None, post_params=None, _preload_content=True,
+                     _request_timeout=None):
+        """Perform single request attempt.
 
         :param method: http request method
         :param url: http request url